@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Prometheus metrics for pod provisioning.
+
+Serves /metrics in the Prometheus text format, built on each scrape from the
+two event streams the boot already writes: the boot timeline
+(PIXELAI_BOOT_TIMELINE, see boot_profile.py) for phase durations, and the
+downloader progress events (PIXELAI_PROGRESS, see Runpod/model_progress.py)
+for bytes, active streams, per-backend throughput, retries and failures.
+Once the boot is finished the phases come from its saved timeline, so the
+endpoint keeps answering while ComfyUI runs.
+
+A stalled pod shows up as pixelai_download_active_streams > 0 while
+time() - pixelai_download_last_progress_timestamp_seconds keeps growing.
+
+Environment:
+    PIXELAI_METRICS_PORT   Listen port (default 9188)
+    PIXELAI_PROGRESS       Downloader events file (a udp:// destination has no file to read)
+
+Usage:
+    boot_metrics.py serve [--port 9188]
+    boot_metrics.py dump          (print the metrics once)
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import boot_profile
+
+DEFAULT_PORT = int(os.environ.get("PIXELAI_METRICS_PORT", "9188"))
+PROGRESS_FILE = os.environ.get("PIXELAI_PROGRESS", "")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# --- Collecting ---
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+class Metrics:
+    """Collects samples and renders them with one HELP/TYPE header per metric."""
+
+    def __init__(self):
+        self.families = {}
+
+    def add(self, name, metric_type, help_text, value, **labels):
+        family = self.families.setdefault(name, {"type": metric_type, "help": help_text, "samples": []})
+        family["samples"].append((labels, value))
+
+    def render(self):
+        lines = []
+        for name, family in self.families.items():
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['type']}")
+            for labels, value in family["samples"]:
+                label_text = ",".join(f'{k}="{_label(v)}"' for k, v in sorted(labels.items()))
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+def latest_timeline():
+    """The boot in progress, or the last finished boot's saved timeline."""
+    events = boot_profile.load_events()
+    if events:
+        return boot_profile.build_timeline(events), True
+    try:
+        with open(os.path.join(boot_profile.PROFILE_DIR, boot_profile.HISTORY_FILE), "r", encoding="utf-8") as f:
+            last = [line for line in f if line.strip()][-1]
+        with open(os.path.join(boot_profile.PROFILE_DIR, json.loads(last)["timeline"]), "r", encoding="utf-8") as f:
+            return json.load(f), False
+    except (OSError, ValueError, IndexError, KeyError):
+        return None, False
+
+def collect_phases(metrics, now):
+    timeline, in_progress = latest_timeline()
+    metrics.add("pixelai_boot_in_progress", "gauge", "1 while the boot timeline is still being recorded",
+                int(in_progress))
+    if not timeline:
+        return
+    metrics.add("pixelai_boot_duration_seconds", "gauge", "Seconds from the first to the last recorded boot phase",
+                timeline["total_seconds"])
+    for phase in timeline["phases"]:
+        duration = phase["duration"]
+        if duration is None and in_progress:
+            duration = round(now - phase["start"], 3)  # Still running: time spent so far
+        metrics.add("pixelai_boot_phase_duration_seconds", "gauge",
+                    "Duration of each boot phase (elapsed time for running phases)",
+                    duration if duration is not None else 0, phase=phase["name"], status=phase["status"])
+        if phase.get("bytes"):
+            metrics.add("pixelai_boot_phase_bytes", "gauge", "Bytes processed by a boot phase",
+                        phase["bytes"], phase=phase["name"])
+
+def load_progress(path):
+    events = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    pass
+    except OSError:
+        pass
+    return events
+
+def collect_downloads(metrics, events):
+    """Download counters from the progress events (one pass, O(events))."""
+    files = {}
+    started = {}
+    attempts = {}
+    backend_bytes = {}
+    backend_seconds = {}
+    failures = {}
+    last_progress = 0
+    for event in events:
+        kind = event.get("event")
+        if kind == "planned":
+            for task in event.get("tasks", []):
+                files.setdefault(task["key"], {"pack": event.get("pack"), "bytes": 0,
+                                               "status": "present" if task.get("present") else "pending"})
+            continue
+        key = event.get("key")
+        if not key:
+            continue
+        entry = files.setdefault(key, {"pack": event.get("pack"), "bytes": 0, "status": "pending"})
+        if kind == "started":
+            attempts[key] = attempts.get(key, 0) + 1
+            started[key] = event["time"]
+            # Bytes of earlier attempts stay counted, so the byte counter never goes down on a retry
+            entry.update(status="downloading", earlier=entry.get("earlier", 0) + entry["bytes"], bytes=0)
+        elif kind == "progress":
+            entry["bytes"] = event["bytes"]
+            last_progress = max(last_progress, event["time"])
+        elif kind == "verified":
+            source = event.get("source", "hub")
+            entry.update(status="done", bytes=event["bytes"])
+            backend_bytes[source] = backend_bytes.get(source, 0) + event["bytes"]
+            if key in started:
+                backend_seconds[source] = backend_seconds.get(source, 0) + event["time"] - started.pop(key)
+            last_progress = max(last_progress, event["time"])
+        elif kind == "extracted":
+            entry["status"] = "done"
+        elif kind == "failed":
+            reason = event.get("reason", "")
+            failure = "verification" if reason.startswith("verification failed") or "ZIP" in reason else "download"
+            failures[failure] = failures.get(failure, 0) + 1
+            entry["status"] = "failed"
+            started.pop(key, None)
+
+    per_pack = {}
+    for entry in files.values():
+        per_pack[entry["pack"]] = per_pack.get(entry["pack"], 0) + entry.get("earlier", 0) + entry["bytes"]
+    for pack, total in sorted(per_pack.items(), key=lambda item: str(item[0])):
+        metrics.add("pixelai_download_bytes_total", "counter", "Bytes downloaded in this boot (all attempts)", total,
+                    pack=pack or "unknown")
+    metrics.add("pixelai_download_active_streams", "gauge", "Files currently downloading",
+                sum(1 for f in files.values() if f["status"] == "downloading"))
+    statuses = {}
+    for entry in files.values():
+        statuses[entry["status"]] = statuses.get(entry["status"], 0) + 1
+    for status in ("pending", "downloading", "done", "present", "failed"):
+        metrics.add("pixelai_download_files", "gauge", "Planned files by state", statuses.get(status, 0),
+                    status=status)
+    for backend in sorted(backend_bytes):
+        metrics.add("pixelai_download_backend_bytes_total", "counter", "Bytes of verified files per source",
+                    backend_bytes[backend], backend=backend)
+        seconds = backend_seconds.get(backend, 0)
+        metrics.add("pixelai_download_backend_seconds_total", "counter", "Download time of verified files per source",
+                    round(seconds, 3), backend=backend)
+        metrics.add("pixelai_download_backend_throughput_bytes_per_second", "gauge",
+                    "Average per-file throughput per source", round(backend_bytes[backend] / seconds) if seconds else 0,
+                    backend=backend)
+    metrics.add("pixelai_download_retries_total", "counter", "Downloads started again for a file already attempted",
+                sum(count - 1 for count in attempts.values()))
+    for failure in ("download", "verification"):
+        metrics.add("pixelai_download_failures_total", "counter", "Failed downloads by kind",
+                    failures.get(failure, 0), kind=failure)
+    metrics.add("pixelai_download_last_progress_timestamp_seconds", "gauge",
+                "Unix time of the last byte progress or completed file", last_progress)
+
+def collect():
+    """Renders every metric from the current event files."""
+    now = time.time()
+    metrics = Metrics()
+    metrics.add("pixelai_metrics_scrape_timestamp_seconds", "gauge", "Unix time of this scrape", round(now, 3))
+    collect_phases(metrics, now)
+    if PROGRESS_FILE and not PROGRESS_FILE.startswith("udp://"):
+        collect_downloads(metrics, load_progress(PROGRESS_FILE))
+    return metrics.render()
+
+# --- Serving ---
+class MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = collect().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+# --- CLI ---
+def cmd_serve(args):
+    server = ThreadingHTTPServer(("0.0.0.0", args.port), MetricsHandler)
+    server.daemon_threads = True
+    print(f"📈 Provisioning metrics on http://0.0.0.0:{args.port}/metrics", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def cmd_dump(args):
+    sys.stdout.write(collect())
+    return 0
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Prometheus metrics for pod provisioning.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("serve", help="Serve /metrics")
+    p.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("dump", help="Print the metrics once")
+    p.set_defaults(func=cmd_dump)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+if __name__ == "__main__":
+    main()
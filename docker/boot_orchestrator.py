@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+First-boot orchestrator for runpod-start.
+
+Runs the boot phases as a dependency graph instead of one after another:
+model downloads are pure network I/O and start as soon as the ComfyUI folder
+exists, alongside the installer's apt/pip work, and ComfyUI starts as soon as
+the installer is done while downloads continue (ComfyUI rescans model folders,
+so files show up as they land). A timing report is printed once every phase
+has finished, then the orchestrator stays in the foreground with ComfyUI.
+
+Dependencies are ordering only: a phase waits for the phases it needs to
+finish (or, for ComfyUI, to accept connections) whether they succeeded or
+not, the same best-effort behaviour the sequential boot had.
+
+Environment:
+    PIXELAI_BOOT_DOWNLOAD_JOBS   Downloader scripts running at once (default 2)
+    PIXELAI_BOOT_LOG_DIR         Per-phase logs (default /var/log/pixelai-boot)
+"""
+
+import os
+import sys
+import time
+import signal
+import socket
+import argparse
+import threading
+import subprocess
+
+import boot_profile
+
+COMFY_REPO = "https://github.com/comfyanonymous/ComfyUI.git"
+COMFY_PORT = 8188
+DOWNLOAD_JOBS = int(os.environ.get("PIXELAI_BOOT_DOWNLOAD_JOBS", "2"))
+LOG_DIR = os.environ.get("PIXELAI_BOOT_LOG_DIR", "/var/log/pixelai-boot")
+READY_TIMEOUT = 1800  # Seconds ComfyUI may take to open its port
+
+# Same scripts and menu answers the sequential boot used
+DOWNLOAD_SCRIPTS = [
+    "Runpod/Download_models_GGUF.py",
+    "Runpod/Download_models_GGUF_VACE.py",
+    "Runpod/Download_models_Flux_Kontext_GGUF.py",
+    "Runpod/Download_models_GGUF_PHANTOM.py",
+    "Runpod/Download_wan2-2_T2V.py",
+    "Runpod/Download_wan2-2_I2V.py",
+    "Runpod/Download_models_NSFW.py",
+]
+DOWNLOAD_ANSWERS = "1\n1\n"
+
+print_lock = threading.Lock()
+children = []
+
+def log(message):
+    """Thread-safe print with the runpod-start prefix"""
+    with print_lock:
+        print(f"[boot] {message}", flush=True)
+
+# --- Phase graph ---
+def build_phases(workdir, installer_path, boot_mark, restore_script=None):
+    """
+    Returns the boot phases in start order.
+
+    Each phase is a dict: name, command, needs (phase names), and optionally
+    cwd, env, stdin, pool (shared concurrency limit), stream (print output
+    instead of only logging it), service (long-running; done once ready_port
+    accepts connections), after (callback run when the phase ends), measure
+    (directory whose growth is reported as the phase's bytes) and pack (the
+    downloader pack whose installed bytes are reported instead).
+
+    With restore_script (images built with PREBUILD_COMFYUI=1) the baked
+    ComfyUI tree is restored instead of running the installer.
+    """
+    comfy_dir = os.path.join(workdir, "ComfyUI")
+    models_dir = os.path.join(comfy_dir, "models")
+    installer_repo = os.path.join(workdir, "pixelaiLabs_ComfyUI_Installer")
+    download_env = dict(os.environ, COMFY_MODELS_DIR=models_dir)
+
+    def mark_installed(phase):
+        with open(boot_mark, "w") as f:
+            f.write(f"installed={time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())}\n")
+
+    phases = [
+        {
+            "name": "hub-client",
+            "command": ["bash", "-c", "python3 -c 'import huggingface_hub' 2>/dev/null || "
+                                      "python3 -m pip install --quiet huggingface_hub hf_transfer"],
+            "needs": []
+        }
+    ]
+    if restore_script:
+        install = "restore"
+        phases += [
+            {
+                "name": "restore",
+                "command": ["bash", restore_script, workdir],
+                "needs": [],
+                "stream": True,
+                "measure": comfy_dir,
+                "after": mark_installed
+            },
+            {
+                # Installed by the installer on a normal boot, not baked into the image
+                "name": "download:joy_caption_llm",
+                "command": ["bash", os.path.join(installer_repo, "Runpod", "download_joy_caption_llm.sh")],
+                "needs": ["restore"],
+                "env": download_env,
+                "pool": "downloads",
+                "measure": os.path.join(models_dir, "LLM")
+            }
+        ]
+    else:
+        install = "install"
+        phases += [
+            {
+                # The installer clones ComfyUI too, but downloads would otherwise create
+                # ComfyUI/models first and make that clone fail
+                "name": "clone",
+                "command": ["bash", "-c", f"[ -d '{comfy_dir}/.git' ] || git clone {COMFY_REPO} '{comfy_dir}'"],
+                "needs": []
+            },
+            {
+                "name": "install",
+                "command": ["bash", installer_path],
+                "needs": ["clone"],
+                "stream": True,
+                "measure": os.path.join(comfy_dir, "venv"),
+                "after": mark_installed
+            }
+        ]
+    tree_ready = "restore" if restore_script else "clone"
+
+    for script in DOWNLOAD_SCRIPTS:
+        if os.path.isfile(os.path.join(installer_repo, script)):
+            phases.append({
+                "name": "download:" + os.path.splitext(os.path.basename(script))[0].replace("Download_", ""),
+                "command": ["python3", script],
+                "needs": [tree_ready, "hub-client"],
+                "cwd": installer_repo,
+                "env": download_env,
+                "stdin": DOWNLOAD_ANSWERS,
+                "pool": "downloads",
+                "pack": os.path.splitext(os.path.basename(script))[0]
+            })
+
+    run_script = os.path.join(workdir, "Run_Comfyui.sh")
+    comfy_command = (f"if [ -x '{run_script}' ]; then exec bash '{run_script}'; fi; "
+                     f"cd '{comfy_dir}' && . venv/bin/activate && exec python main.py --fast --listen --disable-cuda-malloc")
+    phases.append({
+        "name": "comfyui",
+        "command": ["bash", "-c", comfy_command],
+        "needs": [install],
+        "stream": True,
+        "service": True,
+        "ready_port": COMFY_PORT
+    })
+    return phases
+
+def port_open(port):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.settimeout(1)
+        return sock.connect_ex(("127.0.0.1", port)) == 0
+
+def _pump(stream, name, log_file, echo):
+    """Copies a phase's output to its log file (and to stdout with a prefix when streaming)."""
+    for line in iter(stream.readline, b""):
+        log_file.write(line)
+        log_file.flush()
+        if echo:
+            text = line.decode("utf-8", "replace").rstrip()
+            with print_lock:
+                print(f"[{name}] {text}", flush=True)
+
+class Orchestrator:
+    def __init__(self, phases, models_dir=None):
+        self.phases = {p["name"]: p for p in phases}
+        self.models_dir = models_dir
+        self.order = [p["name"] for p in phases]
+        self.done = {name: threading.Event() for name in self.order}
+        self.results = {}
+        self.pools = {"downloads": threading.Semaphore(DOWNLOAD_JOBS)}
+        self.service = None
+        self.started_at = time.time()
+
+    def run_phase(self, name):
+        phase = self.phases[name]
+        for need in phase["needs"]:
+            if need in self.done:
+                self.done[need].wait()
+        pool = self.pools.get(phase.get("pool"))
+        if pool:
+            pool.acquire()
+        result = {"needs": phase["needs"]}
+        try:
+            result.update(self._execute(phase))
+        except Exception as e:
+            result.update({"status": "error", "error": str(e)})
+        finally:
+            if pool:
+                pool.release()
+            self.results[name] = result
+            if phase.get("after"):
+                phase["after"](phase)
+            self.done[name].set()
+
+    def _execute(self, phase):
+        name = phase["name"]
+        os.makedirs(LOG_DIR, exist_ok=True)
+        log_path = os.path.join(LOG_DIR, name.replace(":", "_") + ".log")
+        start = time.time()
+        log(f"▶ {name} (waited {start - self.started_at:.1f}s)")
+        log_file = open(log_path, "ab")
+        bytes_before = boot_profile.dir_bytes(phase["measure"]) if phase.get("measure") else 0
+        process = subprocess.Popen(
+            phase["command"],
+            cwd=phase.get("cwd"),
+            env=phase.get("env"),
+            stdin=subprocess.PIPE if phase.get("stdin") else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT
+        )
+        children.append(process)
+        if phase.get("stdin"):
+            process.stdin.write(phase["stdin"].encode())
+            process.stdin.close()
+        pump = threading.Thread(target=_pump, args=(process.stdout, name, log_file, phase.get("stream")), daemon=True)
+        pump.start()
+
+        if phase.get("service"):
+            while not port_open(phase["ready_port"]):
+                if process.poll() is not None or time.time() - start > READY_TIMEOUT:
+                    status = "exited" if process.poll() is not None else "timeout"
+                    log(f"✖ {name} did not come up ({status}); see {log_path}")
+                    return {"status": status, "start": start, "end": time.time(), "log": log_path}
+                time.sleep(1)
+            self.service = process
+            log(f"✔ {name} listening on port {phase['ready_port']} after {time.time() - start:.1f}s")
+            return {"status": "ready", "start": start, "end": time.time(), "log": log_path}
+
+        code = process.wait()
+        pump.join()
+        log_file.close()
+        end = time.time()
+        status = "ok" if code == 0 else f"exit {code}"
+        log(f"{'✔' if code == 0 else '✖'} {name} {status} in {end - start:.1f}s")
+        result = {"status": status, "start": start, "end": end, "log": log_path}
+        if phase.get("pack") and self.models_dir:
+            result["bytes"] = boot_profile.pack_bytes(self.models_dir, phase["pack"], start, end)
+        elif phase.get("measure"):
+            result["bytes"] = max(0, boot_profile.dir_bytes(phase["measure"]) - bytes_before)
+        return result
+
+    def run(self):
+        threads = [threading.Thread(target=self.run_phase, args=(name,), daemon=True) for name in self.order]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # The timeline summary includes the installer's own steps; the plain report is the fallback
+        if not self.write_timeline():
+            self.report()
+
+    def report(self):
+        """Prints start offset, duration and status of every phase."""
+        total = max(r.get("end", self.started_at) for r in self.results.values()) - self.started_at
+        with print_lock:
+            print("=" * 80)
+            print(f"⏱️  Boot phases (all done after {total:.1f}s)")
+            print(f"{'phase':<32}{'start':>9}{'duration':>11}  status")
+            for name in self.order:
+                result = self.results.get(name, {})
+                start = result.get("start", self.started_at) - self.started_at
+                duration = result.get("end", result.get("start", self.started_at)) - result.get("start", self.started_at)
+                print(f"{name:<32}{start:>8.1f}s{duration:>10.1f}s  {result.get('status', '?')}")
+            print("=" * 80, flush=True)
+
+    def write_timeline(self):
+        """Adds the phases to the boot timeline (next to the installer's own steps) and writes it out; None when not profiling."""
+        for name in self.order:
+            result = self.results.get(name, {})
+            if "start" in result:
+                boot_profile.record(name, result["start"], result.get("end", result["start"]),
+                                    result.get("status", "?"), result.get("bytes"))
+        return boot_profile.finish()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run install, downloads and ComfyUI start as a dependency graph.")
+    parser.add_argument("--workdir", required=True)
+    parser.add_argument("--installer", required=True)
+    parser.add_argument("--boot-mark", required=True, help="File written once the installer has run")
+    parser.add_argument("--restore-prebuilt", help="Restore script to run instead of the installer")
+    args = parser.parse_args()
+
+    def stop(signum, frame):
+        for process in children:
+            if process.poll() is None:
+                process.terminate()
+        sys.exit(128 + signum)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    phases = build_phases(args.workdir, args.installer, args.boot_mark, args.restore_prebuilt)
+    orchestrator = Orchestrator(phases, os.path.join(args.workdir, "ComfyUI", "models"))
+    orchestrator.run()
+    if orchestrator.service is None:
+        log("ComfyUI is not running. Dropping to shell.")
+        os.execvp("bash", ["bash"])
+    sys.exit(orchestrator.service.wait())
+
+if __name__ == "__main__":
+    main()
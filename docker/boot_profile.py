@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Boot timeline profiler.
+
+runpod-start, the boot orchestrator and the Runpod installer record the start
+and end of every provisioning phase (seeding, JupyterLab, apt, venv, pip,
+custom nodes, each downloader, ComfyUI becoming ready) together with the bytes
+it processed. Events are appended to a JSON-lines file while the pod boots;
+`finish` turns them into a timeline JSON and a human summary in
+/workspace/.pixelai_boot and appends one line per boot to history.jsonl, so
+boots of different image versions can be compared.
+
+Recording is a no-op unless PIXELAI_BOOT_TIMELINE points at the events file
+(runpod-start exports it), so running the installer by hand leaves no trace.
+
+Environment:
+    PIXELAI_BOOT_TIMELINE      Events file of the boot in progress
+    PIXELAI_BOOT_PROFILE_DIR   Where timelines are kept (default /workspace/.pixelai_boot)
+
+Usage:
+    boot_profile.py begin install:pip --measure /workspace/ComfyUI/venv
+    boot_profile.py end install:pip --measure /workspace/ComfyUI/venv
+    boot_profile.py end download:GGUF --pack Download_models_GGUF --models /workspace/ComfyUI/models
+    boot_profile.py finish [--wait-port 8188]
+    boot_profile.py history
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import calendar
+import argparse
+
+PROFILE_DIR = os.environ.get("PIXELAI_BOOT_PROFILE_DIR", "/workspace/.pixelai_boot")
+EVENTS_FILE = os.environ.get("PIXELAI_BOOT_TIMELINE")
+HISTORY_FILE = "history.jsonl"
+IMAGE_STAMP = "/opt/pixelailabs_installer/.image-built.txt"
+STATE_FILE_NAME = ".pixelai_install_state.json"  # Same as model_packs
+READY_TIMEOUT = 1800
+
+# --- Recording ---
+def dir_bytes(path):
+    """Apparent size of everything under path (0 if it does not exist)."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+def pack_bytes(models_dir, pack, start, end):
+    """Bytes a downloader pack installed between start and end, from the model install state."""
+    try:
+        with open(os.path.join(models_dir, STATE_FILE_NAME), "r", encoding="utf-8") as f:
+            files = json.load(f).get("files", {})
+    except (OSError, ValueError):
+        return 0
+    total = 0
+    for entry in files.values():
+        if entry.get("pack") != pack or not entry.get("installed_at"):
+            continue
+        installed = calendar.timegm(time.strptime(entry["installed_at"], "%Y-%m-%dT%H:%M:%SZ"))
+        if int(start) <= installed <= end:
+            total += entry.get("size") or 0
+    return total
+
+def append_event(event, events_file=None):
+    """Appends one event; returns False when no boot is being profiled."""
+    events_file = events_file or EVENTS_FILE
+    if not events_file:
+        return False
+    os.makedirs(os.path.dirname(events_file), exist_ok=True)
+    with open(events_file, "a", encoding="utf-8") as f:
+        f.write(json.dumps(event) + "\n")
+    return True
+
+def load_events(events_file=None):
+    events = []
+    try:
+        with open(events_file or EVENTS_FILE, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    pass  # A phase killed mid-write
+    except (OSError, TypeError):
+        pass
+    return events
+
+def begin(name, measure=None):
+    event = {"event": "begin", "phase": name, "time": time.time()}
+    if measure:
+        event["measure"] = measure
+        event["bytes_before"] = dir_bytes(measure)
+    return append_event(event)
+
+def end(name, status="ok", measure=None, bytes_done=None):
+    """Closes a phase; bytes are the measured growth of `measure` unless given explicitly."""
+    event = {"event": "end", "phase": name, "time": time.time(), "status": status}
+    if bytes_done is None and measure:
+        before = next((e.get("bytes_before", 0) for e in reversed(load_events())
+                       if e.get("event") == "begin" and e.get("phase") == name), 0)
+        bytes_done = max(0, dir_bytes(measure) - before)
+    if bytes_done is not None:
+        event["bytes"] = bytes_done
+    return append_event(event)
+
+def record(name, start, end_time, status="ok", bytes_done=None, parent=None):
+    """Records a phase whose timing is already known (used by the boot orchestrator)."""
+    event = {"event": "phase", "phase": name, "start": start, "end": end_time, "status": status}
+    if bytes_done is not None:
+        event["bytes"] = bytes_done
+    if parent:
+        event["parent"] = parent
+    return append_event(event)
+
+# --- Timeline ---
+def image_version():
+    try:
+        with open(IMAGE_STAMP, "r") as f:
+            return f.read().strip().replace("built=", "")
+    except OSError:
+        return None
+
+def boot_id():
+    try:
+        with open("/proc/sys/kernel/random/boot_id", "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def build_timeline(events):
+    """Pairs begin/end events into phases ordered by start time."""
+    phases = {}
+    for event in events:
+        name = event["phase"]
+        if event["event"] == "phase":
+            phases[name] = {"name": name, "start": event["start"], "end": event["end"], "status": event["status"],
+                            "bytes": event.get("bytes")}
+        elif event["event"] == "begin":
+            phases[name] = {"name": name, "start": event["time"], "end": None, "status": "running", "bytes": None}
+        elif event["event"] == "end" and name in phases:
+            phases[name].update({"end": event["time"], "status": event.get("status", "ok"),
+                                 "bytes": event.get("bytes")})
+
+    ordered = sorted(phases.values(), key=lambda p: p["start"])
+    started_at = ordered[0]["start"] if ordered else time.time()
+    finished_at = max((p["end"] or p["start"] for p in ordered), default=started_at)
+    for phase in ordered:
+        phase["offset"] = round(phase["start"] - started_at, 3)
+        phase["duration"] = round(phase["end"] - phase["start"], 3) if phase["end"] else None
+        if phase["bytes"] and phase["duration"]:
+            phase["mb_per_s"] = round(phase["bytes"] / phase["duration"] / 1024 ** 2, 2)
+    return {
+        "image": image_version(),
+        "boot_id": boot_id(),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(started_at)),
+        "total_seconds": round(finished_at - started_at, 3),
+        "phases": ordered
+    }
+
+def _size(value):
+    if not value:
+        return "-"
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            return f"{value:.1f} {unit}" if unit != "B" else f"{value} B"
+        value /= 1024
+
+def format_summary(timeline):
+    lines = [
+        "=" * 80,
+        f"⏱️  Boot {timeline['started_at']} (image {timeline['image'] or 'unknown'}): {timeline['total_seconds']:.1f}s",
+        f"{'phase':<32}{'start':>9}{'duration':>11}{'bytes':>12}  status",
+    ]
+    for phase in timeline["phases"]:
+        duration = f"{phase['duration']:.1f}s" if phase["duration"] is not None else "-"
+        lines.append(f"{phase['name']:<32}{phase['offset']:>8.1f}s{duration:>11}{_size(phase['bytes']):>12}  {phase['status']}")
+    slowest = sorted((p for p in timeline["phases"] if p["duration"]), key=lambda p: -p["duration"])[:3]
+    if slowest:
+        lines.append("Slowest: " + ", ".join(f"{p['name']} ({p['duration']:.0f}s)" for p in slowest))
+    lines.append("=" * 80)
+    return "\n".join(lines)
+
+def finish(events_file=None):
+    """
+    Writes boot-<time>.json and .txt, appends to the history and clears the events file.
+
+    Returns:
+        dict: The timeline, or None if nothing was recorded.
+    """
+    events_file = events_file or EVENTS_FILE
+    events = load_events(events_file)
+    if not events:
+        return None
+    timeline = build_timeline(events)
+    stamp = timeline["started_at"].replace(":", "").replace("-", "")
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, f"boot-{stamp}")
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(timeline, f, indent=2)
+    summary = format_summary(timeline)
+    with open(base + ".txt", "w", encoding="utf-8") as f:
+        f.write(summary + "\n")
+    with open(os.path.join(PROFILE_DIR, HISTORY_FILE), "a", encoding="utf-8") as f:
+        f.write(json.dumps({
+            "started_at": timeline["started_at"],
+            "image": timeline["image"],
+            "total_seconds": timeline["total_seconds"],
+            "phases": {p["name"]: p["duration"] for p in timeline["phases"]},
+            "timeline": os.path.basename(base) + ".json"
+        }) + "\n")
+    os.remove(events_file)
+    print(summary, flush=True)
+    return timeline
+
+def wait_port(port, timeout=READY_TIMEOUT):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.settimeout(1)
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return True
+        time.sleep(1)
+    return False
+
+# --- CLI ---
+def cmd_begin(args):
+    begin(args.phase, args.measure)
+    return 0
+
+def cmd_end(args):
+    bytes_done = None
+    if args.pack and args.models:
+        started = next((e["time"] for e in reversed(load_events())
+                        if e.get("event") == "begin" and e.get("phase") == args.phase), 0)
+        bytes_done = pack_bytes(args.models, args.pack, started, time.time())
+    end(args.phase, args.status, args.measure, bytes_done)
+    return 0
+
+def cmd_finish(args):
+    if args.wait_port:
+        # ComfyUI import time: from here until its port accepts connections
+        begin("comfyui")
+        ready = wait_port(args.wait_port)
+        end("comfyui", "ready" if ready else "timeout")
+    return 0 if finish() else 1
+
+def cmd_history(args):
+    try:
+        with open(os.path.join(PROFILE_DIR, HISTORY_FILE), "r", encoding="utf-8") as f:
+            boots = [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        boots = []
+    print(f"{'boot':<22}{'image':<22}{'total':>9}  slowest phases")
+    for boot in boots[-args.limit:]:
+        slowest = sorted(((d, n) for n, d in boot["phases"].items() if d), reverse=True)[:3]
+        print(f"{boot['started_at']:<22}{(boot['image'] or '-'):<22}{boot['total_seconds']:>8.1f}s  "
+              + ", ".join(f"{n} {d:.0f}s" for d, n in slowest))
+    return 0
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Record and report the boot timeline.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("begin", help="Mark the start of a phase")
+    p.add_argument("phase")
+    p.add_argument("--measure", help="Directory whose growth is the phase's bytes")
+    p.set_defaults(func=cmd_begin)
+
+    p = sub.add_parser("end", help="Mark the end of a phase")
+    p.add_argument("phase")
+    p.add_argument("--status", default="ok")
+    p.add_argument("--measure", help="Directory whose growth is the phase's bytes")
+    p.add_argument("--pack", help="Downloader pack whose installed bytes count for this phase")
+    p.add_argument("--models", help="Models directory holding the install state (with --pack)")
+    p.set_defaults(func=cmd_end)
+
+    p = sub.add_parser("finish", help="Write the timeline and summary of this boot")
+    p.add_argument("--wait-port", type=int, help="Record ComfyUI start until this port opens first")
+    p.set_defaults(func=cmd_finish)
+
+    p = sub.add_parser("history", help="Compare boot totals across boots and image versions")
+    p.add_argument("--limit", type=int, default=20)
+    p.set_defaults(func=cmd_history)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+if __name__ == "__main__":
+    main()
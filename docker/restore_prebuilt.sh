@@ -0,0 +1,40 @@
+#!/bin/bash
+# Places the ComfyUI tree baked into the image (PREBUILD_COMFYUI=1 builds) into
+# the workspace, instead of running the installer on first boot.
+#
+# The image was built with ComfyUI at /workspace/ComfyUI, so the venv's absolute
+# paths stay valid once it is back under that path. Modes (PIXELAI_PREBUILT_MODE):
+#   link  (default) ComfyUI code and custom nodes are copied, the venv is a symlink
+#                   into the image: seconds, and image upgrades ship a new venv
+#   copy            the venv is copied too, so pip changes persist on the volume
+set -euo pipefail
+
+WORKDIR="${1:-/workspace}"
+PREBUILT="${PIXELAI_PREBUILT_DIR:-/opt/comfyui-prebuilt}"
+MODE="${PIXELAI_PREBUILT_MODE:-link}"
+COMFY_DIR="$WORKDIR/ComfyUI"
+
+if [ ! -f "$PREBUILT/.prebuilt" ]; then
+  echo "[restore-prebuilt] No prebuilt ComfyUI in this image."
+  exit 1
+fi
+
+echo "[restore-prebuilt] Restoring ComfyUI from $PREBUILT ($MODE mode)"
+mkdir -p "$COMFY_DIR"
+# Never overwrite files the user already has on the volume (models, edited nodes)
+rsync -a --ignore-existing --exclude /venv "$PREBUILT/ComfyUI/" "$COMFY_DIR/"
+for script in Run_Comfyui.sh Activate_Venv.sh Update_Comfy.sh; do
+  [ -e "$WORKDIR/$script" ] || cp -a "$PREBUILT/$script" "$WORKDIR/$script"
+done
+
+if [ "$MODE" = "copy" ]; then
+  if [ -L "$COMFY_DIR/venv" ]; then rm "$COMFY_DIR/venv"; fi
+  rsync -a "$PREBUILT/ComfyUI/venv/" "$COMFY_DIR/venv/"
+elif [ -L "$COMFY_DIR/venv" ] || [ ! -e "$COMFY_DIR/venv" ]; then
+  ln -sfn "$PREBUILT/ComfyUI/venv" "$COMFY_DIR/venv"
+else
+  echo "[restore-prebuilt] Keeping existing venv at $COMFY_DIR/venv"
+fi
+
+cp "$PREBUILT/.prebuilt" "$COMFY_DIR/.prebuilt_from_image"
+echo "[restore-prebuilt] Done."
@@ -18,10 +18,47 @@ fi
 SEED_SRC="/opt/pixelailabs_installer"
 SEED_MARK="$WORKDIR/.seeded_from_image"
 
-# Seed once (non-destructive): copy only missing files
-if [ ! -f "$SEED_MARK" ]; then
+# Boot timeline: phases below (and the installer's own steps) are recorded with their
+# duration and bytes, and written to $WORKDIR/.pixelai_boot once ComfyUI accepts connections
+PROFILER="$SEED_SRC/docker/boot_profile.py"
+export PIXELAI_BOOT_PROFILE_DIR="$WORKDIR/.pixelai_boot"
+export PIXELAI_BOOT_TIMELINE="$PIXELAI_BOOT_PROFILE_DIR/current.jsonl"
+profile() {
+  if [ -f "$PROFILER" ]; then python3 "$PROFILER" "$@" >/dev/null 2>&1 || true; fi
+}
+# A boot that never got ComfyUI up still gets its (incomplete) timeline written
+if [ -f "$PIXELAI_BOOT_TIMELINE" ]; then profile finish; fi
+
+# Machine-readable progress events from every downloader (see Runpod/model_progress.py);
+# set PIXELAI_PROGRESS=udp://host:port to stream them to a dashboard instead of a file
+export PIXELAI_PROGRESS="${PIXELAI_PROGRESS:-$PIXELAI_BOOT_PROFILE_DIR/progress.jsonl}"
+case "$PIXELAI_PROGRESS" in
+  udp://*) ;;
+  *) mkdir -p "$(dirname "$PIXELAI_PROGRESS")" && : > "$PIXELAI_PROGRESS" ;;
+esac
+
+# Prometheus metrics of the provisioning (phase durations, download bytes, streams, failures)
+# on :9188/metrics from the events above; PIXELAI_METRICS=0 turns it off
+METRICS="$SEED_SRC/docker/boot_metrics.py"
+if [ "${PIXELAI_METRICS:-1}" = "1" ] && [ -f "$METRICS" ]; then
+  nohup python3 "$METRICS" serve --port "${PIXELAI_METRICS_PORT:-9188}" >/var/log/pixelai_metrics.log 2>&1 &
+fi
+
+# Seed on every boot, incrementally: only files the image changed since the last seed are
+# copied (per-file hashes from the image manifest); files edited on the volume are kept
+SEEDER="$SEED_SRC/docker/seed_workspace.py"
+if [ -f "$SEEDER" ] && [ -f "$SEED_SRC/.seed_manifest.json" ]; then
+  echo "[runpod-start] Seeding $WORKDIR from image manifest..."
+  profile begin seed
+  python3 "$SEEDER" sync "$SEED_SRC" "$WORKDIR" || echo "[runpod-start] WARNING: Seeding returned non-zero."
+  profile end seed
+  [ -f "$SEED_MARK" ] || echo "seeded=$(date -u +%FT%TZ)" > "$SEED_MARK"
+elif [ ! -f "$SEED_MARK" ]; then
+  # Images without a manifest: seed once (non-destructive)
   echo "[runpod-start] Seeding $WORKDIR from image contents..."
+  profile begin seed --measure "$WORKDIR"
   rsync -a "$SEED_SRC/" "$WORKDIR/"
+  profile end seed --measure "$WORKDIR"
   echo "seeded=$(date -u +%FT%TZ)" > "$SEED_MARK"
 fi
 
@@ -66,17 +103,66 @@ start_jupyter() {
   fi
 }
 
+# Serve this pod's installed models to other pods (they set PIXELAI_MIRRORS=http://<this-pod>:8090)
+start_model_mirror() {
+  local mirror_script="$WORKDIR/pixelaiLabs_ComfyUI_Installer/Runpod/model_mirror.py"
+  if [ "${PIXELAI_MIRROR_SERVE:-0}" = "1" ] && [ -f "$mirror_script" ]; then
+    echo "[runpod-start] Starting model mirror (port ${PIXELAI_MIRROR_PORT:-8090})"
+    (cd "$(dirname "$mirror_script")" && COMFY_MODELS_DIR="$WORKDIR/ComfyUI/models" \
+      nohup python3 model_mirror.py serve --port "${PIXELAI_MIRROR_PORT:-8090}" \
+      >/var/log/model_mirror.log 2>&1 &)
+  fi
+}
+
 # Ensure JupyterLab available and start FIRST
+profile begin jupyter
 ensure_jupyter
 start_jupyter
+profile end jupyter
+start_model_mirror
 
 # Run installer on first boot (after JupyterLab is up)
 BOOT_MARK="$WORKDIR/.installed_comfyui"
+PROGRESS_WATCH="$WORKDIR/pixelaiLabs_ComfyUI_Installer/Runpod/model_progress.py"
+if [ ! -f "$BOOT_MARK" ] && [ -f "$PROGRESS_WATCH" ] && [ "${PIXELAI_PROGRESS#udp://}" = "$PIXELAI_PROGRESS" ]; then
+  # One combined progress line (all downloaders, with ETA) in the pod log every 30s
+  (python3 "$PROGRESS_WATCH" watch "$PIXELAI_PROGRESS" --follow --every 30 --idle-exit 300 \
+    | sed -u 's/^/[downloads] /' || true) &
+fi
+ORCHESTRATOR="$SEED_SRC/docker/boot_orchestrator.py"
+# Images built with PREBUILD_COMFYUI=1 carry a ready venv and custom-node tree
+RESTORE_PREBUILT=""
+if [ -f "/opt/comfyui-prebuilt/.prebuilt" ] && [ "${PIXELAI_PREBUILT:-1}" = "1" ]; then
+  RESTORE_PREBUILT="$SEED_SRC/docker/restore_prebuilt.sh"
+fi
+if [ ! -f "$BOOT_MARK" ] && { [ -n "$INSTALLER_PATH" ] || [ -n "$RESTORE_PREBUILT" ]; } \
+   && [ -f "$ORCHESTRATOR" ] && [ "${PIXELAI_BOOT_ORCHESTRATOR:-1}" = "1" ]; then
+  # Overlapped first boot: downloads run alongside the installer and ComfyUI starts
+  # as soon as the installer is done (set PIXELAI_BOOT_ORCHESTRATOR=0 for the sequential boot)
+  ln -sf "$WORKDIR/Run_Comfyui.sh" /usr/local/bin/run-comfyui 2>/dev/null || true
+  echo "[runpod-start] First boot: running boot orchestrator"
+  exec python3 "$ORCHESTRATOR" --workdir "$WORKDIR" --installer "$INSTALLER_PATH" --boot-mark "$BOOT_MARK" \
+    ${RESTORE_PREBUILT:+--restore-prebuilt "$RESTORE_PREBUILT"}
+fi
 if [ ! -f "$BOOT_MARK" ]; then
-  if [ -n "$INSTALLER_PATH" ]; then
+  if [ -n "$RESTORE_PREBUILT" ]; then
+    echo "[runpod-start] First boot: restoring prebuilt ComfyUI from the image"
+    profile begin restore --measure "$WORKDIR/ComfyUI"
+    bash "$RESTORE_PREBUILT" "$WORKDIR" || echo "[runpod-start] WARNING: Restore returned non-zero."
+    profile end restore --measure "$WORKDIR/ComfyUI"
+    echo "installed=$(date -u +%FT%TZ)" > "$BOOT_MARK"
+    profile begin download:joy_caption_llm --measure "$WORKDIR/ComfyUI/models/LLM"
+    COMFY_MODELS_DIR="$WORKDIR/ComfyUI/models" bash "$WORKDIR/pixelaiLabs_ComfyUI_Installer/Runpod/download_joy_caption_llm.sh" \
+      || echo "[runpod-start] Joy Caption LLM download finished with errors (continuing)"
+    profile end download:joy_caption_llm --measure "$WORKDIR/ComfyUI/models/LLM"
+  elif [ -n "$INSTALLER_PATH" ]; then
     echo "[runpod-start] First boot: running installer at $INSTALLER_PATH"
+    profile begin install
     bash "$INSTALLER_PATH" || echo "[runpod-start] WARNING: Installer returned non-zero."
+    profile end install
     echo "installed=$(date -u +%FT%TZ)" > "$BOOT_MARK"
+  fi
+  if [ -f "$BOOT_MARK" ]; then
     # After successful install, set env for model downloaders and run them sequentially (best-effort)
     export COMFY_MODELS_DIR="$WORKDIR/ComfyUI/models"
     cd "$WORKDIR/pixelaiLabs_ComfyUI_Installer" 2>/dev/null || cd "$WORKDIR/pixelaiLabs_ComfyUI_Installer/Runpod" 2>/dev/null || true
@@ -91,10 +177,13 @@ if [ ! -f "$BOOT_MARK" ]; then
       Runpod/Download_models_NSFW.py; do
       if [ -f "$script" ]; then
         echo "[runpod-start] Running model downloader: $script"
+        phase="download:$(basename "$script" .py | sed 's/^Download_//')"
+        profile begin "$phase"
         python3 "$script" <<EOF || echo "[runpod-start] Downloader $script finished with errors (continuing)"
 1
 1
 EOF
+        profile end "$phase" --pack "$(basename "$script" .py)" --models "$COMFY_MODELS_DIR"
       fi
     done
   else
@@ -110,6 +199,26 @@ ln -sf "$WORKDIR/Run_Comfyui.sh" /usr/local/bin/run-comfyui 2>/dev/null || true
 # Start ComfyUI if not already listening on 8188
 if ! (ss -ltnp 2>/dev/null | grep -q ":8188"); then
   echo "[runpod-start] Starting ComfyUI (port 8188)"
+  # Storage tiering (PIXELAI_HOT_DIR on the container disk): the hot copies did not survive a
+  # restart, so put volume copies back before ComfyUI looks, then rebalance in the background
+  TIERS="$WORKDIR/pixelaiLabs_ComfyUI_Installer/Runpod/model_tiers.py"
+  if [ -n "${PIXELAI_HOT_DIR:-}" ] && [ -f "$TIERS" ]; then
+    (cd "$(dirname "$TIERS")" && COMFY_MODELS_DIR="$WORKDIR/ComfyUI/models" python3 model_tiers.py reconcile) \
+      || echo "[runpod-start] WARNING: Tier reconcile returned non-zero."
+    (cd "$(dirname "$TIERS")" && COMFY_MODELS_DIR="$WORKDIR/ComfyUI/models" \
+      nohup python3 model_tiers.py daemon --interval "${PIXELAI_TIER_INTERVAL:-600}" >/var/log/model_tiers.log 2>&1 &)
+  fi
+  # Read the models of the workflow about to be used into the page cache while ComfyUI starts
+  PREWARM="$WORKDIR/pixelaiLabs_ComfyUI_Installer/Runpod/model_prewarm.py"
+  if [ -n "${PIXELAI_PREWARM_WORKFLOW:-}" ] && [ -f "$PREWARM" ]; then
+    case "$PIXELAI_PREWARM_WORKFLOW" in /*) prewarm_workflow="$PIXELAI_PREWARM_WORKFLOW" ;; *) prewarm_workflow="$WORKDIR/$PIXELAI_PREWARM_WORKFLOW" ;; esac
+    (cd "$(dirname "$PREWARM")" && COMFY_MODELS_DIR="$WORKDIR/ComfyUI/models" \
+      nohup python3 model_prewarm.py warm "$prewarm_workflow" >/var/log/model_prewarm.log 2>&1 &)
+  fi
+  # Records ComfyUI's start-up until the port opens, then writes and prints the boot timeline
+  if [ -f "$PROFILER" ]; then
+    (python3 "$PROFILER" finish --wait-port 8188 || true) &
+  fi
   if [ -x "$WORKDIR/Run_Comfyui.sh" ]; then
     exec bash "$WORKDIR/Run_Comfyui.sh"
   elif [ -d "$WORKDIR/ComfyUI" ]; then
@@ -122,6 +231,7 @@ if ! (ss -ltnp 2>/dev/null | grep -q ":8188"); then
   fi
 else
   echo "[runpod-start] ComfyUI already running on 8188. Dropping to shell for logs."
+  profile finish
   exec bash
 fi
 
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Incremental workspace seeding.
+
+The image carries a manifest of every file it ships under
+/opt/pixelailabs_installer (path, size, mode, sha256), written at build time.
+On every boot the workspace is brought up to date against it: files the
+image changed since the volume was last seeded are copied, everything else is
+left alone after a manifest lookup. Only the files an image update touched
+are hashed or copied, so this is cheap enough to run on each start and volumes
+pick up new installer and downloader versions without a full re-seed.
+
+Files edited on the volume are never overwritten: when the image has a new
+version of a file whose volume copy differs from what was last seeded, the new
+version is written next to it as <file>.image-new instead. Files removed from
+the image are left on the volume.
+
+The volume remembers what it was seeded with in .pixelai_seed_manifest.json.
+Volumes seeded by the old one-shot rsync have no such record; there a file
+counts as untouched if it is not newer than the .seeded_from_image mark.
+
+Usage:
+    seed_workspace.py manifest /opt/pixelailabs_installer      (image build)
+    seed_workspace.py sync /opt/pixelailabs_installer /workspace [--dry-run]
+"""
+
+import os
+import sys
+import json
+import stat
+import shutil
+import hashlib
+import argparse
+
+MANIFEST_NAME = ".seed_manifest.json"
+SEEDED_NAME = ".pixelai_seed_manifest.json"
+LEGACY_MARK = ".seeded_from_image"
+NEW_SUFFIX = ".image-new"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# --- Manifest ---
+def build_manifest(root):
+    """Every regular file under root with its size, mode and sha256."""
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d != ".git"]
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            relpath = os.path.relpath(path, root).replace(os.sep, "/")
+            if relpath == MANIFEST_NAME or not os.path.isfile(path) or os.path.islink(path):
+                continue
+            info = os.stat(path)
+            files[relpath] = {"size": info.st_size, "mode": stat.S_IMODE(info.st_mode), "sha256": sha256_file(path)}
+    return {"files": files}
+
+def load_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+# --- Sync ---
+def _copy(src, dest, mode):
+    """Copies atomically so a boot interrupted mid-copy never leaves a truncated script."""
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    tmp_path = dest + ".seed-tmp"
+    shutil.copyfile(src, tmp_path)
+    os.chmod(tmp_path, mode)
+    os.replace(tmp_path, dest)
+
+def _untouched(dest, seeded_entry, legacy_mark_time):
+    """True if the volume copy is still what seeding put there (so it may be replaced)."""
+    if seeded_entry:
+        info = os.stat(dest)
+        if info.st_size != seeded_entry["size"]:
+            return False
+        return sha256_file(dest) == seeded_entry["sha256"]
+    # Seeded by the old one-shot rsync: rsync kept image mtimes, edits are newer than the mark
+    return legacy_mark_time is not None and os.path.getmtime(dest) <= legacy_mark_time
+
+def plan_sync(src, dest_root, manifest, seeded):
+    """
+    Decides what to do with each image file.
+
+    Returns:
+        list: (action, relpath) with action "copy", "update", "keep-edited" or "record".
+    """
+    seeded_files = (seeded or {}).get("files", {})
+    mark = os.path.join(dest_root, LEGACY_MARK)
+    legacy_mark_time = os.path.getmtime(mark) if seeded is None and os.path.exists(mark) else None
+    actions = []
+    for relpath, entry in sorted(manifest["files"].items()):
+        dest = os.path.join(dest_root, relpath)
+        previous = seeded_files.get(relpath)
+        if not os.path.isfile(dest):
+            actions.append(("copy", relpath))
+        elif previous and previous["sha256"] == entry["sha256"]:
+            continue  # Image did not change this file since it was last seeded
+        elif os.path.getsize(dest) == entry["size"] and sha256_file(dest) == entry["sha256"]:
+            actions.append(("record", relpath))  # Already identical, only the record is missing
+        elif _untouched(dest, previous, legacy_mark_time):
+            actions.append(("update", relpath))
+        else:
+            actions.append(("keep-edited", relpath))
+    return actions
+
+def sync(src, dest_root, dry_run=False):
+    """
+    Brings dest_root up to date with the image tree at src.
+
+    Returns:
+        dict: Counts per action.
+    """
+    manifest = load_json(os.path.join(src, MANIFEST_NAME))
+    if manifest is None:
+        raise FileNotFoundError(f"no {MANIFEST_NAME} in {src}")
+    seeded_path = os.path.join(dest_root, SEEDED_NAME)
+    seeded = load_json(seeded_path)
+    counts = {"copy": 0, "update": 0, "keep-edited": 0, "record": 0}
+    recorded = dict((seeded or {}).get("files", {}))
+
+    for action, relpath in plan_sync(src, dest_root, manifest, seeded):
+        counts[action] += 1
+        entry = manifest["files"][relpath]
+        dest = os.path.join(dest_root, relpath)
+        if action in ("copy", "update"):
+            print(f"[seed] {'+' if action == 'copy' else '~'} {relpath}")
+        elif action == "keep-edited":
+            print(f"[seed] ! {relpath} was edited on the volume; image version saved as {relpath}{NEW_SUFFIX}")
+        if dry_run:
+            continue
+        if action in ("copy", "update"):
+            _copy(os.path.join(src, relpath), dest, entry["mode"])
+        elif action == "keep-edited":
+            _copy(os.path.join(src, relpath), dest + NEW_SUFFIX, entry["mode"])
+            # Still recorded: once the user reverts or deletes the file, later images update it again
+        recorded[relpath] = entry
+
+    if not dry_run:
+        for relpath, entry in manifest["files"].items():
+            recorded.setdefault(relpath, entry)
+        write_json(seeded_path, {"files": recorded})
+    return counts
+
+# --- CLI ---
+def cmd_manifest(args):
+    manifest = build_manifest(args.root)
+    write_json(os.path.join(args.root, MANIFEST_NAME), manifest)
+    print(f"Wrote {MANIFEST_NAME}: {len(manifest['files'])} files")
+    return 0
+
+def cmd_sync(args):
+    try:
+        counts = sync(args.src, args.dest, args.dry_run)
+    except FileNotFoundError as e:
+        print(f"[seed] {e}")
+        return 1
+    print(f"[seed] {counts['copy']} new, {counts['update']} updated, {counts['keep-edited']} kept (edited), "
+          f"{counts['record']} already current")
+    return 0
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Seed the workspace incrementally from the image manifest.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("manifest", help="Write the image manifest (image build)")
+    p.add_argument("root")
+    p.set_defaults(func=cmd_manifest)
+
+    p = sub.add_parser("sync", help="Copy files the image changed since the last seed")
+    p.add_argument("src")
+    p.add_argument("dest")
+    p.add_argument("--dry-run", action="store_true")
+    p.set_defaults(func=cmd_sync)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+if __name__ == "__main__":
+    main()
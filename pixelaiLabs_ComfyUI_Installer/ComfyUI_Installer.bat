@@ -553,6 +553,17 @@ pause
 
 cd ComfyUI\custom_nodes
 
+@REM Fast path: clone every custom node in parallel (shallow) and install all of their
+@REM requirements in one pip run. The one-by-one install below only runs when this bat
+@REM is used without install_custom_nodes.py next to it.
+if exist "%~dp0install_custom_nodes.py" (
+    python "%~dp0install_custom_nodes.py" --dir .
+    if errorlevel 1 (
+        echo Warning: Some custom nodes failed to install. Continuing...
+    )
+    goto :custom_nodes_done
+)
+
 git clone https://github.com/ltdrdata/ComfyUI-Manager.git
 if errorlevel 1 (
     echo Warning: Failed to clone ComfyUI-Manager. Continuing...
@@ -1067,6 +1078,7 @@ if errorlevel 1 (
 )
 
 
+:custom_nodes_done
 echo Custom Nodes Cloning completed
 echo Script Made by Aiconomist - Please run Models_Downloader.bat before starting ComfyUI
 
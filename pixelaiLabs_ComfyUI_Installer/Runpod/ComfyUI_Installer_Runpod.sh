@@ -5,10 +5,22 @@
 
 echo "Starting installation of ComfyUI, Triton, InsightFace, and dependencies on RunPod..."
 
+# Folder of this script (helper scripts live next to it)
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+
+# Boot timeline steps (docker/boot_profile.py); a no-op unless runpod-start is profiling this boot
+PROFILER="$SCRIPT_DIR/../../docker/boot_profile.py"
+profile() {
+    if [ -n "${PIXELAI_BOOT_TIMELINE:-}" ] && [ -f "$PROFILER" ]; then
+        python3 "$PROFILER" "$@" >/dev/null 2>&1 || true
+    fi
+}
+
 # Ensure we're in the workspace directory
 cd /workspace || { echo "Failed to change to /workspace directory"; exit 1; }
 
 # Install system dependencies first
+profile begin install:apt
 echo "Installing system dependencies..."
 apt update
 apt install -y python3.10 python3.10-venv python3.10-dev python3-pip build-essential cmake pkg-config ffmpeg git portaudio19-dev python3-pyaudio alsa-utils unzip wget curl
@@ -20,11 +32,14 @@ apt install -y libportaudio2 libportaudiocpp0 portaudio19-dev libasound2-dev lib
 # Install Python development headers (fixes Python.h missing error)
 apt install -y python3-dev python3.10-dev
 
+profile end install:apt
+
 # Verify Python 3.10 installation
 echo "Verifying Python 3.10 installation..."
 python3.10 --version || { echo "Python 3.10 not properly installed"; exit 1; }
 
 # Clone or update ComfyUI repository
+profile begin install:comfyui --measure /workspace/ComfyUI
 echo "Setting up ComfyUI..."
 if [ -d "ComfyUI" ]; then
     echo "ComfyUI directory already exists, updating..."
@@ -43,8 +58,11 @@ else
     }
 fi
 
+profile end install:comfyui --measure /workspace/ComfyUI
+
 # Change to ComfyUI directory
 cd ComfyUI || { echo "Failed to enter ComfyUI directory"; exit 1; }
+profile begin install:venv --measure /workspace/ComfyUI/venv
 
 # Remove existing venv if it exists but is broken
 if [ -d "venv" ] && [ ! -f "venv/bin/activate" ]; then
@@ -116,10 +134,27 @@ fi
 
 echo "Virtual environment activated: $VIRTUAL_ENV"
 
+profile end install:venv --measure /workspace/ComfyUI/venv
+
 # Upgrade pip
+profile begin install:python-packages --measure /workspace/ComfyUI/venv
 echo "Upgrading pip..."
 pip install --upgrade pip
 
+# Persistent pip cache and wheelhouse on the /workspace volume: packages that only
+# ship sdists (insightface, deepspeed, pyaudio, ...) are compiled once and the wheels
+# are reused by every later install, repair and pod instead of being rebuilt each time
+export PIP_CACHE_DIR="${PIP_CACHE_DIR:-/workspace/.cache/pip}"
+export PIXELAI_WHEELHOUSE="${PIXELAI_WHEELHOUSE:-/workspace/.cache/pixelai-wheelhouse}"
+export PIP_FIND_LINKS="$PIXELAI_WHEELHOUSE"
+mkdir -p "$PIP_CACHE_DIR" "$PIXELAI_WHEELHOUSE"
+
+# pip install through the wheelhouse: builds (or fetches) a wheel for the given
+# requirement into it first, which is a no-op when a matching wheel is already there
+wheel_install() {
+    pip wheel --no-deps --wheel-dir "$PIXELAI_WHEELHOUSE" "$@" && pip install "$@"
+}
+
 # Install PyTorch for CUDA 12.4
 echo "Installing PyTorch for CUDA 12.4..."
 pip install torch==2.6.0 torchvision==0.21.0 torchaudio==2.6.0 --index-url https://download.pytorch.org/whl/cu124
@@ -128,9 +163,10 @@ pip install torch==2.6.0 torchvision==0.21.0 torchaudio==2.6.0 --index-url https
 echo "Installing build dependencies..."
 pip install wheel setuptools packaging ninja cython numpy
 
-# Fix dependency conflicts by upgrading huggingface-hub first
-echo "Fixing dependency conflicts..."
-pip install --upgrade --force-reinstall "huggingface-hub>=0.27.0"
+# huggingface-hub is also passed to the custom node resolution below, so nodes
+# pinning an older version show up in its conflict report instead of downgrading it
+echo "Installing huggingface-hub..."
+pip install --upgrade "huggingface-hub>=0.27.0"
 
 # Install additional Python packages including audio support
 echo "Installing additional dependencies..."
@@ -151,8 +187,8 @@ pip install pytorch-lightning
 echo "Installing audio packages..."
 # Ensure PortAudio is available before installing Python audio packages
 ldconfig
-pip install --force-reinstall pyaudio
-pip install --force-reinstall sounddevice
+wheel_install pyaudio
+pip install sounddevice
 
 # Install additional packages that might be missing
 pip install scipy
@@ -161,7 +197,7 @@ pip install resampy
 
 # Install deepspeed
 echo "Installing deepspeed..."
-pip install deepspeed
+wheel_install deepspeed
 
 # Install Triton compatible with CUDA 12.4 and Python 3.10
 echo "Installing Triton..."
@@ -172,51 +208,97 @@ echo "Installing InsightFace..."
 
 # Install additional dependencies that InsightFace might need
 pip install --upgrade cython
-pip install --upgrade numpy
+pip install numpy
 pip install Pillow
 pip install scikit-image
 
 # Method 1: Try the pre-built wheel first
-pip install insightface==0.7.3 || {
+wheel_install insightface==0.7.3 || {
     echo "Pre-built wheel failed, trying alternative methods..."
     
     # Method 2: Try without version constraint
-    pip install insightface || {
+    wheel_install insightface || {
         echo "Standard install failed, building from source with extra flags..."
         
         # Method 3: Build from source with explicit flags
         export CC=gcc
         export CXX=g++
-        pip install --no-binary=insightface insightface==0.7.3 || {
+        wheel_install --no-binary=insightface insightface==0.7.3 || {
             echo "Building from source failed, trying git installation..."
             
             # Method 4: Install from git
-            pip install git+https://github.com/deepinsight/insightface.git@master#subdirectory=python-package || {
+            wheel_install git+https://github.com/deepinsight/insightface.git@master#subdirectory=python-package || {
                 echo "Warning: InsightFace installation failed, but continuing..."
             }
         }
     }
 }
 
-# Clear Triton and Torchinductor caches
-echo "Clearing Triton and Torchinductor caches..."
-rm -rf ~/.triton/cache
-mkdir -p ~/.triton/cache
-rm -rf /tmp/torchinductor_$(whoami)/triton
-mkdir -p /tmp/torchinductor_$(whoami)/triton
+profile end install:python-packages --measure /workspace/ComfyUI/venv
+
+# Triton and TorchInductor caches are no longer cleared here: Run_Comfyui.sh keeps them on
+# /workspace in a folder per torch/triton/GPU version (compile_cache.py), so a version
+# change gets a fresh cache while restarts reuse the compiled kernels
 
 # Create startup scripts with better error handling
 echo "Creating startup scripts..."
-cat <<EOF > /workspace/Run_Comfyui.sh
+# Quoted heredoc: everything below is evaluated when the runner starts, not now
+cat <<'EOF' > /workspace/Run_Comfyui.sh
 #!/bin/bash
 
 # Enhanced ComfyUI Runner - Fixes issues after RunPod restart
 # Based on your existing installation script
+#
+# Usage:
+#   Run_Comfyui.sh            Start ComfyUI, only repairing what changed since the last start
+#   Run_Comfyui.sh --repair   Run every repair first (system deps, caches, venv packages and a
+#                             fresh ComfyUI-WanVideoWrapper clone); same as PIXELAI_REPAIR=1
 
 cd /workspace/ComfyUI
 
+REPAIR=0
+if [ "$1" = "--repair" ] || [ "${PIXELAI_REPAIR:-0}" = "1" ]; then
+    REPAIR=1
+fi
+
+# Fingerprints of what was last checked; a repair step is skipped while its fingerprint is unchanged
+STATE_DIR=/workspace/ComfyUI/.pixelai_runner
+# Outside /workspace on purpose: it is gone whenever the pod's container is recreated
+SYSTEM_MARK=/var/lib/pixelai/system_deps_checked
+WANVIDEO_DIR=/workspace/ComfyUI/custom_nodes/ComfyUI-WanVideoWrapper
+COMPILE_CACHE=/workspace/pixelaiLabs_ComfyUI_Installer/Runpod/compile_cache.py
+
 echo "=== ComfyUI Post-Restart Fixes ==="
 
+# Repairs reuse the installer's pip cache and wheelhouse on /workspace instead of rebuilding
+export PIP_CACHE_DIR="${PIP_CACHE_DIR:-/workspace/.cache/pip}"
+export PIXELAI_WHEELHOUSE="${PIXELAI_WHEELHOUSE:-/workspace/.cache/pixelai-wheelhouse}"
+export PIP_FIND_LINKS="$PIXELAI_WHEELHOUSE"
+mkdir -p "$PIP_CACHE_DIR" "$PIXELAI_WHEELHOUSE"
+
+wheel_install() {
+    pip wheel --no-deps --wheel-dir "$PIXELAI_WHEELHOUSE" "$@" && pip install "$@"
+}
+
+fingerprint_changed() {
+    [ "$(cat "$STATE_DIR/$1" 2>/dev/null)" != "$2" ]
+}
+
+save_fingerprint() {
+    mkdir -p "$STATE_DIR"
+    echo "$2" > "$STATE_DIR/$1"
+}
+
+# Installed distributions of the venv; changes whenever anything is installed, upgraded or removed
+venv_fingerprint() {
+    ls -d /workspace/ComfyUI/venv/lib/python*/site-packages/*.dist-info 2>/dev/null | sha256sum | cut -d' ' -f1
+}
+
+# Checked-out revision and requirements of ComfyUI-WanVideoWrapper
+wanvideo_fingerprint() {
+    echo "$(git -C "$WANVIDEO_DIR" rev-parse HEAD 2>/dev/null) $(sha256sum "$WANVIDEO_DIR/requirements.txt" 2>/dev/null | cut -d' ' -f1)"
+}
+
 # Function to check and repair system dependencies
 check_system_deps() {
     echo "Checking system dependencies..."
@@ -262,8 +344,8 @@ clean_problematic_files() {
     find /workspace/ComfyUI -name "__pycache__" -type d -exec rm -rf {} + 2>/dev/null || true
     find /workspace/ComfyUI -name "*.pyc" -delete 2>/dev/null || true
     
-    # Clean Triton cache (helps with compilation issues)
-    rm -rf ~/.triton/cache 2>/dev/null || true
+    # Clean Triton and TorchInductor caches (helps with compilation issues)
+    rm -rf ~/.triton/cache "${PIXELAI_COMPILE_CACHE:-/workspace/.cache/compile}" 2>/dev/null || true
     mkdir -p ~/.triton/cache
     
     # Clean temporary compilation files
@@ -273,8 +355,8 @@ clean_problematic_files() {
     echo "Cache cleaning completed."
 }
 
-# Function to fix virtual environment issues
-fix_venv_issues() {
+# Function to activate the virtual environment
+activate_venv() {
     echo "Checking virtual environment..."
     
     # Check if venv exists and activate script is present
@@ -293,8 +375,10 @@ fix_venv_issues() {
     fi
     
     echo "Virtual environment activated: $VIRTUAL_ENV"
-    
-    # Check and fix common package issues
+}
+
+# Function to fix common package issues
+fix_venv_issues() {
     echo "Checking for broken packages..."
     
     # Fix bitsandbytes if it's causing issues
@@ -302,7 +386,7 @@ fix_venv_issues() {
         python -c "import bitsandbytes" 2>/dev/null || {
             echo "Fixing bitsandbytes installation..."
             pip uninstall -y bitsandbytes
-            pip install bitsandbytes --no-cache-dir
+            wheel_install bitsandbytes
         }
     fi
     
@@ -311,7 +395,7 @@ fix_venv_issues() {
         python -c "import triton" 2>/dev/null || {
             echo "Fixing triton installation..."
             pip uninstall -y triton
-            pip install triton==3.2.0 --no-cache-dir
+            wheel_install triton==3.2.0
         }
     fi
     
@@ -319,7 +403,7 @@ fix_venv_issues() {
     python -c "import sounddevice" 2>/dev/null || {
         echo "Fixing audio packages..."
         pip uninstall -y sounddevice pyaudio
-        pip install --force-reinstall sounddevice pyaudio --no-cache-dir
+        wheel_install sounddevice pyaudio
     }
 }
 
@@ -359,6 +443,8 @@ install_wanvideo_wrapper() {
             # Install requirements with error handling
             pip install -r requirements.txt || {
                 echo "WARNING: Some requirements failed to install, but continuing..."
+                cd /workspace/ComfyUI/custom_nodes
+                return 1
             }
         else
             echo "No requirements.txt found for ComfyUI-WanVideoWrapper"
@@ -370,6 +456,23 @@ install_wanvideo_wrapper() {
     echo "ComfyUI-WanVideoWrapper installation completed."
 }
 
+# Function to install ComfyUI-WanVideoWrapper only when it is missing or has changed
+ensure_wanvideo_wrapper() {
+    if [ ! -d "$WANVIDEO_DIR/.git" ]; then
+        install_wanvideo_wrapper || return 1
+    elif ! fingerprint_changed wanvideo "$(wanvideo_fingerprint)"; then
+        echo "ComfyUI-WanVideoWrapper unchanged since last start."
+        return 0
+    elif [ -f "$WANVIDEO_DIR/requirements.txt" ]; then
+        echo "ComfyUI-WanVideoWrapper changed since last start, installing its requirements..."
+        pip install -r "$WANVIDEO_DIR/requirements.txt" || {
+            echo "WARNING: Some requirements failed to install, but continuing..."
+            return 1
+        }
+    fi
+    save_fingerprint wanvideo "$(wanvideo_fingerprint)"
+}
+
 # Function to automatically disable other known problematic nodes
 auto_disable_problematic_nodes() {
     echo "Auto-disabling other known problematic custom nodes..."
@@ -415,13 +518,34 @@ set_optimal_env() {
     # Disable problematic bitsandbytes features
     export BITSANDBYTES_NOWELCOME=1
     
-    # Triton optimization
-    export TRITON_CACHE_DIR=/tmp/triton_cache
-    mkdir -p /tmp/triton_cache
+    # Persistent compile caches on /workspace, keyed by torch/triton/GPU versions
+    if [ -f "$COMPILE_CACHE" ]; then
+        eval "$(python "$COMPILE_CACHE" env)"
+    else
+        export TRITON_CACHE_DIR=/workspace/.cache/compile/triton
+        mkdir -p "$TRITON_CACHE_DIR"
+    fi
     
     echo "Environment variables configured."
 }
 
+# Function to precompile kernels once per compile cache key (new image, torch/triton upgrade or GPU type)
+warm_compile_cache() {
+    if [ "${PIXELAI_COMPILE_WARMUP:-1}" != "1" ] || [ ! -f "$COMPILE_CACHE" ]; then
+        return 0
+    fi
+    # Marker in the key's folder: one attempt per key even when the warm-up fails or compiles
+    # nothing (no GPU, no SageAttention workflows); --repair tries again
+    local marker
+    marker="$(dirname "$TRITON_CACHE_DIR")/.pixelai_warmup_attempted"
+    if [ "$REPAIR" != "1" ] && { [ -f "$marker" ] || [ -n "$(ls -A "$TRITON_CACHE_DIR" 2>/dev/null)" ]; }; then
+        return 0
+    fi
+    echo "Precompiling kernels for the installed workflows..."
+    python "$COMPILE_CACHE" warmup /workspace/Workflows || echo "WARNING: Kernel warm-up failed, kernels compile on first use instead"
+    date -u +%FT%TZ > "$marker"
+}
+
 # Function to check if nodes need repair
 check_node_health() {
     echo "Performing quick health check on custom nodes..."
@@ -435,24 +559,40 @@ check_node_health() {
 
 # Main execution function
 main() {
-    echo "🔧 Running post-restart fixes for ComfyUI..."
-    echo "This will address common issues that occur after RunPod restart."
-    echo ""
-    
-    # Run all fix functions
-    check_system_deps
-    clean_problematic_files
-    fix_venv_issues
-    set_optimal_env
-    install_wanvideo_wrapper
+    if [ "$REPAIR" = "1" ]; then
+        echo "🔧 Running all repairs for ComfyUI..."
+        check_system_deps
+        mkdir -p "$(dirname "$SYSTEM_MARK")" && touch "$SYSTEM_MARK"
+        clean_problematic_files
+        activate_venv
+        fix_venv_issues
+        set_optimal_env
+        warm_compile_cache
+        install_wanvideo_wrapper && save_fingerprint wanvideo "$(wanvideo_fingerprint)"
+        save_fingerprint venv "$(venv_fingerprint)"
+    else
+        # Hot path: every check below is skipped unless what it guards has changed
+        echo "🔧 Checking what changed since the last start (run with --repair to force all fixes)..."
+        if [ ! -f "$SYSTEM_MARK" ]; then
+            check_system_deps
+            mkdir -p "$(dirname "$SYSTEM_MARK")" && touch "$SYSTEM_MARK"
+        fi
+        activate_venv
+        set_optimal_env
+        warm_compile_cache
+        ensure_wanvideo_wrapper
+        if fingerprint_changed venv "$(venv_fingerprint)"; then
+            fix_venv_issues
+            save_fingerprint venv "$(venv_fingerprint)"
+        fi
+    fi
     auto_disable_problematic_nodes
     
     # Return to ComfyUI directory for startup
     cd /workspace/ComfyUI
     
     echo ""
-    echo "✅ All fixes applied successfully!"
-    echo "✅ ComfyUI-WanVideoWrapper installed and ready!"
+    echo "✅ ComfyUI environment ready!"
     echo ""
     echo "🚀 Starting ComfyUI with optimized settings..."
     echo ""
@@ -498,6 +638,7 @@ EOF
 chmod +x /workspace/Update_Comfy.sh
 
 # Install custom nodes
+profile begin install:custom-nodes --measure /workspace/ComfyUI
 echo "Installing custom nodes..."
 if [ ! -d "custom_nodes" ]; then
     mkdir -p custom_nodes
@@ -538,6 +679,17 @@ declare -a repos=(
     "https://github.com/christian-byrne/audio-separation-nodes-comfyui"
 )
 
+# Fast path: clone every custom node in parallel (shallow) and resolve all of their
+# requirements together with ComfyUI's in one pip run (install_custom_nodes.py has the
+# same node list). Conflicts are written to /workspace/ComfyUI/.pixelai_conflicts.txt.
+# The one-by-one loop below only runs when this script is used on its own.
+NODE_INSTALLER="$SCRIPT_DIR/../install_custom_nodes.py"
+if [ -f "$NODE_INSTALLER" ]; then
+    source /workspace/ComfyUI/venv/bin/activate
+    python "$NODE_INSTALLER" --dir /workspace/ComfyUI/custom_nodes --update --require "huggingface-hub>=0.27.0" || echo "Warning: Some custom nodes failed to install, continuing..."
+    repos=()
+fi
+
 # Clone and install requirements for each custom node (continues on failure)
 for repo in "${repos[@]}"; do
     repo_name=$(basename "$repo" .git)
@@ -581,6 +733,8 @@ for repo in "${repos[@]}"; do
     fi
 done
 
+profile end install:custom-nodes --measure /workspace/ComfyUI
+
 # Return to ComfyUI directory
 cd /workspace/ComfyUI
 
@@ -588,6 +742,7 @@ cd /workspace/ComfyUI
 source venv/bin/activate
 
 # Uninstall current PyTorch and install the new one
+profile begin install:torch-sageattention --measure /workspace/ComfyUI/venv
 echo "Uninstalling current PyTorch..."
 pip uninstall torch torchvision torchaudio -y
 
@@ -597,19 +752,26 @@ pip install torch torchvision torchaudio --extra-index-url https://download.pyto
 # Install SageAttention from the specified wheel
 echo "Installing SageAttention from custom wheel..."
 pip install https://huggingface.co/MonsterMMORPG/SECourses_Premium_Flash_Attention/resolve/4b17732a84bc50cf1e8b790e854ee9cd5e2ebfbf/sageattention-2.1.1-cp310-cp310-linux_x86_64.whl
+profile end install:torch-sageattention --measure /workspace/ComfyUI/venv
+
+# Precompile SageAttention/Inductor kernels for the bundled workflows into the persistent
+# compile cache (image builds have no GPU; Run_Comfyui.sh does it on first start instead)
+if [ "${PIXELAI_PREBUILD:-0}" != "1" ] && [ -f "$SCRIPT_DIR/compile_cache.py" ]; then
+    echo "Precompiling kernels for the workflows..."
+    profile begin install:kernel-warmup
+    python "$SCRIPT_DIR/compile_cache.py" warmup "$SCRIPT_DIR/../../Workflows" || echo "Warning: Kernel warm-up failed, continuing..."
+    profile end install:kernel-warmup
+fi
 
 # Download and extract Joy_caption_two model
-echo "Downloading Joy_caption_two model..."
-mkdir -p /workspace/ComfyUI/models/LLM
-cd /workspace/ComfyUI/models/LLM
-
-# Download and extract Llama model
-echo "Downloading Llama-3.1-8B-Lexi-Uncensored-V2-nf4 model..."
-wget https://huggingface.co/datasets/simwalo/custom_nodes/resolve/main/Llama-3.1-8B-Lexi-Uncensored-V2-nf4.zip
-unzip Llama-3.1-8B-Lexi-Uncensored-V2-nf4.zip
-rm Llama-3.1-8B-Lexi-Uncensored-V2-nf4.zip
-
-echo "✅ Models downloaded and extracted successfully!"
+# (skipped for image builds: models are not baked in, runpod-start fetches it on boot)
+if [ "${PIXELAI_PREBUILD:-0}" != "1" ]; then
+    echo "Downloading Joy_caption_two model..."
+    profile begin install:joy-caption-llm --measure /workspace/ComfyUI/models/LLM
+    COMFY_MODELS_DIR=/workspace/ComfyUI/models bash "$SCRIPT_DIR/download_joy_caption_llm.sh"
+    profile end install:joy-caption-llm --measure /workspace/ComfyUI/models/LLM
+    echo "✅ Models downloaded and extracted successfully!"
+fi
 
 echo ""
 echo "🎉 Installation complete!"
@@ -624,6 +786,7 @@ echo "📋 Available scripts:"
 echo "   🚀 /workspace/Run_Comfyui.sh     - Start ComfyUI"
 echo "   🔧 /workspace/Activate_Venv.sh   - Activate virtual environment"
 echo "   📦 /workspace/Update_Comfy.sh    - Update ComfyUI"
+echo "   🔥 python $SCRIPT_DIR/compile_cache.py warmup /workspace/Workflows - Precompile kernels"
 echo ""
 echo "🚀 Run '/workspace/Run_Comfyui.sh' to start ComfyUI!"
 echo "=================================================="
\ No newline at end of file
@@ -4,13 +4,14 @@ import zipfile
 import asyncio
 import concurrent.futures
 from threading import Lock
-from huggingface_hub import hf_hub_download
 from huggingface_hub.utils import (
     RepositoryNotFoundError,
     EntryNotFoundError,
     HfHubHTTPError,
     LocalEntryNotFoundError
 )
+import model_packs
+import model_progress
 
 # --- Configuration ---
 def _resolve_models_dir():
@@ -29,7 +30,8 @@ def _resolve_models_dir():
 
 BASE_DOWNLOAD_DIR = _resolve_models_dir()
 USE_SYMLINKS = False  # Copy files instead of symlinking to ensure compatibility
-MAX_CONCURRENT_DOWNLOADS = 4  # Adjust based on your bandwidth and system capabilities
+PACK_LOCK = model_packs.load_lock(__file__)  # Pinned hub revisions from locks/ (empty = follow main)
+MAX_CONCURRENT_DOWNLOADS = model_packs.download_jobs(4)  # Adjust based on your bandwidth and system capabilities
 
 # Thread-safe counters
 download_lock = Lock()
@@ -248,13 +250,14 @@ def download_and_process_item(task_info):
     try:
         print(f"[Task {task_index + 1}] Downloading:\n  Repo: {repo_id}\n  File: {filename}\n  To: {local_dir}")
         
-        file_path = hf_hub_download(
+        file_path = model_packs.hub_download(
             repo_id=repo_id,
             filename=filename,
             local_dir=local_dir,
             local_dir_use_symlinks=USE_SYMLINKS,
             resume_download=True,
-            repo_type=repo_type
+            repo_type=repo_type,
+            lock=PACK_LOCK
             # token="your_hf_token_here"  # Uncomment and add token if repository is private/gated
         )
         
@@ -264,6 +267,7 @@ def download_and_process_item(task_info):
             print(f"[Task {task_index + 1}] Extracting ZIP file: {file_path}")
             with zipfile.ZipFile(file_path, 'r') as zip_ref:
                 zip_ref.extractall(local_dir)
+                model_progress.extracted(PACK_LOCK["pack"], local_dir, filename, len(zip_ref.namelist()))
             print(f"[Task {task_index + 1}] Extracted contents to: {local_dir}")
 
             print(f"[Task {task_index + 1}] Deleting ZIP file: {file_path}")
@@ -282,6 +286,7 @@ def download_and_process_item(task_info):
     except HfHubHTTPError as e:
         print(f"[Task {task_index + 1}] Error: HTTP error for repo '{repo_id}'. Status: {e.response.status_code}. Details: {e}", file=sys.stderr)
     except zipfile.BadZipFile:
+        model_progress.failed(PACK_LOCK["pack"], local_dir, filename, "not a valid ZIP file")
         print(f"[Task {task_index + 1}] Error: File '{filename}' is not a valid ZIP file.", file=sys.stderr)
     except Exception as e:
         print(f"[Task {task_index + 1}] Error: Unexpected error downloading '{filename}' from '{repo_id}': {type(e).__name__} - {e}", file=sys.stderr)
@@ -298,6 +303,8 @@ def main():
     print(f"Total tasks: {len(DOWNLOAD_TASKS)}")
     print("=" * 50)
 
+    model_progress.planned(PACK_LOCK["pack"], DOWNLOAD_TASKS, PACK_LOCK)
+
     # Prepare tasks with indices for tracking
     indexed_tasks = list(enumerate(DOWNLOAD_TASKS))
     
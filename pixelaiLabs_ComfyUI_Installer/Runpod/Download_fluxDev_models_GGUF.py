@@ -3,13 +3,14 @@
 import os
 import sys
 import zipfile
-from huggingface_hub import hf_hub_download
 from huggingface_hub.utils import (
     RepositoryNotFoundError,
     EntryNotFoundError,
     HfHubHTTPError,
     LocalEntryNotFoundError
 )
+import model_packs
+import model_progress
 
 # --- Configuration ---
 def _resolve_models_dir():
@@ -28,6 +29,7 @@ def _resolve_models_dir():
 
 BASE_DOWNLOAD_DIR = _resolve_models_dir()
 USE_SYMLINKS = False  # Copy files for compatibility
+PACK_LOCK = model_packs.load_lock(__file__)  # Pinned hub revisions from locks/ (empty = follow main)
 
 # VRAM-based GGUF model options for unet (flux1-dev and flux1-fill-dev)
 VRAM_OPTIONS = {
@@ -261,13 +263,14 @@ def download_and_process_item(repo_id, local_dir, filename, use_symlinks=False,
 
     try:
         print(f"Downloading file:\n  Repo: {repo_id}\n  File: {filename}\n  To:   {local_dir}\n  Symlinks: {use_symlinks}\n  Repo Type: {repo_type or 'default'}")
-        file_path = hf_hub_download(
+        file_path = model_packs.hub_download(
             repo_id=repo_id,
             filename=filename,
             local_dir=local_dir,
             local_dir_use_symlinks=use_symlinks,
             resume_download=True,
-            repo_type=repo_type
+            repo_type=repo_type,
+            lock=PACK_LOCK
             # token="your_hf_token_here"  # Uncomment and add token if repository is private/gated
         )
         print(f"Successfully downloaded: {file_path}")
@@ -276,6 +279,7 @@ def download_and_process_item(repo_id, local_dir, filename, use_symlinks=False,
             print(f"Extracting ZIP file: {file_path}")
             with zipfile.ZipFile(file_path, 'r') as zip_ref:
                 zip_ref.extractall(local_dir)
+                model_progress.extracted(PACK_LOCK["pack"], local_dir, filename, len(zip_ref.namelist()))
             print(f"Extracted contents to: {local_dir}")
             print(f"Deleting ZIP file: {file_path}")
             os.remove(file_path)
@@ -293,6 +297,7 @@ def download_and_process_item(repo_id, local_dir, filename, use_symlinks=False,
     except HfHubHTTPError as e:
         print(f"\nError: HTTP error for repo '{repo_id}'. Status: {e.response.status_code}. Details: {e}", file=sys.stderr)
     except zipfile.BadZipFile:
+        model_progress.failed(PACK_LOCK["pack"], local_dir, filename, "not a valid ZIP file")
         print(f"\nError: File '{filename}' is not a valid ZIP file.", file=sys.stderr)
     except Exception as e:
         print(f"\nError: Unexpected error downloading '{filename}' from '{repo_id}': {type(e).__name__} - {e}", file=sys.stderr)
@@ -300,18 +305,11 @@ def download_and_process_item(repo_id, local_dir, filename, use_symlinks=False,
     print("-" * 20)
     return False
 
-def main():
-    """Downloads FluxDev GGUF models based on user VRAM selection and other specified files."""
-    print("Starting FluxDev GGUF model and custom node downloads...")
-    print(f"Base download directory: {os.path.abspath(BASE_DOWNLOAD_DIR)}")
-    print(f"Symlinks: {'Enabled' if USE_SYMLINKS else 'Disabled (copying files)'}")
-
-    # Get user's VRAM and model choice
-    unet_filename, fill_filename, quant_level = get_user_vram_choice()
+def get_download_tasks(unet_filename, fill_filename, quant_level):
+    """Builds the full download task list for the selected unet model and quantization."""
     t5_filename = T5_ENCODER_MODELS.get(quant_level, "t5-v1_1-xxl-encoder-Q4_K_M.gguf")  # Fallback if quant not found
 
-    # Add unet and t5 encoder tasks
-    tasks = [
+    return [
         {
             "repo_id": "city96/FLUX.1-dev-gguf",
             "repo_type": "model",
@@ -332,6 +330,19 @@ def main():
         }
     ] + DOWNLOAD_TASKS  # Combine with base tasks
 
+def main():
+    """Downloads FluxDev GGUF models based on user VRAM selection and other specified files."""
+    print("Starting FluxDev GGUF model and custom node downloads...")
+    print(f"Base download directory: {os.path.abspath(BASE_DOWNLOAD_DIR)}")
+    print(f"Symlinks: {'Enabled' if USE_SYMLINKS else 'Disabled (copying files)'}")
+
+    # Get user's VRAM and model choice
+    unet_filename, fill_filename, quant_level = get_user_vram_choice()
+    t5_filename = T5_ENCODER_MODELS.get(quant_level, "t5-v1_1-xxl-encoder-Q4_K_M.gguf")  # Fallback if quant not found
+
+    tasks = get_download_tasks(unet_filename, fill_filename, quant_level)
+    model_progress.planned(PACK_LOCK["pack"], tasks, PACK_LOCK)
+
     successful_downloads = 0
     failed_downloads = 0
 
@@ -1,12 +1,13 @@
 import os
 import sys
-from huggingface_hub import hf_hub_download
 from huggingface_hub.utils import (
     RepositoryNotFoundError,
     EntryNotFoundError,
     HfHubHTTPError,
     LocalEntryNotFoundError
 )
+import model_packs
+import model_progress
 
 # --- Configuration ---
 def _resolve_models_dir():
@@ -25,6 +26,7 @@ def _resolve_models_dir():
 
 BASE_DOWNLOAD_DIR = _resolve_models_dir()
 USE_SYMLINKS = False  # Copy files for compatibility
+PACK_LOCK = model_packs.load_lock(__file__)  # Pinned hub revisions from locks/ (empty = follow main)
 
 # VRAM-based GGUF model options for unet (flux1-dev and flux1-kontext-dev)
 VRAM_OPTIONS = {
@@ -127,13 +129,14 @@ def download_file(repo_id, local_dir, filename, use_symlinks=False, repo_type=No
         print(f"  Symlinks: {use_symlinks}")
         print(f"  Repo Type: {repo_type or 'default'}")
         
-        file_path = hf_hub_download(
+        file_path = model_packs.hub_download(
             repo_id=repo_id,
             filename=filename,
             local_dir=local_dir,
             local_dir_use_symlinks=use_symlinks,
             resume_download=True,
-            repo_type=repo_type
+            repo_type=repo_type,
+            lock=PACK_LOCK
         )
         print(f"Successfully downloaded: {file_path}")
         print("-" * 60)
@@ -153,18 +156,11 @@ def download_file(repo_id, local_dir, filename, use_symlinks=False, repo_type=No
     print("-" * 60)
     return False
 
-def main():
-    """Downloads Flux GGUF models and face segmentation model based on user VRAM selection."""
-    print("Starting Flux GGUF model downloads...")
-    print(f"Base download directory: {os.path.abspath(BASE_DOWNLOAD_DIR)}")
-    print(f"Symlinks: {'Enabled' if USE_SYMLINKS else 'Disabled (copying files)'}")
-
-    # Get user's VRAM and model choice
-    unet_filename, quant_level = get_user_vram_choice()
+def get_download_tasks(unet_filename, quant_level):
+    """Builds the full download task list for the selected unet model and quantization."""
     t5_filename = T5_ENCODER_MODELS.get(quant_level, "t5-v1_1-xxl-encoder-Q4_K_M.gguf")  # Fallback if quant not found
 
-    # Define download tasks
-    tasks = [
+    return [
         {
             "repo_id": "QuantStack/FLUX.1-Kontext-dev-GGUF",
             "repo_type": "model",
@@ -185,6 +181,19 @@ def main():
         }
     ]
 
+def main():
+    """Downloads Flux GGUF models and face segmentation model based on user VRAM selection."""
+    print("Starting Flux GGUF model downloads...")
+    print(f"Base download directory: {os.path.abspath(BASE_DOWNLOAD_DIR)}")
+    print(f"Symlinks: {'Enabled' if USE_SYMLINKS else 'Disabled (copying files)'}")
+
+    # Get user's VRAM and model choice
+    unet_filename, quant_level = get_user_vram_choice()
+    t5_filename = T5_ENCODER_MODELS.get(quant_level, "t5-v1_1-xxl-encoder-Q4_K_M.gguf")  # Fallback if quant not found
+
+    tasks = get_download_tasks(unet_filename, quant_level)
+    model_progress.planned(PACK_LOCK["pack"], tasks, PACK_LOCK)
+
     successful_downloads = 0
     failed_downloads = 0
 
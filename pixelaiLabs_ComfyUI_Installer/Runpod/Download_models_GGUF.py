@@ -2,13 +2,14 @@
 
 import os
 import sys
-from huggingface_hub import hf_hub_download
 from huggingface_hub.utils import (
     RepositoryNotFoundError,
     EntryNotFoundError,
     HfHubHTTPError,
     LocalEntryNotFoundError
 )
+import model_packs
+import model_progress
 
 # --- Configuration ---
 def _resolve_models_dir():
@@ -27,6 +28,7 @@ def _resolve_models_dir():
 
 BASE_DOWNLOAD_DIR = _resolve_models_dir()
 USE_SYMLINKS = False  # Copy files for compatibility
+PACK_LOCK = model_packs.load_lock(__file__)  # Pinned hub revisions from locks/ (empty = follow main)
 
 # VRAM-based GGUF model options for unet
 VRAM_OPTIONS = {
@@ -190,13 +192,14 @@ def download_and_process_item(repo_id, local_dir, filename, use_symlinks=False,
 
     try:
         print(f"Downloading file:\n  Repo: {repo_id}\n  File: {filename}\n  To:   {local_dir}\n  Symlinks: {use_symlinks}\n  Repo Type: {repo_type or 'default'}")
-        file_path = hf_hub_download(
+        file_path = model_packs.hub_download(
             repo_id=repo_id,
             filename=filename,
             local_dir=local_dir,
             local_dir_use_symlinks=use_symlinks,
             resume_download=True,
-            repo_type=repo_type
+            repo_type=repo_type,
+            lock=PACK_LOCK
             # token="your_hf_token_here"  # Uncomment and add token if repository is private/gated
         )
         print(f"Successfully downloaded: {file_path}")
@@ -218,18 +221,11 @@ def download_and_process_item(repo_id, local_dir, filename, use_symlinks=False,
     print("-" * 20)
     return False
 
-def main():
-    """Downloads Wan2.1 GGUF models based on user VRAM selection and other specified files."""
-    print("Starting Wan2.1 GGUF model downloads...")
-    print(f"Base download directory: {os.path.abspath(BASE_DOWNLOAD_DIR)}")
-    print(f"Symlinks: {'Enabled' if USE_SYMLINKS else 'Disabled (copying files)'}")
-
-    # Get user's VRAM and model choice
-    unet_filename, quant_level = get_user_vram_choice()
+def get_download_tasks(unet_filename, quant_level):
+    """Builds the full download task list for the selected unet model and quantization."""
     umt5_filename = UMT5_ENCODER_MODELS.get(quant_level, "umt5-xxl-encoder-Q4_K_M.gguf")  # Fallback if quant not found
 
-    # Add unet and umt5 encoder tasks
-    tasks = [
+    return [
         {
             "repo_id": "city96/Wan2.1-I2V-14B-480P-gguf",
             "repo_type": "model",
@@ -244,6 +240,19 @@ def main():
         }
     ] + DOWNLOAD_TASKS  # Combine with base tasks
 
+def main():
+    """Downloads Wan2.1 GGUF models based on user VRAM selection and other specified files."""
+    print("Starting Wan2.1 GGUF model downloads...")
+    print(f"Base download directory: {os.path.abspath(BASE_DOWNLOAD_DIR)}")
+    print(f"Symlinks: {'Enabled' if USE_SYMLINKS else 'Disabled (copying files)'}")
+
+    # Get user's VRAM and model choice
+    unet_filename, quant_level = get_user_vram_choice()
+
+    tasks = get_download_tasks(unet_filename, quant_level)
+    umt5_filename = next(t["filename"] for t in tasks if t["repo_id"] == "city96/umt5-xxl-encoder-gguf")
+    model_progress.planned(PACK_LOCK["pack"], tasks, PACK_LOCK)
+
     successful_downloads = 0
     failed_downloads = 0
 
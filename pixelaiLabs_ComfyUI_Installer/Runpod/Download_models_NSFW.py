@@ -4,13 +4,14 @@ import zipfile
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
-from huggingface_hub import hf_hub_download
 from huggingface_hub.utils import (
     RepositoryNotFoundError,
     EntryNotFoundError,
     HfHubHTTPError,
     LocalEntryNotFoundError
 )
+import model_packs
+import model_progress
 
 # --- Configuration ---
 def _resolve_models_dir():
@@ -29,7 +30,8 @@ def _resolve_models_dir():
 
 BASE_DOWNLOAD_DIR = _resolve_models_dir()
 USE_SYMLINKS = False  # Copy files instead of symlinking to ensure compatibility
-MAX_CONCURRENT_DOWNLOADS = 6  # Adjust based on your internet speed and system resources
+PACK_LOCK = model_packs.load_lock(__file__)  # Pinned hub revisions from locks/ (empty = follow main)
+MAX_CONCURRENT_DOWNLOADS = model_packs.download_jobs(6)  # Adjust based on your internet speed and system resources
 
 # Thread-safe print function
 print_lock = threading.Lock()
@@ -354,39 +356,30 @@ def download_and_process_item(repo_id, local_dir, filename, use_symlinks=False,
         
         # Check if file already exists
         final_path = os.path.join(local_dir, display_name)
-        if os.path.exists(final_path) and not extract_and_delete:
+        if model_packs.intact(final_path) and not extract_and_delete:
             safe_print(f"⏭️  File already exists, skipping: {display_name}")
             return True
 
         safe_print(f"🔄 Downloading:\n  📁 Repo: {repo_id}\n  📄 File: {filename}\n  📂 To: {local_dir}\n  🔗 Symlinks: {use_symlinks}\n  🏷️  Type: {repo_type or 'default'}")
         
-        file_path = hf_hub_download(
+        file_path = model_packs.hub_download(
             repo_id=repo_id,
             filename=filename,
             local_dir=local_dir,
             local_dir_use_symlinks=use_symlinks,
             resume_download=True,
-            repo_type=repo_type
+            repo_type=repo_type,
+            lock=PACK_LOCK,
+            rename_to=rename_to
         )
         
-        # Handle renaming if required
-        if rename_to:
-            original_path = file_path
-            new_path = os.path.join(local_dir, rename_to)
-            
-            if os.path.basename(original_path) != rename_to:
-                if os.path.exists(new_path):
-                    os.remove(original_path)
-                else:
-                    os.rename(original_path, new_path)
-                file_path = new_path
-        
         safe_print(f"✅ Successfully downloaded: {file_path}")
 
         if extract_and_delete and filename.lower().endswith('.zip'):
             safe_print(f"🗜️  Extracting ZIP file: {file_path}")
             with zipfile.ZipFile(file_path, 'r') as zip_ref:
                 zip_ref.extractall(local_dir)
+                model_progress.extracted(PACK_LOCK["pack"], local_dir, filename, len(zip_ref.namelist()))
             safe_print(f"📦 Extracted contents to: {local_dir}")
 
             safe_print(f"🗑️  Deleting ZIP file: {file_path}")
@@ -405,6 +398,7 @@ def download_and_process_item(repo_id, local_dir, filename, use_symlinks=False,
     except HfHubHTTPError as e:
         safe_print(f"❌ Error: HTTP error for repo '{repo_id}'. Status: {e.response.status_code}. Details: {e}")
     except zipfile.BadZipFile:
+        model_progress.failed(PACK_LOCK["pack"], local_dir, filename, "not a valid ZIP file")
         safe_print(f"❌ Error: File '{filename}' is not a valid ZIP file.")
     except Exception as e:
         safe_print(f"❌ Error: Unexpected error downloading '{filename}' from '{repo_id}': {type(e).__name__} - {e}")
@@ -481,6 +475,8 @@ def main():
     skipped_downloads = 0
     start_time = time.time()
 
+    model_progress.planned(PACK_LOCK["pack"], DOWNLOAD_TASKS, PACK_LOCK)
+
     # Use ThreadPoolExecutor for parallel downloads
     with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_DOWNLOADS) as executor:
         # Submit all tasks
@@ -3,13 +3,14 @@ import sys
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
-from huggingface_hub import hf_hub_download
 from huggingface_hub.utils import (
     RepositoryNotFoundError,
     EntryNotFoundError,
     HfHubHTTPError,
     LocalEntryNotFoundError
 )
+import model_packs
+import model_progress
 
 # --- Configuration ---
 def _resolve_models_dir():
@@ -28,7 +29,8 @@ def _resolve_models_dir():
 
 BASE_DOWNLOAD_DIR = _resolve_models_dir()
 USE_SYMLINKS = False  # Copy files instead of symlinking to ensure compatibility
-MAX_CONCURRENT_DOWNLOADS = 6  # Adjust based on your internet speed and system resources
+PACK_LOCK = model_packs.load_lock(__file__)  # Pinned hub revisions from locks/ (empty = follow main)
+MAX_CONCURRENT_DOWNLOADS = model_packs.download_jobs(6)  # Adjust based on your internet speed and system resources
 
 # Thread-safe print function
 print_lock = threading.Lock()
@@ -38,6 +40,12 @@ def safe_print(*args, **kwargs):
     with print_lock:
         print(*args, **kwargs)
 
+# Menu choice -> (model type, display name); "3" is Exit
+MODEL_TYPES = {
+    "1": ("gguf", "GGUF (12GB+ VRAM)"),
+    "2": ("fp8", "FP8 (24GB+ VRAM)")
+}
+
 def get_user_choice():
     """Get user's choice for model type"""
     print("=" * 80)
@@ -183,33 +191,23 @@ def download_and_process_item(repo_id, local_dir, filename, use_symlinks=False,
         
         # Check if file already exists
         final_path = os.path.join(local_dir, display_name)
-        if os.path.exists(final_path):
+        if model_packs.intact(final_path):
             safe_print(f"⏭️  File already exists, skipping: {display_name}")
             return True
 
         safe_print(f"🔄 Downloading:\n  📁 Repo: {repo_id}\n  📄 File: {filename}\n  📂 To: {local_dir}\n  🔗 Symlinks: {use_symlinks}\n  🏷️  Type: {repo_type or 'default'}")
         
-        file_path = hf_hub_download(
+        file_path = model_packs.hub_download(
             repo_id=repo_id,
             filename=filename,
             local_dir=local_dir,
             local_dir_use_symlinks=use_symlinks,
             resume_download=True,
-            repo_type=repo_type
+            repo_type=repo_type,
+            lock=PACK_LOCK,
+            rename_to=rename_to
         )
         
-        # Handle renaming if required
-        if rename_to:
-            original_path = file_path
-            new_path = os.path.join(local_dir, rename_to)
-            
-            if os.path.basename(original_path) != rename_to:
-                if os.path.exists(new_path):
-                    os.remove(original_path)
-                else:
-                    os.rename(original_path, new_path)
-                file_path = new_path
-        
         safe_print(f"✅ Successfully downloaded: {file_path}")
         safe_print("-" * 50)
         return True
@@ -239,13 +237,8 @@ def main():
         sys.exit(0)
     
     # Determine model type and get tasks
-    if choice == '1':
-        model_type = "gguf"
-        model_name = "GGUF (12GB+ VRAM)"
-    else:  # choice == '2'
-        model_type = "fp8"
-        model_name = "FP8 (24GB+ VRAM)"
-    
+    model_type, model_name = MODEL_TYPES[choice]
+
     download_tasks = get_download_tasks(model_type)
     
     print(f"\n🎯 Selected: {model_name}")
@@ -273,6 +266,8 @@ def main():
     failed_downloads = 0
     start_time = time.time()
 
+    model_progress.planned(PACK_LOCK["pack"], download_tasks, PACK_LOCK)
+
     # Use ThreadPoolExecutor for parallel downloads
     with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_DOWNLOADS) as executor:
         # Submit all tasks
@@ -0,0 +1,265 @@
+"""
+Persistent Triton / TorchInductor compile caches.
+
+Compiled kernels (SageAttention's Triton kernels, torch.compile graphs from
+WanVideoTorchCompileSettings, CUDA's PTX JIT cache) used to live in ~/.triton
+and /tmp, so every pod restart recompiled them during the first render. This
+keeps them on the /workspace volume, in one folder per cache key: the torch,
+triton and sageattention versions, the GPU's compute capability and the
+Python version. A different image, wheel upgrade or GPU type gets a fresh
+folder instead of stale kernels.
+
+Run_Comfyui.sh evaluates `env` before starting ComfyUI. `warmup` compiles what
+the installed workflows use ahead of the first render; with --server and API
+format prompts it queues them on a running ComfyUI, which fills the cache with
+the exact graphs those workflows compile.
+
+Usage (with the ComfyUI venv active):
+    eval "$(python compile_cache.py env)"
+    python compile_cache.py status
+    python compile_cache.py warmup ../../Workflows
+    python compile_cache.py warmup --server http://127.0.0.1:8188 prompt_api.json
+    python compile_cache.py prune          (delete caches of other keys)
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import subprocess
+import urllib.request
+from importlib import metadata
+
+CACHE_ROOT = os.environ.get("PIXELAI_COMPILE_CACHE", "/workspace/.cache/compile")
+CUDA_CACHE_MAXSIZE = 4 * 1024 ** 3  # CUDA's default (256 MB) is too small for video models
+KEY_PACKAGES = ("torch", "triton", "sageattention")
+GB = 1024 ** 3
+
+# Workflow nodes that compile kernels at run time
+SAGE_NODES = {"PathchSageAttentionKJ", "WanVideoSetAttentionModeKJ"}
+COMPILE_NODES = {"WanVideoTorchCompileSettings", "TorchCompileModelWanVideo", "TorchCompileModel"}
+
+# (heads, head_dim) of the Wan 2.1/2.2 14B and 1.3B/5B transformers
+WAN_ATTENTION_SHAPES = [(40, 128), (12, 128), (24, 128)]
+
+# --- Cache key ---
+def _version(package):
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return None
+
+def gpu_arch():
+    """Compute capability of the first GPU ("sm89"), or "cpu" when there is none."""
+    try:
+        output = subprocess.run(["nvidia-smi", "--query-gpu=compute_cap", "--format=csv,noheader"],
+                                capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return "cpu"
+    first = output.strip().splitlines()[0] if output.strip() else ""
+    return "sm" + first.replace(".", "") if first else "cpu"
+
+def cache_key():
+    """Folder name for the current software/hardware combination (no torch import, so it is fast)."""
+    parts = [f"{name}{_version(name)}" for name in KEY_PACKAGES if _version(name)]
+    parts += [gpu_arch(), f"py{sys.version_info[0]}{sys.version_info[1]}"]
+    return re.sub(r"[^A-Za-z0-9_.+-]", "_", "-".join(parts))
+
+def cache_env(key=None):
+    """Environment variables pointing every compile cache into the key's folder."""
+    base = os.path.join(CACHE_ROOT, key or cache_key())
+    return {
+        "TRITON_CACHE_DIR": os.path.join(base, "triton"),
+        "TORCHINDUCTOR_CACHE_DIR": os.path.join(base, "inductor"),
+        "TORCHINDUCTOR_FX_GRAPH_CACHE": "1",
+        "TORCHINDUCTOR_AUTOGRAD_CACHE": "1",
+        "CUDA_CACHE_PATH": os.path.join(base, "cuda"),
+        "CUDA_CACHE_MAXSIZE": str(CUDA_CACHE_MAXSIZE)
+    }
+
+def apply_env(key=None):
+    """Sets the cache environment for this process (before torch is imported) and creates the folders."""
+    env = cache_env(key)
+    for name, value in env.items():
+        os.environ[name] = value
+        if name.endswith(("_DIR", "_PATH")):
+            os.makedirs(value, exist_ok=True)
+    return env
+
+def folder_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+# --- Warm-up ---
+def workflow_node_types(path):
+    """Node types used by a workflow file, in UI (nodes list) or API (id -> class_type) format."""
+    with open(path, "r", encoding="utf-8") as f:
+        workflow = json.load(f)
+    if isinstance(workflow.get("nodes"), list):
+        return {node.get("type") for node in workflow["nodes"]}
+    return {node.get("class_type") for node in workflow.values() if isinstance(node, dict)}
+
+def scan_workflows(paths):
+    """Which kinds of compiled kernels the given workflow files (or folders of them) need."""
+    needs = {"sage": [], "compile": []}
+    for path in paths:
+        files = glob.glob(os.path.join(path, "**", "*.json"), recursive=True) if os.path.isdir(path) else [path]
+        for workflow in files:
+            try:
+                types = workflow_node_types(workflow)
+            except (OSError, ValueError, AttributeError):
+                continue
+            if types & SAGE_NODES:
+                needs["sage"].append(workflow)
+            if types & COMPILE_NODES:
+                needs["compile"].append(workflow)
+    return needs
+
+def warm_sageattention():
+    """Compiles SageAttention's Triton kernels for the Wan attention shapes in fp16 and bf16."""
+    import torch
+    from sageattention import sageattn
+
+    for dtype in (torch.float16, torch.bfloat16):
+        for heads, head_dim in WAN_ATTENTION_SHAPES:
+            # Kernels are specialised on dtype and head size, not sequence length
+            q, k, v = (torch.randn(1, heads, 1024, head_dim, dtype=dtype, device="cuda") for _ in range(3))
+            sageattn(q, k, v, tensor_layout="HND", is_causal=False)
+    torch.cuda.synchronize()
+
+def warm_inductor():
+    """
+    Starts Inductor once so its compile workers and codecache are initialised.
+
+    The transformer graphs themselves depend on the loaded model; they are
+    cached on their first real run (or by warm_server) and reused afterwards.
+    """
+    import torch
+
+    @torch.compile(backend="inductor")
+    def block(x, weight):
+        return torch.nn.functional.silu(x @ weight) * x
+
+    for dtype in (torch.float16, torch.bfloat16):
+        x = torch.randn(256, 256, dtype=dtype, device="cuda")
+        block(x, torch.randn(256, 256, dtype=dtype, device="cuda"))
+    torch.cuda.synchronize()
+
+def warm_server(server, prompt_paths, timeout):
+    """
+    Queues API format prompts on a running ComfyUI and waits for each to finish.
+
+    Returns:
+        int: Number of prompts that completed.
+    """
+    completed = 0
+    for path in prompt_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            prompt = json.load(f)
+        if isinstance(prompt.get("nodes"), list):
+            print(f"⚠️  {os.path.basename(path)} is a UI workflow; export it in API format to warm it up")
+            continue
+        request = urllib.request.Request(f"{server}/prompt", data=json.dumps({"prompt": prompt}).encode(),
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=30) as response:
+            prompt_id = json.loads(response.read())["prompt_id"]
+        print(f"⏳ {os.path.basename(path)} queued ({prompt_id})")
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with urllib.request.urlopen(f"{server}/history/{prompt_id}", timeout=30) as response:
+                history = json.loads(response.read())
+            if prompt_id in history:
+                status = history[prompt_id].get("status", {}).get("status_str", "success")
+                print(f"{'✅' if status == 'success' else '❌'} {os.path.basename(path)}: {status}")
+                completed += status == "success"
+                break
+            time.sleep(2)
+        else:
+            print(f"⚠️  {os.path.basename(path)} did not finish within {timeout}s")
+    return completed
+
+# --- CLI ---
+def cmd_env(args):
+    for name, value in apply_env().items():
+        print(f'export {name}="{value}"')
+    return 0
+
+def cmd_status(args):
+    current = cache_key()
+    print(f"📁 Compile caches: {CACHE_ROOT}")
+    print(f"🔑 Current key: {current}")
+    for key in sorted(os.listdir(CACHE_ROOT)) if os.path.isdir(CACHE_ROOT) else []:
+        marker = "*" if key == current else " "
+        print(f" {marker} {folder_size(os.path.join(CACHE_ROOT, key)) / GB:7.2f} GB  {key}")
+    return 0
+
+def cmd_prune(args):
+    current = cache_key()
+    removed = 0
+    for key in os.listdir(CACHE_ROOT) if os.path.isdir(CACHE_ROOT) else []:
+        if key != current:
+            shutil.rmtree(os.path.join(CACHE_ROOT, key), ignore_errors=True)
+            print(f"🧹 Removed {key}")
+            removed += 1
+    print(f"✅ {removed} stale cache(s) removed")
+    return 0
+
+def cmd_warmup(args):
+    env = apply_env()
+    print(f"📁 Caching compiled kernels in {os.path.dirname(env['TRITON_CACHE_DIR'])}")
+    if args.server:
+        completed = warm_server(args.server.rstrip("/"), args.paths, args.timeout)
+        return 0 if completed == len(args.paths) else 1
+
+    needs = scan_workflows(args.paths)
+    print(f"🔎 {len(needs['sage'])} workflow(s) use SageAttention, {len(needs['compile'])} use torch.compile")
+    failed = False
+    for name, needed, warm in (("SageAttention", needs["sage"], warm_sageattention),
+                               ("Inductor", needs["compile"], warm_inductor)):
+        if not needed:
+            continue
+        start_time = time.time()
+        try:
+            warm()
+        except Exception as e:
+            print(f"❌ {name} warm-up failed: {e}")
+            failed = True
+        else:
+            print(f"✅ {name} kernels ready in {time.time() - start_time:.1f}s")
+    return 1 if failed else 0
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Persistent, versioned Triton/TorchInductor compile caches.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("env", help="Print export lines for the cache environment")
+    p.set_defaults(func=cmd_env)
+
+    p = sub.add_parser("status", help="Show cache keys and sizes")
+    p.set_defaults(func=cmd_status)
+
+    p = sub.add_parser("prune", help="Delete caches of other keys")
+    p.set_defaults(func=cmd_prune)
+
+    p = sub.add_parser("warmup", help="Precompile kernels used by workflows")
+    p.add_argument("paths", nargs="+", help="Workflow files or folders (API prompts with --server)")
+    p.add_argument("--server", help="Queue API format prompts on this ComfyUI, e.g. http://127.0.0.1:8188")
+    p.add_argument("--timeout", type=int, default=1800, help="Seconds to wait for each prompt")
+    p.set_defaults(func=cmd_warmup)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+if __name__ == "__main__":
+    main()
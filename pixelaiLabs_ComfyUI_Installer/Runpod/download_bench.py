@@ -0,0 +1,601 @@
+"""
+Download benchmark against a local stand-in for the Hugging Face hub.
+
+Starts an HTTP server that answers the hub's resolve endpoints (HEAD/GET,
+Range requests, X-Repo-Commit/ETag headers) with synthetic files, then runs
+each pack's real downloader main() against it (HF_ENDPOINT points at the
+server, menus are answered from --answers) in a fresh process per run. So a
+change to download_and_process_item, MAX_CONCURRENT_DOWNLOADS or hub_download
+is measured end to end without touching the network.
+
+The server emulates a link with per-request latency, a shared bandwidth cap,
+an optional per-connection cap and injected failures (503 before the body,
+connections dropped mid-body). File sizes follow the packs' real size mix:
+lockfile sizes where a lock exists, otherwise typical sizes per model folder,
+both multiplied by --scale so a run takes seconds instead of hours.
+
+Each run reports makespan, throughput, CPU time and peak memory of the
+downloader process, plus files that ended up missing or truncated. Results are
+written to bench-results/<commit>-<time>.json with the configuration and git
+commit, and `compare` prints the difference between two result files.
+
+Usage:
+    python3 download_bench.py run Download_wan2-2_I2V --answers 1 --repeat 3
+    python3 download_bench.py run all --latency-ms 80 --bandwidth 200 --error-rate 0.02
+    python3 download_bench.py compare bench-results/abc1234-....json bench-results/def5678-....json
+    python3 download_bench.py serve --port 8099      (stand-in only, for manual tests)
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import struct
+import shutil
+import hashlib
+import zipfile
+import argparse
+import tempfile
+import threading
+import subprocess
+import statistics
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import model_formats
+import model_packs
+from model_mirror import parse_range, parse_resolve_path
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.environ.get("PIXELAI_BENCH_DIR", os.path.join(SCRIPT_DIR, "bench-results"))
+MB = 1024 ** 2
+GB = 1024 ** 3
+PATTERN_SIZE = 1 * MB
+SAFETENSORS_HEADER_SIZE = 256
+SEND_SIZE = 64 * 1024
+MIN_FILE_SIZE = 64 * 1024
+DEFAULT_ANSWERS = "1,1"  # Same menu answers runpod-start pipes in
+
+# Typical file sizes of the real packs by target folder, used when a pack has no lockfile
+SIZE_PROFILE = {
+    "unet": 9 * GB,
+    "diffusion_models": 14 * GB,
+    "clip": 5 * GB,
+    "text_encoders": 6 * GB,
+    "clip_vision": 1.2 * GB,
+    "vae": 0.3 * GB,
+    "loras": 0.3 * GB,
+    "upscale_models": 0.07 * GB,
+    "LLM": 1.5 * GB
+}
+DEFAULT_FILE_SIZE = 1 * GB
+
+print_lock = threading.Lock()
+
+def safe_print(message):
+    """Thread-safe print function"""
+    with print_lock:
+        print(message, flush=True)
+
+# --- Synthetic files ---
+def _etag(repo, filename, size):
+    return hashlib.sha256(f"{repo}/{filename}/{size}".encode()).hexdigest()
+
+def profile_size(task, lock):
+    """Full-scale size of a task's file: the lockfile's, else the folder profile with a stable ±20% jitter."""
+    locked = model_packs.locked_file(lock, task["repo_id"], task["filename"], task.get("repo_type"))
+    if locked and locked.get("size"):
+        return locked["size"]
+    folder = os.path.basename(os.path.normpath(task["local_dir"]))
+    base = SIZE_PROFILE.get(folder, DEFAULT_FILE_SIZE)
+    jitter = int(hashlib.md5(task["filename"].encode()).hexdigest()[:4], 16) / 0xFFFF * 0.4 + 0.8
+    return int(base * jitter)
+
+class SyntheticFile:
+    """
+    Deterministic content of a given size. ZIPs are real (stored) archives so
+    extraction works, and .safetensors/.gguf files get a valid header so the
+    downloaders' header check (model_formats.py) passes.
+    """
+
+    def __init__(self, repo, filename, size):
+        self.repo = repo
+        self.filename = filename
+        self.etag = _etag(repo, filename, size)
+        self.pattern = random.Random(self.etag).randbytes(PATTERN_SIZE)
+        self.payload = None
+        self.prefix = b""
+        if filename.lower().endswith(".zip"):
+            self.payload = self._zip(size)
+            size = len(self.payload)
+        elif filename.lower().endswith((".safetensors", ".sft")) and size > 8 + SAFETENSORS_HEADER_SIZE:
+            self.prefix = self._safetensors_header(size)
+        elif filename.lower().endswith(".gguf"):
+            self.prefix, size = self._gguf_header(size)
+        self.size = size
+
+    def _safetensors_header(self, size):
+        """One U8 tensor spanning the data section; the JSON is space-padded to a fixed length."""
+        data_size = size - 8 - SAFETENSORS_HEADER_SIZE
+        header = json.dumps({"weight": {"dtype": "U8", "shape": [data_size], "data_offsets": [0, data_size]}})
+        return struct.pack("<Q", SAFETENSORS_HEADER_SIZE) + header.encode().ljust(SAFETENSORS_HEADER_SIZE)
+
+    def _gguf_header(self, size):
+        """
+        One tensor of the file name's quant type filling the data region.
+
+        Returns:
+            tuple: (header bytes, file size rounded down to whole quant blocks)
+        """
+        label = model_formats.quant_label(self.filename)
+        type_name = (label and model_formats.label_type(label)) or "F16"
+        type_id, (_, block_size, block_bytes) = next(
+            (k, v) for k, v in model_formats.GGML_TYPES.items() if v[0] == type_name)
+
+        def gguf_string(text):
+            return struct.pack("<Q", len(text)) + text.encode()
+
+        def header(blocks):
+            raw = (model_formats.GGUF_MAGIC + struct.pack("<IQQ", 3, 1, 1)
+                   + gguf_string("general.architecture") + struct.pack("<I", model_formats.GGUF_STRING)
+                   + gguf_string("bench")
+                   + gguf_string("weight") + struct.pack("<IQIQ", 1, blocks * block_size, type_id, 0))
+            alignment = model_formats.GGUF_DEFAULT_ALIGNMENT
+            return raw.ljust((len(raw) + alignment - 1) // alignment * alignment, b"\0")
+
+        blocks = max(1, (size - len(header(0))) // block_bytes)
+        prefix = header(blocks)
+        return prefix, len(prefix) + blocks * block_bytes
+
+    def _zip(self, size):
+        path = tempfile.mktemp(suffix=".zip")
+        try:
+            with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED) as archive:
+                inner = os.path.splitext(os.path.basename(self.filename))[0] + ".bin"
+                archive.writestr(inner, (self.pattern * (size // PATTERN_SIZE + 1))[:size])
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.remove(path)
+
+    def read(self, offset, length):
+        if self.payload is not None:
+            return self.payload[offset:offset + length]
+        head = self.prefix[offset:offset + length]
+        if head:
+            return head + self.read(offset + len(head), length - len(head)) if length > len(head) else head
+        start = offset % PATTERN_SIZE
+        data = self.pattern[start:start + length]
+        while len(data) < length:
+            data += self.pattern[:length - len(data)]
+        return data
+
+# --- Link emulation ---
+class Throttle:
+    """Paces bytes to a rate; shared by all connections for the link cap."""
+
+    def __init__(self, bytes_per_second):
+        self.rate = bytes_per_second
+        self.next_free = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, count):
+        if not self.rate:
+            return
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_free)
+            self.next_free = start + count / self.rate
+            wait = self.next_free - now
+        if wait > 0:
+            time.sleep(wait)
+
+class HubStandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._handle(send_body=False)
+
+    def do_GET(self):
+        self._handle(send_body=True)
+
+    def _handle(self, send_body):
+        server = self.server
+        server.count("requests")
+        time.sleep(server.latency)
+        parsed = parse_resolve_path(self.path)
+        synthetic = server.files.get((parsed[0], parsed[2])) if parsed else None
+        if synthetic is None:
+            self.send_response(404)
+            self.send_header("X-Error-Code", "EntryNotFound")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if send_body and server.roll(server.error_rate):
+            server.count("errors")
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        try:
+            byte_range = parse_range(self.headers.get("Range"), synthetic.size)
+        except ValueError:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{synthetic.size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        start, end = byte_range or (0, synthetic.size - 1)
+        self.send_response(206 if byte_range else 200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", f'"{synthetic.etag}"')
+        self.send_header("X-Linked-Etag", f'"{synthetic.etag}"')
+        self.send_header("X-Linked-Size", str(synthetic.size))
+        self.send_header("X-Repo-Commit", hashlib.sha1(synthetic.repo.encode()).hexdigest())
+        if byte_range:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{synthetic.size}")
+        self.end_headers()
+        if not send_body:
+            return
+
+        drop_at = None
+        if server.roll(server.drop_rate):
+            drop_at = start + (end - start) // 2
+            server.count("drops")
+        connection_throttle = Throttle(server.connection_bandwidth)
+        offset = start
+        while offset <= end:
+            count = min(SEND_SIZE, end - offset + 1)
+            server.throttle.consume(count)
+            connection_throttle.consume(count)
+            try:
+                self.wfile.write(synthetic.read(offset, count))
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            offset += count
+            server.count("bytes", count)
+            if drop_at is not None and offset > drop_at:
+                self.close_connection = True
+                self.connection.close()
+                return
+
+class HubStandIn(ThreadingHTTPServer):
+    """
+    The hub stand-in.
+
+    Args:
+        latency (float): Seconds before every response.
+        bandwidth (float): Shared link cap in bytes/s (0 = unlimited).
+        connection_bandwidth (float): Per-connection cap in bytes/s (0 = unlimited).
+        error_rate (float): Share of GETs answered with 503.
+        drop_rate (float): Share of GETs cut off halfway through the body.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, bandwidth=0, connection_bandwidth=0, error_rate=0.0, drop_rate=0.0,
+                 seed=0):
+        super().__init__(address, HubStandInHandler)
+        self.files = {}
+        self.latency = latency
+        self.throttle = Throttle(bandwidth)
+        self.connection_bandwidth = connection_bandwidth
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.random = random.Random(seed)
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+
+    def add_file(self, repo_id, repo_type, filename, size):
+        repo = model_packs.repo_key(repo_id, repo_type)
+        self.files[(repo, filename)] = SyntheticFile(repo, filename, size)
+        return self.files[(repo, filename)]
+
+    def roll(self, rate):
+        with self.stats_lock:
+            return rate > 0 and self.random.random() < rate
+
+    def count(self, name, amount=1):
+        with self.stats_lock:
+            self.stats[name] = self.stats.get(name, 0) + amount
+
+    def take_stats(self):
+        with self.stats_lock:
+            stats, self.stats = self.stats, {}
+        return stats
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+# --- Running packs ---
+def run_pack_main(name, answers, jobs=None):
+    """
+    Runs a pack's own main() with scripted menu answers (in the benchmark child process).
+
+    Download confirmations ("(y/N)") are answered "y", everything else from answers.
+    """
+    import builtins
+
+    module = model_packs.load_pack(name)
+    if jobs:
+        module.MAX_CONCURRENT_DOWNLOADS = jobs
+    remaining = list(answers)
+    confirmations = [0]
+
+    def scripted_input(prompt=""):
+        if "y/n" in prompt.lower():
+            confirmations[0] += 1
+            if confirmations[0] <= 5:
+                return "y"
+        elif remaining:
+            return remaining.pop(0)
+        raise EOFError(f"No scripted answer for prompt: {prompt.strip()}")
+
+    builtins.input = scripted_input
+    try:
+        module.main()
+    except SystemExit as e:
+        return e.code or 0
+    return 0
+
+def prepare_pack(server, name, answers, scale):
+    """Registers a pack's files on the server; returns [(task, expected size)] (at scale)."""
+    lock = model_packs.load_lock(name)
+    tasks = model_packs.resolve_tasks(model_packs.load_pack(name), answers)
+    planned = []
+    for task in tasks:
+        size = max(MIN_FILE_SIZE, int(profile_size(task, lock) * scale))
+        synthetic = server.add_file(task["repo_id"], task.get("repo_type"), task["filename"], size)
+        planned.append((task, synthetic))
+    return planned
+
+def check_results(planned, cwd):
+    """Counts files that are complete, missing or truncated after a run (relative local_dirs are under cwd)."""
+    counts = {"complete": 0, "missing": 0, "corrupt": 0, "bytes": 0}
+    for task, synthetic in planned:
+        task = dict(task, local_dir=os.path.join(cwd, task["local_dir"]))
+        if task.get("extract_and_delete"):
+            # The archive is deleted after extraction; the extracted member is what counts
+            path = os.path.join(task["local_dir"], os.path.splitext(os.path.basename(task["filename"]))[0] + ".bin")
+            expected = None
+        else:
+            path, expected = model_packs.task_path(task), synthetic.size
+        if not os.path.isfile(path):
+            counts["missing"] += 1
+        elif expected is not None and os.path.getsize(path) != expected:
+            counts["corrupt"] += 1
+        else:
+            counts["complete"] += 1
+            counts["bytes"] += synthetic.size
+    return counts
+
+def run_once(server, name, answers, planned, jobs, env_extra):
+    """
+    Runs one pack download in a child process against the stand-in.
+
+    Returns:
+        dict: Metrics of the run.
+    """
+    models_dir = os.environ["COMFY_MODELS_DIR"]
+    work_dir = tempfile.mkdtemp(prefix="pixelai-bench-run-")
+    env = dict(os.environ, **env_extra)
+    env.update({
+        "HF_ENDPOINT": server.url,
+        "HF_HUB_DISABLE_PROGRESS_BARS": "1",
+        "HF_HUB_DISABLE_TELEMETRY": "1",
+        "HF_HOME": os.path.join(work_dir, "hf_home"),
+        "PIXELAI_LOCK_DIR": work_dir,  # Synthetic content never matches real lock hashes
+        "PIXELAI_STATE_FILE": os.path.join(models_dir, model_packs.STATE_FILE_NAME)
+    })
+    for name_to_drop in ("PIXELAI_MIRRORS", "PIXELAI_PEERS", "PIXELAI_MODELS_QUOTA_GB", "HF_TOKEN"):
+        env.pop(name_to_drop, None)
+    command = [sys.executable, os.path.abspath(__file__), "_child", name, "--answers", ",".join(answers)]
+    if jobs:
+        command += ["--jobs", str(jobs)]
+
+    server.take_stats()
+    log_path = os.path.join(work_dir, "downloader.log")
+    start_time = time.time()
+    with open(log_path, "wb") as log_file:
+        # Some packs use relative local_dirs; running in the scratch folder keeps them out of the tree
+        process = subprocess.Popen(command, cwd=work_dir, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(process.pid, 0)
+    makespan = time.time() - start_time
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+    counts = check_results(planned, work_dir)
+    stats = server.take_stats()
+    result = {
+        "exit_code": process.returncode,
+        "makespan_s": round(makespan, 3),
+        "throughput_mb_s": round(counts["bytes"] / makespan / MB, 2) if makespan else 0,
+        "cpu_s": round(usage.ru_utime + usage.ru_stime, 3),
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),  # Linux reports KB
+        "files": {k: counts[k] for k in ("complete", "missing", "corrupt")},
+        "bytes": counts["bytes"],
+        "server": stats
+    }
+    if process.returncode != 0 or counts["missing"] or counts["corrupt"]:
+        with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+            result["log_tail"] = f.read()[-2000:]
+    shutil.rmtree(work_dir, ignore_errors=True)
+    for name_to_clear in os.listdir(models_dir):
+        shutil.rmtree(os.path.join(models_dir, name_to_clear), ignore_errors=True)
+        if os.path.isfile(os.path.join(models_dir, name_to_clear)):
+            os.remove(os.path.join(models_dir, name_to_clear))
+    return result
+
+def summarize(runs):
+    """Median and best of the numeric metrics over repeated runs."""
+    summary = {}
+    for metric in ("makespan_s", "throughput_mb_s", "cpu_s", "peak_rss_mb"):
+        values = [run[metric] for run in runs]
+        summary[metric] = {"median": statistics.median(values),
+                           "best": max(values) if metric == "throughput_mb_s" else min(values)}
+    summary["failed_runs"] = sum(1 for run in runs if run["exit_code"] or run["files"]["missing"]
+                                 or run["files"]["corrupt"])
+    return summary
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR, capture_output=True,
+                                text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=SCRIPT_DIR,
+                               capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return "unknown"
+    return (commit or "unknown") + ("-dirty" if dirty else "")
+
+# --- CLI ---
+def _use_scratch_models_dir():
+    """Points COMFY_MODELS_DIR at a scratch folder before any pack is imported (packs read it at import)."""
+    models_dir = tempfile.mkdtemp(prefix="pixelai-bench-models-")
+    os.environ["COMFY_MODELS_DIR"] = models_dir
+    return models_dir
+
+def _server_from_args(args):
+    return HubStandIn(
+        ("127.0.0.1", getattr(args, "port", 0)),
+        latency=args.latency_ms / 1000,
+        bandwidth=args.bandwidth * MB,
+        connection_bandwidth=args.connection_bandwidth * MB,
+        error_rate=args.error_rate,
+        drop_rate=args.drop_rate,
+        seed=args.seed
+    )
+
+def cmd_run(args):
+    answers = [a.strip() for a in args.answers.split(",")] if args.answers else []
+    names = model_packs.pack_names(args.pack)
+    models_dir = _use_scratch_models_dir()
+    server = _server_from_args(args)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    config = {k: getattr(args, k) for k in ("answers", "scale", "latency_ms", "bandwidth", "connection_bandwidth",
+                                             "error_rate", "drop_rate", "seed", "jobs", "repeat", "hf_transfer")}
+    results = {"commit": git_commit(), "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+               "config": config, "packs": {}}
+    env_extra = {"HF_HUB_ENABLE_HF_TRANSFER": "1" if args.hf_transfer else "0"}
+
+    for name in names:
+        try:
+            planned = prepare_pack(server, name, answers, args.scale)
+        except (EOFError, ValueError, FileNotFoundError) as e:
+            safe_print(f"⚠️  {name}: cannot resolve tasks for answers {args.answers} ({e})")
+            continue
+        total = sum(s.size for _, s in planned)
+        safe_print(f"🏁 {name}: {len(planned)} file(s), {total / MB:.1f} MB per run")
+        runs = []
+        for attempt in range(1, args.repeat + 1):
+            run = run_once(server, name, answers, planned, args.jobs, env_extra)
+            runs.append(run)
+            files = run["files"]
+            safe_print(f"   run {attempt}: {run['makespan_s']:.2f}s  {run['throughput_mb_s']:.1f} MB/s  "
+                       f"cpu {run['cpu_s']:.2f}s  rss {run['peak_rss_mb']:.0f} MB  "
+                       f"{files['complete']} ok / {files['missing']} missing / {files['corrupt']} corrupt  "
+                       f"(server: {run['server'].get('requests', 0)} req, {run['server'].get('errors', 0)} 503, "
+                       f"{run['server'].get('drops', 0)} dropped)")
+            if run.get("log_tail") and args.verbose:
+                safe_print(run["log_tail"])
+        results["packs"][name] = {"files": len(planned), "bytes_per_run": total, "runs": runs,
+                                  "summary": summarize(runs)}
+    server.shutdown()
+    shutil.rmtree(models_dir, ignore_errors=True)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['commit']}-{time.strftime('%Y%m%dT%H%M%S')}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"📄 Results written to {output}")
+    return 1 if any(p["summary"]["failed_runs"] for p in results["packs"].values()) else 0
+
+def cmd_compare(args):
+    with open(args.base, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, "r", encoding="utf-8") as f:
+        new = json.load(f)
+    if base["config"] != new["config"]:
+        print("⚠️  Configurations differ; numbers are not directly comparable")
+    print(f"{'pack':<36}{'metric':<17}{base['commit']:>14}{new['commit']:>14}{'change':>10}")
+    for name in sorted(set(base["packs"]) & set(new["packs"])):
+        label = name
+        for metric in ("makespan_s", "throughput_mb_s", "cpu_s", "peak_rss_mb"):
+            old_value = base["packs"][name]["summary"][metric]["median"]
+            new_value = new["packs"][name]["summary"][metric]["median"]
+            change = f"{(new_value - old_value) / old_value * 100:+.1f}%" if old_value else "-"
+            print(f"{label:<36}{metric:<17}{old_value:>14.2f}{new_value:>14.2f}{change:>10}")
+            label = ""
+    return 0
+
+def cmd_serve(args):
+    answers = [a.strip() for a in args.answers.split(",")] if args.answers else []
+    _use_scratch_models_dir()
+    server = _server_from_args(args)
+    for name in model_packs.pack_names(args.pack):
+        try:
+            planned = prepare_pack(server, name, answers, args.scale)
+        except (EOFError, ValueError, FileNotFoundError):
+            continue
+        print(f"📦 {name}: {len(planned)} file(s)")
+    print(f"🌐 Hub stand-in on {server.url} (set HF_ENDPOINT to use it)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def cmd_child(args):
+    answers = [a.strip() for a in args.answers.split(",")] if args.answers else []
+    return run_pack_main(args.pack, answers, args.jobs)
+
+def _add_link_arguments(p):
+    p.add_argument("--answers", default=DEFAULT_ANSWERS, help="Comma separated menu answers")
+    p.add_argument("--scale", type=float, default=0.001, help="File size multiplier (default 1/1000 of real sizes)")
+    p.add_argument("--latency-ms", type=float, default=50, help="Delay before every response")
+    p.add_argument("--bandwidth", type=float, default=0, help="Shared link cap in MB/s (0 = unlimited)")
+    p.add_argument("--connection-bandwidth", type=float, default=0, help="Per-connection cap in MB/s")
+    p.add_argument("--error-rate", type=float, default=0.0, help="Share of GETs answered with 503")
+    p.add_argument("--drop-rate", type=float, default=0.0, help="Share of GETs cut off mid-body")
+    p.add_argument("--seed", type=int, default=1, help="Seed for error injection")
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark pack downloads against a local hub stand-in.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="Benchmark one pack or all packs")
+    p.add_argument("pack", help="Pack name or 'all'")
+    _add_link_arguments(p)
+    p.add_argument("--jobs", type=int, help="Override the pack's MAX_CONCURRENT_DOWNLOADS")
+    p.add_argument("--repeat", type=int, default=3, help="Runs per pack (the median is reported)")
+    p.add_argument("--hf-transfer", action="store_true", help="Enable hf_transfer in the downloader")
+    p.add_argument("-o", "--output", help="Results file (default bench-results/<commit>-<time>.json)")
+    p.add_argument("-v", "--verbose", action="store_true", help="Print the downloader log of failed runs")
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("compare", help="Compare two result files")
+    p.add_argument("base")
+    p.add_argument("new")
+    p.set_defaults(func=cmd_compare)
+
+    p = sub.add_parser("serve", help="Only run the hub stand-in")
+    p.add_argument("pack", nargs="?", default="all")
+    _add_link_arguments(p)
+    p.add_argument("--port", type=int, default=8099)
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("_child", help=argparse.SUPPRESS)
+    p.add_argument("pack")
+    p.add_argument("--answers", default="")
+    p.add_argument("--jobs", type=int)
+    p.set_defaults(func=cmd_child)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+#!/bin/bash
+# Downloads the Llama model used by the Joy Caption Two nodes into models/LLM.
+# Called by ComfyUI_Installer_Runpod.sh, and on its own when ComfyUI comes from
+# a prebuilt image (the model is not baked into the image).
+
+LLM_DIR="${COMFY_MODELS_DIR:-/workspace/ComfyUI/models}/LLM"
+LLM_NAME="Llama-3.1-8B-Lexi-Uncensored-V2-nf4"
+
+mkdir -p "$LLM_DIR"
+cd "$LLM_DIR" || exit 1
+
+if [ -d "$LLM_NAME" ]; then
+    echo "✅ $LLM_NAME already present, skipping."
+    exit 0
+fi
+
+# Download and extract Llama model
+echo "Downloading $LLM_NAME model..."
+wget -c "https://huggingface.co/datasets/simwalo/custom_nodes/resolve/main/$LLM_NAME.zip" || exit 1
+unzip -o "$LLM_NAME.zip" || exit 1
+rm "$LLM_NAME.zip"
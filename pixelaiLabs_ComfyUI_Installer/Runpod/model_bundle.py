@@ -0,0 +1,289 @@
+"""
+Offline install bundles.
+
+Exports a resolved pack (its files, a manifest with sizes and sha256, and the
+pack lockfile) into one uncompressed ZIP, and imports it on another node
+without internet access. Members are stored, not compressed (model weights do
+not compress), so every file can be read straight from its offset and import
+extracts several files in parallel, each verified against the manifest.
+
+Paths in the bundle are relative to the ComfyUI folder (the parent of the
+models directory from _resolve_models_dir / COMFY_MODELS_DIR), so files land
+in models/<type>/ on the importing node whatever its volume layout.
+
+Usage:
+    python3 model_bundle.py export Download_wan2-2_I2V --answers 1 -o wan22_i2v_gguf.zip
+    python3 model_bundle.py list wan22_i2v_gguf.zip
+    python3 model_bundle.py import wan22_i2v_gguf.zip [--jobs 4]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import zipfile
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import model_packs
+
+MANIFEST_NAME = "pixelai_bundle.json"
+LOCK_NAME = "pixelai_bundle.lock.json"
+FORMAT_VERSION = 1
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+MAX_CONCURRENT_EXTRACTS = 4
+
+print_lock = threading.Lock()
+
+def safe_print(message):
+    """Thread-safe print function"""
+    with print_lock:
+        print(message)
+
+def comfy_root(models_dir=None):
+    """The ComfyUI folder that bundle paths are relative to."""
+    return os.path.dirname(os.path.abspath(models_dir or model_packs.resolve_models_dir()))
+
+def _copy_hashed(src, dst):
+    """Copies one open file object to another and returns (sha256, size)."""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: src.read(COPY_CHUNK_SIZE), b""):
+        dst.write(chunk)
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+# --- Export ---
+def _fetch_archive(task, lock, tmp_dir):
+    """Archives are deleted after extraction on install, so bundles fetch them again."""
+    from huggingface_hub import hf_hub_download
+
+    return hf_hub_download(
+        repo_id=task["repo_id"],
+        filename=task["filename"],
+        repo_type=task.get("repo_type"),
+        revision=model_packs.locked_revision(lock, task["repo_id"], task.get("repo_type")),
+        local_dir=tmp_dir
+    )
+
+def export_bundle(name, answers, output, models_dir=None):
+    """
+    Writes a pack's installed files into a bundle.
+
+    Returns:
+        dict: The bundle manifest.
+    """
+    lock = model_packs.load_lock(name)
+    state = model_packs.load_state()
+    root = comfy_root(models_dir)
+    tasks = model_packs.resolve_tasks(model_packs.load_pack(name), answers)
+
+    missing = [model_packs.task_path(t) for t in tasks
+               if not t.get("extract_and_delete") and not os.path.isfile(model_packs.task_path(t))]
+    if missing:
+        raise FileNotFoundError("not installed: " + ", ".join(missing))
+
+    entries = []
+    tmp_path = output + ".tmp"
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as bundle:
+        for task in tasks:
+            path = model_packs.task_path(task)
+            if task.get("extract_and_delete"):
+                # Fetched into a temporary folder: the bundle path is where the pack puts the archive
+                path = os.path.join(task["local_dir"], task["filename"])
+            relpath = os.path.relpath(os.path.abspath(path), root)
+            if relpath.startswith(".."):
+                print(f"⚠️  Skipping {path}: outside {root}")
+                continue
+            if task.get("extract_and_delete"):
+                print(f"📥 Fetching archive {task['filename']} (extracted on install)")
+                path = _fetch_archive(task, lock, tmp_dir)
+            arcname = relpath.replace(os.sep, "/")
+            print(f"📦 {arcname}")
+            with open(path, "rb") as src, bundle.open(arcname, "w", force_zip64=True) as dst:
+                sha256, size = _copy_hashed(src, dst)
+
+            expected = model_packs.locked_file(lock, task["repo_id"], task["filename"], task.get("repo_type"))
+            if expected and expected.get("sha256") and expected["sha256"] != sha256:
+                raise model_packs.LockMismatchError(f"{path} does not match the lockfile")
+            recorded = state["files"].get(model_packs.state_key(task["local_dir"], task["filename"]), {})
+            entries.append({
+                "path": arcname,
+                "repo_id": task["repo_id"],
+                "repo_type": task.get("repo_type"),
+                "filename": task["filename"],
+                "local_dir": os.path.relpath(os.path.abspath(task["local_dir"]), root).replace(os.sep, "/"),
+                "rename_to": task.get("rename_to"),
+                "extract_and_delete": bool(task.get("extract_and_delete")),
+                "revision": model_packs.locked_revision(lock, task["repo_id"], task.get("repo_type"))
+                            or recorded.get("revision"),
+                "size": size,
+                "sha256": sha256
+            })
+
+        manifest = {
+            "format": FORMAT_VERSION,
+            "pack": model_packs.pack_name(name),
+            "answers": answers,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "files": entries
+        }
+        bundle.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2))
+        if lock.get("repos"):
+            bundle.writestr(LOCK_NAME, json.dumps(lock, indent=2, sort_keys=True))
+    os.replace(tmp_path, output)
+    return manifest
+
+# --- Import ---
+def read_manifest(bundle_path):
+    with zipfile.ZipFile(bundle_path) as bundle:
+        manifest = json.loads(bundle.read(MANIFEST_NAME))
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"unsupported bundle format {manifest.get('format')}")
+    return manifest
+
+def _up_to_date(path, entry, state, local_dir):
+    """True if the file is already installed with the bundle's content (no rehash needed)."""
+    if not os.path.isfile(path) or os.path.getsize(path) != entry["size"]:
+        return False
+    recorded = state["files"].get(model_packs.state_key(local_dir, entry["filename"]), {})
+    return recorded.get("sha256") == entry["sha256"]
+
+def _inside_root(root, relative):
+    """Resolves a manifest path under root; raises ValueError if it points outside (../, absolute, symlinks)."""
+    real_root = os.path.realpath(root)
+    path = os.path.realpath(os.path.join(real_root, relative))
+    if os.path.commonpath([real_root, path]) != real_root:
+        raise ValueError(f"bundle path {relative!r} is outside {root}")
+    return path
+
+def import_entry(bundle_path, manifest, entry, root, state):
+    """
+    Extracts one file into place, verifying size and sha256 on the way.
+
+    Returns:
+        str: "installed", "skipped" or "extracted" (for archives).
+    """
+    import model_mirror
+
+    # Checked before anything is written: the .part file and archive extraction go under these too
+    local_dir = _inside_root(root, entry["local_dir"])
+    dest = _inside_root(root, entry["path"])
+    if not entry["extract_and_delete"] and _up_to_date(dest, entry, state, local_dir):
+        return "skipped"
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    part_path = dest + ".part"
+    # Each worker opens its own handle; stored members are read directly from their offsets
+    with zipfile.ZipFile(bundle_path) as bundle, bundle.open(entry["path"]) as src, open(part_path, "wb") as dst:
+        sha256, size = _copy_hashed(src, dst)
+    if sha256 != entry["sha256"] or size != entry["size"]:
+        os.remove(part_path)
+        raise model_packs.LockMismatchError(f"{entry['path']} in bundle is corrupt")
+    os.replace(part_path, dest)
+
+    if entry["extract_and_delete"]:
+        with zipfile.ZipFile(dest, "r") as archive:
+            archive.extractall(local_dir)
+        os.remove(dest)
+        return "extracted"
+    if entry.get("revision"):
+        model_mirror.write_hub_metadata(local_dir, entry["filename"], entry["revision"], sha256)
+    model_packs.record_install(manifest["pack"], entry["repo_id"], entry["repo_type"], entry["filename"],
+                               local_dir, dest, entry.get("revision"), {"size": size, "sha256": sha256})
+    return "installed"
+
+def import_bundle(bundle_path, models_dir=None, jobs=MAX_CONCURRENT_EXTRACTS):
+    """
+    Installs every file of a bundle in parallel.
+
+    Returns:
+        dict: Counts per outcome ("installed", "skipped", "extracted", "failed").
+    """
+    manifest = read_manifest(bundle_path)
+    root = comfy_root(models_dir)
+    with zipfile.ZipFile(bundle_path) as bundle:
+        if LOCK_NAME in bundle.namelist() and not os.path.isfile(model_packs.lock_path(manifest["pack"])):
+            model_packs.write_lock(manifest["pack"], json.loads(bundle.read(LOCK_NAME)))
+    state = model_packs.load_state()
+    needed = sum(e["size"] for e in manifest["files"])
+    free = shutil.disk_usage(root if os.path.isdir(root) else os.path.dirname(root)).free
+    if needed > free:
+        print(f"⚠️  Bundle needs {needed / 1024 ** 3:.1f} GB, only {free / 1024 ** 3:.1f} GB free")
+
+    results = {"installed": 0, "skipped": 0, "extracted": 0, "failed": 0}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(import_entry, bundle_path, manifest, entry, root, state): entry
+                   for entry in manifest["files"]}
+        for future in as_completed(futures):
+            entry = futures[future]
+            try:
+                outcome = future.result()
+            except Exception as e:
+                outcome = "failed"
+                safe_print(f"❌ {entry['path']}: {e}")
+            else:
+                safe_print(f"{'⏭️ ' if outcome == 'skipped' else '✅'} {entry['path']} ({outcome})")
+            results[outcome] += 1
+    return results
+
+# --- CLI ---
+def cmd_export(args):
+    answers = [a.strip() for a in args.answers.split(",")] if args.answers else []
+    output = args.output or f"{model_packs.pack_name(args.pack)}.bundle.zip"
+    try:
+        manifest = export_bundle(args.pack, answers, output)
+    except (FileNotFoundError, model_packs.LockMismatchError) as e:
+        print(f"❌ {e}")
+        return 1
+    total = sum(e["size"] for e in manifest["files"])
+    print(f"✅ Wrote {output}: {len(manifest['files'])} file(s), {total / 1024 ** 3:.2f} GB")
+    return 0
+
+def cmd_list(args):
+    manifest = read_manifest(args.bundle)
+    print(f"📦 {manifest['pack']} (answers: {','.join(manifest['answers']) or '-'}, created {manifest['created_at']})")
+    for entry in manifest["files"]:
+        print(f"  {entry['size'] / 1024 ** 3:7.2f} GB  {entry['path']}")
+    return 0
+
+def cmd_import(args):
+    start_time = time.time()
+    results = import_bundle(args.bundle, jobs=args.jobs)
+    print("\n" + "=" * 80)
+    print(f"✅ Installed: {results['installed']}  📂 Extracted: {results['extracted']}  "
+          f"⏭️  Skipped: {results['skipped']}  ❌ Failed: {results['failed']}")
+    print(f"⏱️  {time.time() - start_time:.1f}s")
+    print("=" * 80)
+    return 1 if results["failed"] else 0
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Export and import offline model pack bundles.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("export", help="Write an installed pack into a bundle")
+    p.add_argument("pack")
+    p.add_argument("--answers", default="", help="Comma separated menu answers, e.g. 1,1")
+    p.add_argument("-o", "--output")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("list", help="Show a bundle's manifest")
+    p.add_argument("bundle")
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser("import", help="Install a bundle into the models directory")
+    p.add_argument("bundle")
+    p.add_argument("--jobs", type=int, default=MAX_CONCURRENT_EXTRACTS, help="Parallel extractions")
+    p.set_defaults(func=cmd_import)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+Catalog of the models on disk, answered from an index instead of the files.
+
+The index (.pixelai_catalog.json next to the install state) holds one entry
+per model file under the models directory (unet, clip, vae, loras, ipadapter,
+clip_vision, checkpoints, upscale_models, ...): folder, size, format,
+dtype/quant, parameter count, tensor count, the base model it was built for,
+sha256 and source pack/repo from the install state, and header problems.
+
+Updates are incremental: the tree is walked with stat() only and a file's
+header (model_formats.py, milliseconds per file) is read again only when its
+size or mtime changed. Workflow files are indexed the same way so "unused"
+(not referenced by any workflow) needs no parsing at query time.
+
+The base model comes from safetensors metadata (modelspec.architecture,
+ss_base_model_version) or GGUF general.architecture, else from tensor names
+and widths: Wan blocks with a 5120 hidden size are wan-14b (Wan 2.1 and 2.2
+14B share the layout), 3072 wan-5b, 1536 wan-1.3b; double/single blocks are
+flux; UNet blocks with a 2048 context are sdxl, otherwise sd15.
+
+Usage:
+    python3 model_catalog.py update [--hash]
+    python3 model_catalog.py query --folder loras --base wan-14b
+    python3 model_catalog.py query --format gguf --unused --total
+    python3 model_catalog.py query --damaged --json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+import model_formats
+import model_packs
+import model_store
+
+CATALOG_FILE_NAME = ".pixelai_catalog.json"
+CATALOG_VERSION = 1
+GB = 1024 ** 3
+WORKFLOW_DIRS = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Workflows")
+]
+
+WAN_BLOCK = re.compile(r"(^|[._])blocks[._]\d+[._](self_attn|cross_attn|ffn)")
+WAN_SIZES = ((5120, "wan-14b"), (3072, "wan-5b"), (1536, "wan-1.3b"))
+FLUX_MARKERS = ("double_blocks", "single_blocks", "single_transformer_blocks")
+UNET_MARKERS = ("input_blocks", "down_blocks", "lora_unet_")
+
+def catalog_path():
+    """Location of the index (one per models directory)."""
+    return os.environ.get("PIXELAI_CATALOG_FILE") or os.path.join(model_packs.resolve_models_dir(), CATALOG_FILE_NAME)
+
+def load_catalog(path=None):
+    path = path or catalog_path()
+    catalog = {}
+    if os.path.isfile(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                catalog = json.load(f)
+        except ValueError:
+            catalog = {}
+    if catalog.get("version") != CATALOG_VERSION:
+        catalog = {"version": CATALOG_VERSION}
+    catalog.setdefault("files", {})
+    catalog.setdefault("workflows", {})
+    return catalog
+
+def save_catalog(catalog, path=None):
+    path = path or catalog_path()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, indent=1)
+    os.replace(tmp_path, path)
+
+# --- Describing files ---
+def _wan_size(dims):
+    for width, name in WAN_SIZES:
+        if width in dims:
+            return name
+    return "wan"
+
+def guess_base(names, dims, metadata):
+    """
+    Base model family of a safetensors file (full model or LoRA).
+
+    Args:
+        names (list): Tensor names.
+        dims (set): Every dimension size used by the tensors.
+        metadata (dict): The __metadata__ block, if any.
+
+    Returns:
+        str: wan-14b, wan-5b, wan-1.3b, flux, sdxl, sd15, t5 or None.
+    """
+    declared = " ".join(str((metadata or {}).get(key, "")) for key in
+                        ("modelspec.architecture", "ss_base_model_version", "ss_sd_model_name")).lower()
+    if "wan" in declared:
+        return _wan_size(dims)
+    if "flux" in declared:
+        return "flux"
+    if "xl" in declared:
+        return "sdxl"
+    if "sd_v1" in declared or "v1-5" in declared:
+        return "sd15"
+    if any(WAN_BLOCK.search(name) for name in names):
+        return _wan_size(dims)
+    if any(marker in name for name in names for marker in FLUX_MARKERS):
+        return "flux"
+    if any(marker in name for name in names for marker in UNET_MARKERS):
+        return "sdxl" if 2048 in dims or any("lora_te2" in name for name in names) else "sd15"
+    if any(name.startswith("encoder.block.") for name in names):
+        return "t5"
+    return None
+
+def _gguf_base(summary):
+    architecture = summary.get("metadata", {}).get("general.architecture")
+    if architecture == "wan":
+        parameters = summary["parameters"]
+        return "wan-14b" if parameters >= 10e9 else "wan-5b" if parameters >= 3e9 else "wan-1.3b"
+    return architecture
+
+def describe(path):
+    """Catalog fields read from the file header (format, quant, parameters, base, problem)."""
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    entry = {"format": extension, "quant": None, "dtypes": None, "parameters": None, "tensors": None,
+             "base": None, "problem": None}
+    try:
+        summary = model_formats.summarize(path)
+    except model_formats.FormatError as e:
+        entry["problem"] = str(e)
+        return entry
+    if not summary:
+        return entry
+    largest = summary["largest"][0]["dtype"] if summary["largest"] else None
+    entry.update(format=summary["format"], quant=summary.get("quant") or largest, dtypes=summary["dtypes"],
+                 parameters=summary["parameters"], tensors=summary["tensors"])
+    if summary["format"] == "gguf":
+        entry["base"] = _gguf_base(summary)
+    else:
+        header, _ = model_formats.read_safetensors_header(path)
+        metadata = header.pop("__metadata__", None)
+        dims = {dim for info in header.values() for dim in info.get("shape", [])}
+        entry["base"] = guess_base(list(header), dims, metadata)
+    return entry
+
+# --- Incremental update ---
+def _workflow_files(dirs):
+    for directory in dirs:
+        for root, subdirs, names in os.walk(directory):
+            subdirs[:] = [d for d in subdirs if not d.startswith(".")]
+            for name in names:
+                if name.lower().endswith(".json"):
+                    yield os.path.abspath(os.path.join(root, name))
+
+def default_workflow_dirs(models_dir):
+    """The repo's Workflows folder and ComfyUI's saved workflows, when they exist."""
+    dirs = WORKFLOW_DIRS + [os.path.join(models_dir, "..", "user", "default", "workflows")]
+    return [os.path.normpath(d) for d in dirs if os.path.isdir(d)]
+
+def update(models_dir=None, workflow_dirs=None, full_hash=False, path=None):
+    """
+    Brings the index up to date, re-reading only files whose size or mtime changed.
+
+    Returns:
+        tuple: (catalog, {"added": n, "changed": n, "unchanged": n, "removed": n, "hashed": n})
+    """
+    models_dir = os.path.abspath(models_dir or model_packs.resolve_models_dir())
+    catalog = load_catalog(path)
+    if catalog.get("models_dir") != models_dir:
+        catalog.update(models_dir=models_dir, files={})
+    counts = {"added": 0, "changed": 0, "unchanged": 0, "removed": 0, "hashed": 0}
+    try:
+        installed = {entry.get("path"): entry for entry in model_packs.load_state()["files"].values()}
+    except (OSError, ValueError):
+        installed = {}
+
+    files = {}
+    for name, paths in model_store.index_models(models_dir).items():
+        for file_path in paths:
+            rel_path = os.path.relpath(file_path, models_dir).replace(os.sep, "/")
+            stat = os.stat(file_path)
+            entry = catalog["files"].get(rel_path)
+            if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns:
+                counts["unchanged"] += 1
+            else:
+                counts["changed" if entry else "added"] += 1
+                entry = {"folder": rel_path.split("/", 1)[0], "name": name, "size": stat.st_size,
+                         "mtime": stat.st_mtime_ns, "sha256": None}
+                entry.update(describe(file_path))
+            source = installed.get(os.path.abspath(file_path), {})
+            entry["pack"], entry["repo"] = source.get("pack"), source.get("repo")
+            if source.get("sha256") and source.get("size") == stat.st_size:
+                entry["sha256"] = source["sha256"]
+            if full_hash and not entry["sha256"]:
+                entry["sha256"] = model_packs.sha256_file(file_path)
+                counts["hashed"] += 1
+            files[rel_path] = entry
+    counts["removed"] = len(set(catalog["files"]) - set(files))
+    catalog["files"] = files
+
+    workflows = {}
+    for workflow_path in _workflow_files(workflow_dirs if workflow_dirs is not None
+                                         else default_workflow_dirs(models_dir)):
+        stat = os.stat(workflow_path)
+        known = catalog["workflows"].get(workflow_path)
+        if known and known["size"] == stat.st_size and known["mtime"] == stat.st_mtime_ns:
+            workflows[workflow_path] = known
+            continue
+        try:
+            models = sorted(model_store.workflow_model_names(workflow_path))
+        except (OSError, ValueError, AttributeError):
+            models = []  # Not a UI workflow
+        workflows[workflow_path] = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "models": models}
+    catalog["workflows"] = workflows
+    catalog["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    save_catalog(catalog, path)
+    return catalog, counts
+
+# --- Queries ---
+def referenced(catalog):
+    """Index paths referenced by at least one indexed workflow (loader values match by tail path)."""
+    by_name = {}
+    for rel_path, entry in catalog["files"].items():
+        by_name.setdefault(entry["name"], []).append(rel_path)
+    used = set()
+    for workflow in catalog["workflows"].values():
+        for name in workflow["models"]:
+            for rel_path in by_name.get(os.path.basename(name), []):
+                if ("/" + rel_path).endswith("/" + name):
+                    used.add(rel_path)
+    return used
+
+def query(catalog, folder=None, fmt=None, quant=None, base=None, pack=None, name=None, unused=False,
+          damaged=False):
+    """
+    Filters the index; every filter is optional.
+
+    Returns:
+        list: (rel_path, entry) pairs.
+    """
+    used = referenced(catalog) if unused else set()
+    results = []
+    for rel_path, entry in catalog["files"].items():
+        if folder and entry["folder"] != folder:
+            continue
+        if fmt and entry["format"] != fmt.lower():
+            continue
+        if quant and (entry["quant"] or "").upper() != quant.upper():
+            continue
+        if base and not (entry["base"] or "").startswith(base.lower()):
+            continue
+        if pack and pack.lower() not in (entry["pack"] or "").lower():
+            continue
+        if name and name.lower() not in rel_path.lower():
+            continue
+        if unused and rel_path in used:
+            continue
+        if damaged and not entry["problem"]:
+            continue
+        results.append((rel_path, entry))
+    return results
+
+# --- CLI ---
+def _workflow_dirs(args):
+    return [os.path.abspath(d) for d in args.workflows] if args.workflows else None
+
+def cmd_update(args):
+    start_time = time.time()
+    catalog, counts = update(args.models_dir, _workflow_dirs(args), full_hash=args.hash)
+    print(f"📚 {len(catalog['files'])} model file(s), {len(catalog['workflows'])} workflow(s) indexed in "
+          f"{time.time() - start_time:.2f}s: " + ", ".join(f"{v} {k}" for k, v in counts.items() if v))
+    return 0
+
+def cmd_query(args):
+    if args.no_refresh:
+        catalog = load_catalog()
+    else:
+        catalog = update(args.models_dir, _workflow_dirs(args))[0]
+    results = query(catalog, folder=args.folder, fmt=args.format, quant=args.quant, base=args.base,
+                    pack=args.pack, name=args.name, unused=args.unused, damaged=args.damaged)
+    results.sort(key=(lambda item: -item[1]["size"]) if args.sort == "size" else (lambda item: item[0]))
+    total = sum(entry["size"] for _, entry in results)
+    if args.json:
+        print(json.dumps({"files": dict(results), "count": len(results), "bytes": total}, indent=2))
+        return 0
+    if not args.total:
+        for rel_path, entry in results:
+            params = f"{entry['parameters'] / 1e9:.2f}B" if entry["parameters"] else "-"
+            print(f"{entry['size'] / GB:8.2f} GB  {entry['format']:<11} {entry['quant'] or '-':<9} {params:>7}  "
+                  f"{entry['base'] or '-':<9} {entry['pack'] or '-':<32} {rel_path}"
+                  + (f"  ❌ {entry['problem']}" if entry["problem"] else ""))
+    print(f"{len(results)} file(s), {total / GB:.2f} GB")
+    return 0
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Index of the local model files and queries over it.")
+    parser.add_argument("--models-dir", help="Models directory (default: same lookup as the downloaders)")
+    parser.add_argument("--workflows", action="append", metavar="DIR",
+                        help="Workflow folder for usage (repeatable; default: repo Workflows and ComfyUI's saved ones)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("update", help="Refresh the index (only changed files are read)")
+    p.add_argument("--hash", action="store_true", help="Also compute sha256 of files without one (slow)")
+    p.set_defaults(func=cmd_update)
+
+    p = sub.add_parser("query", help="List indexed files matching all given filters")
+    p.add_argument("--folder", help="Top-level models folder (loras, unet, clip, ...)")
+    p.add_argument("--format", help="safetensors, gguf, pt, ...")
+    p.add_argument("--quant", help="Quant or weight dtype (Q4_K_M, F8_E4M3, BF16, ...)")
+    p.add_argument("--base", help="Base model prefix (wan, wan-14b, flux, sdxl, ...)")
+    p.add_argument("--pack", help="Source pack (substring)")
+    p.add_argument("--name", help="Path substring")
+    p.add_argument("--unused", action="store_true", help="Only files no indexed workflow references")
+    p.add_argument("--damaged", action="store_true", help="Only files whose header check failed")
+    p.add_argument("--sort", choices=("size", "name"), default="size")
+    p.add_argument("--total", action="store_true", help="Print only the count and total size")
+    p.add_argument("--json", action="store_true", help="Print results as JSON")
+    p.add_argument("--no-refresh", action="store_true", help="Answer from the index without checking the disk")
+    p.set_defaults(func=cmd_query)
+
+    args = parser.parse_args()
+    if args.models_dir:
+        os.environ["COMFY_MODELS_DIR"] = args.models_dir  # Install state and index live there too
+    sys.exit(args.func(args))
+
+if __name__ == "__main__":
+    main()
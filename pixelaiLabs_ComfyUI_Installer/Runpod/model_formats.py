@@ -0,0 +1,428 @@
+"""
+Structural checks of model files that read only their headers.
+
+A downloaded file that exists can still be truncated or damaged. A
+.safetensors file starts with an 8-byte little-endian header length followed
+by a JSON header listing every tensor's dtype, shape and byte range in the
+data section, so two small reads are enough to check that the declared ranges
+add up and fit the file size. That takes milliseconds even for a 20 GB UNET,
+long before a full sha256 would finish.
+
+A .gguf file is memory-mapped and only its header pages are parsed: magic,
+version, metadata, and every tensor's shape, ggml type and offset. The check
+covers the tensor count, known quant types, aligned non-overlapping ranges
+that fit the file, and that the quant label in the file name (Q4_K_M,
+Q5_K_S, Q8_0...) matches the types the tensors actually use.
+
+model_packs uses this after every download, when verifying packs, and before
+trusting a file that is already on disk. Only TruncatedError (declared tensor
+data missing from the end of the file) proves a download incomplete; other
+findings are reported but never cause a file to be deleted. The summary (tensor count, parameter
+count, dtypes, largest tensors) is kept in the install state.
+
+Usage:
+    python3 model_formats.py check /workspace/ComfyUI/models/unet [--json]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import mmap
+import struct
+import argparse
+
+MAX_HEADER_SIZE = 100 * 1024 * 1024  # safetensors' own limit
+LARGEST_TENSORS = 5
+
+# Bytes per element of the safetensors dtypes
+SAFETENSORS_DTYPES = {
+    "F64": 8, "F32": 4, "F16": 2, "BF16": 2,
+    "I64": 8, "I32": 4, "I16": 2, "I8": 1,
+    "U64": 8, "U32": 4, "U16": 2, "U8": 1,
+    "BOOL": 1, "F8_E4M3": 1, "F8_E5M2": 1, "F8_E8M0": 1
+}
+
+# ggml tensor types: (name, elements per block, bytes per block)
+GGML_TYPES = {
+    0: ("F32", 1, 4), 1: ("F16", 1, 2), 2: ("Q4_0", 32, 18), 3: ("Q4_1", 32, 20),
+    6: ("Q5_0", 32, 22), 7: ("Q5_1", 32, 24), 8: ("Q8_0", 32, 34), 9: ("Q8_1", 32, 40),
+    10: ("Q2_K", 256, 84), 11: ("Q3_K", 256, 110), 12: ("Q4_K", 256, 144), 13: ("Q5_K", 256, 176),
+    14: ("Q6_K", 256, 210), 15: ("Q8_K", 256, 292), 16: ("IQ2_XXS", 256, 66), 17: ("IQ2_XS", 256, 74),
+    18: ("IQ3_XXS", 256, 98), 19: ("IQ1_S", 256, 50), 20: ("IQ4_NL", 32, 18), 21: ("IQ3_S", 256, 110),
+    22: ("IQ2_S", 256, 82), 23: ("IQ4_XS", 256, 136), 24: ("I8", 1, 1), 25: ("I16", 1, 2),
+    26: ("I32", 1, 4), 27: ("I64", 1, 8), 28: ("F64", 1, 8), 29: ("IQ1_M", 256, 56),
+    30: ("BF16", 1, 2), 34: ("TQ1_0", 256, 54), 35: ("TQ2_0", 256, 66), 39: ("MXFP4", 32, 17),
+    40: ("NVFP4", 64, 36), 41: ("Q1_0", 128, 18)
+}
+
+# general.file_type values (llama.cpp's LLAMA_FTYPE_*)
+GGUF_FILE_TYPES = {
+    0: "F32", 1: "F16", 2: "Q4_0", 3: "Q4_1", 7: "Q8_0", 8: "Q5_0", 9: "Q5_1", 10: "Q2_K",
+    11: "Q3_K_S", 12: "Q3_K_M", 13: "Q3_K_L", 14: "Q4_K_S", 15: "Q4_K_M", 16: "Q5_K_S", 17: "Q5_K_M",
+    18: "Q6_K", 19: "IQ2_XXS", 20: "IQ2_XS", 21: "Q2_K_S", 22: "IQ3_XS", 23: "IQ3_XXS", 24: "IQ1_S",
+    25: "IQ4_NL", 26: "IQ3_S", 27: "IQ3_M", 28: "IQ2_S", 29: "IQ2_M", 30: "IQ4_XS", 31: "IQ1_M",
+    32: "BF16", 36: "TQ1_0", 37: "TQ2_0", 38: "MXFP4_MOE", 39: "NVFP4", 40: "Q1_0"
+}
+
+GGUF_MAGIC = b"GGUF"
+GGUF_VERSIONS = (2, 3)
+GGUF_DEFAULT_ALIGNMENT = 32
+GGUF_SUMMARY_KEYS = ("general.architecture", "general.name", "general.file_type",
+                     "general.quantization_version", "general.alignment")
+
+# Metadata value types: struct format of the fixed-size ones
+GGUF_SCALARS = {0: "<B", 1: "<b", 2: "<H", 3: "<h", 4: "<I", 5: "<i", 6: "<f", 7: "<?",
+                10: "<Q", 11: "<q", 12: "<d"}
+GGUF_STRING = 8
+GGUF_ARRAY = 9
+
+QUANT_LABEL = re.compile(r"[-_.]((?:I?Q\d(?:_[0-9A-Z]+)*)|BF16|F16|F32)\.gguf$", re.IGNORECASE)
+
+class FormatError(Exception):
+    """Raised when a model file's header is unreadable or does not fit the file."""
+
+class TruncatedError(FormatError):
+    """Raised when a file ends before its header or the tensor data it declares (incomplete download)."""
+
+# --- safetensors ---
+def read_safetensors_header(path):
+    """
+    Reads the JSON header of a .safetensors file.
+
+    Returns:
+        tuple: (header dict, size of the data section in bytes)
+    """
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        prefix = f.read(8)
+        if len(prefix) < 8:
+            raise TruncatedError(f"file is {file_size} bytes, too short for a safetensors header")
+        (header_size,) = struct.unpack("<Q", prefix)
+        if header_size > MAX_HEADER_SIZE:
+            raise FormatError(f"header length {header_size} is over the {MAX_HEADER_SIZE} byte limit")
+        if 8 + header_size > file_size:
+            raise TruncatedError(f"header length {header_size} does not fit the file ({file_size} bytes)")
+        raw = f.read(header_size)
+    try:
+        header = json.loads(raw)
+    except ValueError as e:
+        raise FormatError(f"header is not valid JSON ({e})")
+    if not isinstance(header, dict):
+        raise FormatError("header is not a JSON object")
+    return header, file_size - 8 - header_size
+
+def _elements(shape):
+    count = 1
+    for dim in shape:
+        count *= dim
+    return count
+
+def _largest(shapes):
+    """The biggest tensors from (elements, name, shape, dtype) tuples."""
+    return [{"name": name, "shape": shape, "dtype": dtype}
+            for _, name, shape, dtype in sorted(shapes, reverse=True)[:LARGEST_TENSORS]]
+
+def _data_end(info):
+    """End offset of a tensor's byte range, None if the entry has no usable data_offsets."""
+    try:
+        end = info["data_offsets"][1]
+    except (KeyError, TypeError, IndexError):
+        return None
+    return end if isinstance(end, int) else None
+
+def check_safetensors(path):
+    """
+    Checks that every tensor's byte range matches its dtype and shape and that
+    the ranges exactly cover the data section.
+
+    Returns:
+        dict: Summary (format, tensors, parameters, dtypes, largest) - raises FormatError
+              on a bad file, TruncatedError when tensor data is missing from its end.
+    """
+    header, data_size = read_safetensors_header(path)
+    metadata = header.pop("__metadata__", None)
+    # Truncation first, so a stricter finding on an earlier tensor cannot hide it
+    ends = [(_data_end(info), name) for name, info in header.items() if _data_end(info) is not None]
+    end, name = max(ends, default=(0, None))
+    if end > data_size:
+        raise TruncatedError(f"tensor '{name}' ends at byte {end} but the data section has {data_size} "
+                             f"(truncated by {end - data_size} bytes)")
+    dtypes = {}
+    parameters = 0
+    covered = 0
+    shapes = []
+    for name, info in header.items():
+        try:
+            dtype, shape, (begin, end) = info["dtype"], info["shape"], info["data_offsets"]
+        except (KeyError, TypeError, ValueError):
+            raise FormatError(f"tensor '{name}' has no dtype/shape/data_offsets")
+        if not 0 <= begin <= end:
+            raise FormatError(f"tensor '{name}' has an invalid byte range {begin}-{end}")
+        elements = _elements(shape)
+        if dtype in SAFETENSORS_DTYPES and elements * SAFETENSORS_DTYPES[dtype] != end - begin:
+            raise FormatError(f"tensor '{name}' is {end - begin} bytes, {dtype}{shape} needs "
+                              f"{elements * SAFETENSORS_DTYPES[dtype]}")
+        dtypes[dtype] = dtypes.get(dtype, 0) + 1
+        parameters += elements
+        covered = max(covered, end)
+        shapes.append((elements, name, shape, dtype))
+    if covered != data_size:
+        raise FormatError(f"tensors cover {covered} bytes of a {data_size} byte data section")
+    return {
+        "format": "safetensors",
+        "tensors": len(header),
+        "parameters": parameters,
+        "dtypes": dtypes,
+        "largest": _largest(shapes),
+        "metadata": metadata
+    }
+
+# --- GGUF ---
+class _GGUFReader:
+    """Sequential little-endian reads from a mapped file; reading past its end raises TruncatedError."""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.pos = 0
+
+    def unpack(self, fmt):
+        size = struct.calcsize(fmt)
+        if self.pos + size > len(self.buffer):
+            raise TruncatedError(f"header runs past the end of the file at byte {self.pos}")
+        values = struct.unpack_from(fmt, self.buffer, self.pos)
+        self.pos += size
+        return values[0] if len(values) == 1 else values
+
+    def string(self):
+        length = self.unpack("<Q")
+        if self.pos + length > len(self.buffer):
+            raise TruncatedError(f"string of {length} bytes at byte {self.pos} runs past the end of the file")
+        value = bytes(self.buffer[self.pos:self.pos + length]).decode("utf-8", "replace")
+        self.pos += length
+        return value
+
+    def value(self, value_type):
+        """A metadata value; arrays are skipped and returned as their length."""
+        if value_type in GGUF_SCALARS:
+            return self.unpack(GGUF_SCALARS[value_type])
+        if value_type == GGUF_STRING:
+            return self.string()
+        if value_type == GGUF_ARRAY:
+            item_type, count = self.unpack("<I"), self.unpack("<Q")
+            if item_type in GGUF_SCALARS:
+                self.pos += count * struct.calcsize(GGUF_SCALARS[item_type])
+                if self.pos > len(self.buffer):
+                    raise TruncatedError("metadata array runs past the end of the file")
+            else:
+                for _ in range(count):
+                    self.value(item_type)
+            return count
+        raise FormatError(f"unknown metadata value type {value_type} at byte {self.pos}")
+
+def read_gguf_header(path):
+    """
+    Parses the metadata and tensor table of a .gguf file through mmap (tensor data is not read).
+
+    Returns:
+        dict: version, metadata (arrays as their length), tensors [(name, shape, type, offset)],
+              data_start and file_size.
+    """
+    file_size = os.path.getsize(path)
+    if file_size < 24:
+        raise TruncatedError(f"file is {file_size} bytes, too short for a GGUF header")
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        reader = _GGUFReader(buffer)
+        if bytes(buffer[:4]) != GGUF_MAGIC:
+            raise FormatError(f"bad magic {bytes(buffer[:4])!r}, not a GGUF file")
+        reader.pos = 4
+        version = reader.unpack("<I")
+        if version not in GGUF_VERSIONS:
+            raise FormatError(f"unsupported GGUF version {version}")
+        tensor_count, kv_count = reader.unpack("<Q"), reader.unpack("<Q")
+        # Every tensor entry and key/value needs well over 8 bytes, so larger counts mean garbage
+        if tensor_count > file_size // 8 or kv_count > file_size // 8:
+            raise FormatError(f"implausible counts ({tensor_count} tensors, {kv_count} metadata keys)")
+        metadata = {}
+        for _ in range(kv_count):
+            key = reader.string()
+            metadata[key] = reader.value(reader.unpack("<I"))
+        tensors = []
+        for _ in range(tensor_count):
+            name = reader.string()
+            dims = reader.unpack("<I")
+            if dims > 8:
+                raise FormatError(f"tensor '{name}' declares {dims} dimensions")
+            shape = [reader.unpack("<Q") for _ in range(dims)]
+            tensors.append((name, shape, reader.unpack("<I"), reader.unpack("<Q")))
+        alignment = metadata.get("general.alignment", GGUF_DEFAULT_ALIGNMENT)
+        if not isinstance(alignment, int) or alignment <= 0 or alignment & (alignment - 1):
+            raise FormatError(f"invalid general.alignment {alignment}")
+        data_start = (reader.pos + alignment - 1) // alignment * alignment
+    return {"version": version, "metadata": metadata, "tensors": tensors, "alignment": alignment,
+            "data_start": data_start, "file_size": file_size}
+
+def quant_label(path):
+    """Quant label in a file name ('Q4_K_M' for umt5-xxl-encoder-Q4_K_M.gguf), or None."""
+    match = QUANT_LABEL.search(os.path.basename(path))
+    return match.group(1).upper() if match else None
+
+def label_type(label):
+    """The ggml type a quant label is built on: Q4_K_M -> Q4_K, Q8_0 -> Q8_0; None for mixes like IQ3_M."""
+    names = {name for name, _, _ in GGML_TYPES.values()}
+    if label in names:
+        return label
+    base = label.rsplit("_", 1)[0]
+    return base if base in names else None
+
+def check_gguf(path):
+    """
+    Checks the GGUF tensor table against the file: known types, sizes that match
+    the shapes, aligned ranges that do not overlap and end within the file, and
+    the file name's quant label.
+
+    Returns:
+        dict: Summary (format, version, tensors, parameters, dtypes, quant, largest,
+              metadata) - raises FormatError on a bad file, TruncatedError when tensor
+              data is missing from its end.
+    """
+    header = read_gguf_header(path)
+    data_size = header["file_size"] - header["data_start"]
+    if data_size < 0:
+        raise TruncatedError(f"tensor table ends past the end of the file ({header['file_size']} bytes)")
+    dtypes = {}
+    parameters = 0
+    ranges = []
+    shapes = []
+    unknown = []
+    for name, shape, type_id, offset in header["tensors"]:
+        if type_id not in GGML_TYPES:
+            # Newer ggml types are not proof of damage; the known tensors are still checked for truncation
+            unknown.append(f"tensor '{name}' has unknown ggml type {type_id}")
+            continue
+        type_name, block_size, block_bytes = GGML_TYPES[type_id]
+        elements = _elements(shape)
+        if elements % block_size:
+            raise FormatError(f"tensor '{name}' has {elements} elements, not a multiple of the {type_name} block")
+        if offset % header["alignment"]:
+            raise FormatError(f"tensor '{name}' offset {offset} is not {header['alignment']}-byte aligned")
+        end = offset + elements // block_size * block_bytes
+        if end > data_size:
+            raise TruncatedError(f"tensor '{name}' ends at byte {end} but the data region has {data_size} "
+                                 f"(truncated by {end - data_size} bytes)")
+        dtypes[type_name] = dtypes.get(type_name, 0) + 1
+        parameters += elements
+        ranges.append((offset, end, name))
+        shapes.append((elements, name, shape, type_name))
+    ranges.sort()
+    for (_, previous_end, previous), (begin, _, name) in zip(ranges, ranges[1:]):
+        if begin < previous_end:
+            raise FormatError(f"tensors '{previous}' and '{name}' overlap")
+    if unknown:
+        raise FormatError(unknown[0] + (f" (and {len(unknown) - 1} more)" if len(unknown) > 1 else ""))
+
+    metadata = header["metadata"]
+    file_type = GGUF_FILE_TYPES.get(metadata.get("general.file_type"))
+    label = quant_label(path)
+    expected_type = label_type(label) if label else None
+    if expected_type and expected_type not in dtypes:
+        raise FormatError(f"file name says {label} but the tensors are {', '.join(sorted(dtypes))}")
+    return {
+        "format": "gguf",
+        "version": header["version"],
+        "tensors": len(header["tensors"]),
+        "parameters": parameters,
+        "dtypes": dtypes,
+        "quant": file_type or label,
+        "largest": _largest(shapes),
+        "metadata": {key: metadata[key] for key in GGUF_SUMMARY_KEYS if key in metadata}
+    }
+
+# --- Dispatch ---
+CHECKERS = {
+    ".safetensors": check_safetensors,
+    ".sft": check_safetensors,
+    ".gguf": check_gguf
+}
+
+def checkable(path):
+    return os.path.splitext(path)[1].lower() in CHECKERS
+
+def summarize(path):
+    """Header summary of a model file, None for formats without a checker. Raises FormatError on a bad file."""
+    checker = CHECKERS.get(os.path.splitext(path)[1].lower())
+    if checker is None:
+        return None
+    try:
+        return checker(path)
+    except OSError as e:
+        raise FormatError(str(e))
+
+def problem(path):
+    """Short reason why a model file is damaged, or None if it looks intact (or cannot be checked)."""
+    try:
+        summarize(path)
+    except FormatError as e:
+        return str(e)
+    return None
+
+# --- CLI ---
+def _files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs[:] = [d for d in dirs if not d.startswith(".")]
+                for name in sorted(names):
+                    if checkable(name):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+def cmd_check(args):
+    results = []
+    failures = 0
+    start_time = time.time()
+    for path in _files(args.paths):
+        file_start = time.time()
+        try:
+            summary = summarize(path)
+            error = None
+        except FormatError as e:
+            summary, error = None, str(e)
+            failures += 1
+        elapsed_ms = (time.time() - file_start) * 1000
+        results.append({"path": path, "ok": error is None, "problem": error, "summary": summary,
+                        "ms": round(elapsed_ms, 2)})
+        if args.json:
+            continue
+        if error:
+            print(f"❌ {path}: {error}")
+        elif summary:
+            dtypes = ", ".join(f"{k}×{v}" for k, v in sorted(summary["dtypes"].items()))
+            quant = f" [{summary['quant']}]" if summary.get("quant") else ""
+            print(f"✅ {path}: {summary['tensors']} tensors, {summary['parameters'] / 1e9:.2f}B params, "
+                  f"{dtypes}{quant} ({elapsed_ms:.1f} ms)")
+        else:
+            print(f"➖ {path}: no header check for this format")
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"\n{len(results)} file(s) checked in {time.time() - start_time:.2f}s, {failures} damaged.")
+    return 1 if failures else 0
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Check model files by reading only their headers.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("check", help="Check model files or folders of them")
+    p.add_argument("paths", nargs="+")
+    p.add_argument("--json", action="store_true", help="Print results as JSON")
+    p.set_defaults(func=cmd_check)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+if __name__ == "__main__":
+    main()
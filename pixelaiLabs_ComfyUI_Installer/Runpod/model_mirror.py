@@ -0,0 +1,423 @@
+"""
+LAN mirror for model files.
+
+One pod serves the files recorded in its install state over HTTP (with Range
+support, so interrupted transfers resume). Other pods list it in
+PIXELAI_MIRRORS and model_packs.hub_download tries the mirrors in order before
+falling back to the Hugging Face hub.
+
+URLs follow the hub layout, so a mirror is addressed exactly like the hub:
+    /<repo_id>/resolve/<revision>/<filename>
+    /datasets/<repo_id>/resolve/<revision>/<filename>
+
+The same server answers peer requests from model_peers.py (chunks of files
+by sha256, including downloads that are still in progress).
+
+Usage:
+    python3 model_mirror.py serve [--port 8090] [--verify]       (pod A)
+    PIXELAI_MIRRORS=http://10.0.0.5:8090 python3 Download_wan2-2_I2V.py   (pod B)
+    python3 model_mirror.py list http://10.0.0.5:8090
+
+Local test with two processes:
+    COMFY_MODELS_DIR=/workspace/ComfyUI/models python3 model_mirror.py serve --port 8090 &
+    COMFY_MODELS_DIR=/tmp/models PIXELAI_MIRRORS=http://127.0.0.1:8090 python3 model_packs.py update Download_wan2-2_I2V --answers 1
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+import http.client
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import model_packs
+import model_telemetry
+
+DEFAULT_PORT = 8090
+CHUNK_SIZE = 8 * 1024 * 1024
+TIMEOUT = float(os.environ.get("PIXELAI_MIRROR_TIMEOUT", "15"))
+INDEX_PATH = "/.pixelai/index.json"
+CHUNKS_PATH = "/.pixelai/chunks/"
+BLOB_PATH = "/.pixelai/blob/"
+SHA256_HEADER = "X-Pixelai-Sha256"
+REPO_PREFIXES = {"datasets": "dataset", "spaces": "space"}
+
+_dead_mirrors = set()
+_dead_lock = threading.Lock()
+
+# --- Server ---
+class MirrorIndex:
+    """Install-state entries that can be served, reloaded when the state file changes."""
+
+    def __init__(self, verify=False):
+        self.verify = verify
+        self.entries = {}
+        self._mtime = None
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        path = model_packs.state_path()
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+        with self._lock:
+            if mtime == self._mtime:
+                return self.entries
+            entries = {}
+            for entry in model_packs.load_state(path)["files"].values():
+                if self._servable(entry):
+                    entries[(entry["repo"], entry["filename"])] = entry
+            self.entries, self._mtime = entries, mtime
+            return entries
+
+    def _servable(self, entry):
+        path = entry.get("path")
+        if not entry.get("repo") or not entry.get("filename") or entry.get("evicted"):
+            return False
+        if not path or not os.path.isfile(path):
+            return False
+        if entry.get("size") is not None and os.path.getsize(path) != entry["size"]:
+            return False
+        if self.verify and entry.get("sha256"):
+            if path not in self._hashes:
+                print(f"🔍 Hashing {entry['filename']}...")
+                self._hashes[path] = model_packs.sha256_file(path)
+            if self._hashes[path] != entry["sha256"]:
+                print(f"⚠️  Not serving {path}: sha256 mismatch")
+                return False
+        return True
+
+    def by_sha256(self, sha256):
+        for entry in self.refresh().values():
+            if entry.get("sha256") == sha256:
+                return entry
+        return None
+
+    def lookup(self, repo, revision, filename):
+        entry = self.refresh().get((repo, filename))
+        if entry and revision != "main" and entry.get("revision") and entry["revision"] != revision:
+            return None
+        return entry
+
+def parse_resolve_path(path):
+    """Splits a hub-style resolve URL path into (repo_key, revision, filename)."""
+    parts = urllib.parse.unquote(path.split("?", 1)[0]).lstrip("/").split("/")
+    repo_type = None
+    if parts and parts[0] in REPO_PREFIXES:
+        repo_type = REPO_PREFIXES[parts.pop(0)]
+    if len(parts) < 5 or parts[2] != "resolve":
+        return None
+    repo_id = "/".join(parts[:2])
+    return model_packs.repo_key(repo_id, repo_type), parts[3], "/".join(parts[4:])
+
+def parse_range(header, size):
+    """Parses a single 'bytes=a-b' range. Returns (start, end) inclusive, or None for the whole file."""
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", (header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+class MirrorHandler(BaseHTTPRequestHandler):
+    server_version = "PixelaiMirror/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_HEAD(self):
+        self._handle(send_body=False)
+
+    def do_GET(self):
+        self._handle(send_body=True)
+
+    def _handle(self, send_body):
+        path = self.path.split("?", 1)[0]
+        if path == INDEX_PATH:
+            return self._send_index(send_body)
+        if path.startswith(CHUNKS_PATH):
+            return self._send_chunks(path[len(CHUNKS_PATH):], send_body)
+        if path.startswith(BLOB_PATH):
+            return self._send_blob(path[len(BLOB_PATH):], send_body)
+        parsed = parse_resolve_path(self.path)
+        entry = self.server.index.lookup(*parsed) if parsed else None
+        if not entry:
+            return self._send_error(404, "not mirrored")
+        self._send_file(entry["path"], entry, send_body)
+
+    def _send_file(self, path, entry, send_body, size=None, readable=None):
+        """Sends a file or the requested byte range of it; readable(start, end) can veto the range."""
+        size = os.path.getsize(path) if size is None else size
+        try:
+            byte_range = parse_range(self.headers.get("Range"), size)
+        except ValueError:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        start, end = byte_range or (0, size - 1)
+        length = end - start + 1 if size else 0
+        if readable and not readable(start, end):
+            return self._send_error(404, "range not held")
+
+        self.send_response(206 if byte_range else 200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        if byte_range:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        if entry.get("revision"):
+            self.send_header("X-Repo-Commit", entry["revision"])
+        if entry.get("sha256"):
+            self.send_header(SHA256_HEADER, entry["sha256"])
+            self.send_header("ETag", f'"{entry["sha256"]}"')
+        self.end_headers()
+        if send_body and length:
+            with open(path, "rb") as f:
+                try:
+                    self.connection.sendfile(f, start, length)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+            self.server.add_sent(length)
+
+    # Peer endpoints (model_peers.py): files by sha256, including chunks of unfinished downloads
+    def _send_chunks(self, sha256, send_body):
+        import model_peers
+
+        entry = self.server.index.by_sha256(sha256)
+        if entry:
+            size = os.path.getsize(entry["path"])
+            have = list(range(model_peers.chunk_count(size)))
+        else:
+            progress = model_peers.load_progress(sha256)
+            if not progress or progress.get("chunk_size") != model_peers.CHUNK_SIZE:
+                return self._send_error(404, "unknown file")
+            size, have = progress["size"], progress["have"]
+        body = json.dumps({"size": size, "chunk_size": model_peers.CHUNK_SIZE, "have": have}).encode("utf-8")
+        self._send_json(body, send_body)
+
+    def _send_blob(self, sha256, send_body):
+        import model_peers
+
+        entry = self.server.index.by_sha256(sha256)
+        if entry:
+            return self._send_file(entry["path"], entry, send_body)
+        progress = model_peers.load_progress(sha256)
+        if not progress or not os.path.isfile(progress.get("path", "")):
+            return self._send_error(404, "unknown file")
+        have = set(progress["have"])
+        chunk_size = progress["chunk_size"]
+
+        def readable(start, end):
+            return all(i in have for i in range(start // chunk_size, end // chunk_size + 1))
+
+        self._send_file(progress["path"], {}, send_body, size=progress["size"], readable=readable)
+
+    def _send_index(self, send_body):
+        files = [{k: entry.get(k) for k in ("repo", "filename", "revision", "size", "sha256")}
+                 for entry in self.server.index.refresh().values()]
+        self._send_json(json.dumps({"files": files}).encode("utf-8"), send_body)
+
+    def _send_json(self, body, send_body):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _send_error(self, code, message):
+        body = message.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+class MirrorServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, index, verbose=False):
+        super().__init__(address, MirrorHandler)
+        self.index = index
+        self.verbose = verbose
+        self.bytes_sent = 0
+        self._sent_lock = threading.Lock()
+
+    def add_sent(self, count):
+        with self._sent_lock:
+            self.bytes_sent += count
+
+# --- Client ---
+def mirror_urls():
+    """Mirrors from PIXELAI_MIRRORS (comma or space separated), minus ones that stopped answering, fastest first."""
+    urls = [u.strip().rstrip("/") for u in re.split(r"[,\s]+", os.environ.get("PIXELAI_MIRRORS", "")) if u.strip()]
+    with _dead_lock:
+        urls = [u for u in urls if u not in _dead_mirrors]
+    return model_telemetry.rank_hosts(urls, "mirror")
+
+def resolve_url(base_url, repo_id, filename, repo_type=None, revision=None):
+    """Hub-style resolve URL on a mirror."""
+    prefix = {"dataset": "datasets/", "space": "spaces/"}.get(repo_type, "")
+    return f"{base_url}/{prefix}{repo_id}/resolve/{revision or 'main'}/{urllib.parse.quote(filename)}"
+
+def write_hub_metadata(local_dir, filename, commit, sha256):
+    """
+    Writes the metadata file hf_hub_download keeps for local_dir downloads, so a
+    later hub run sees the mirrored file as up to date instead of fetching it again.
+    """
+    meta_dir = os.path.join(local_dir, ".cache", "huggingface", "download", os.path.dirname(filename))
+    os.makedirs(meta_dir, exist_ok=True)
+    with open(os.path.join(meta_dir, os.path.basename(filename) + ".metadata"), "w", encoding="utf-8") as f:
+        f.write(f"{commit}\n{sha256}\n{time.time()}\n")
+
+def _download(url, dest, expected):
+    """
+    Streams url into dest + '.part' (resuming a previous partial file) and verifies it.
+
+    Returns:
+        dict: {"revision", "sha256", "size"} reported by the mirror and measured locally.
+    """
+    part_path = dest + ".part"
+    digest = hashlib.sha256()
+    offset = os.path.getsize(part_path) if os.path.isfile(part_path) else 0
+    if offset:
+        with open(part_path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+
+    request = urllib.request.Request(url, headers={"Range": f"bytes={offset}-"} if offset else {})
+    try:
+        response = urllib.request.urlopen(request, timeout=TIMEOUT)
+    except urllib.error.HTTPError as e:
+        if e.code != 416:
+            raise
+        # Partial file is already complete (or longer than the mirror's copy): start over
+        os.remove(part_path)
+        return _download(url, dest, expected)
+    with response:
+        if response.status != 206:
+            offset = 0
+            digest = hashlib.sha256()
+        with open(part_path, "r+b" if offset else "wb") as f:
+            f.seek(offset)
+            f.truncate()
+            for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+                f.write(chunk)
+                digest.update(chunk)
+        revision = response.headers.get("X-Repo-Commit")
+        mirror_sha256 = response.headers.get(SHA256_HEADER)
+
+    sha256 = digest.hexdigest()
+    size = os.path.getsize(part_path)
+    wanted_sha256 = (expected or {}).get("sha256") or mirror_sha256
+    wanted_size = (expected or {}).get("size")
+    if (wanted_sha256 and sha256 != wanted_sha256) or (wanted_size is not None and size != wanted_size):
+        os.remove(part_path)
+        raise model_packs.LockMismatchError(f"mirror copy of {os.path.basename(dest)} failed verification")
+    os.replace(part_path, dest)
+    return {"revision": revision, "sha256": sha256, "size": size}
+
+def fetch(repo_id, filename, repo_type=None, revision=None, local_dir=None, expected=None):
+    """
+    Tries every configured mirror in order.
+
+    Returns:
+        tuple: (path, info) from the first mirror that had a verified copy, or (None, None).
+    """
+    dest = os.path.join(local_dir, filename)
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    for base_url in mirror_urls():
+        url = resolve_url(base_url, repo_id, filename, repo_type, revision)
+        try:
+            info = _download(url, dest, expected)
+        except urllib.error.HTTPError as e:
+            if e.code != 404:
+                print(f"⚠️  Mirror {base_url}: HTTP {e.code} for {filename}")
+            continue
+        except (urllib.error.URLError, ConnectionError) as e:
+            # Could not connect, or the connection dropped: the mirror is down
+            print(f"⚠️  Mirror {base_url} unreachable ({e}), skipping it from now on")
+            with _dead_lock:
+                _dead_mirrors.add(base_url)
+            model_telemetry.record_failure("mirror", base_url)
+            continue
+        except (TimeoutError, http.client.HTTPException) as e:
+            # A stalled or cut-off transfer: try the next source for this file only
+            print(f"⚠️  Mirror {base_url}: transfer of {filename} failed ({e})")
+            continue
+        except model_packs.LockMismatchError as e:
+            print(f"⚠️  {e}")
+            continue
+        write_hub_metadata(local_dir, filename, info["revision"] or revision or "main", info["sha256"])
+        info["mirror"] = base_url
+        print(f"🪞 {filename} from mirror {base_url}")
+        return dest, info
+    return None, None
+
+# --- CLI ---
+def cmd_serve(args):
+    index = MirrorIndex(verify=args.verify)
+    entries = index.refresh()
+    server = MirrorServer((args.host, args.port), index, verbose=args.verbose)
+    total = sum(e.get("size") or 0 for e in entries.values())
+    print("=" * 80)
+    print(f"🪞 Mirroring {len(entries)} file(s), {total / 1024 ** 3:.1f} GB from {model_packs.resolve_models_dir()}")
+    print(f"🌐 Listening on http://{args.host}:{args.port}")
+    print("=" * 80)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\n📤 Served {server.bytes_sent / 1024 ** 3:.2f} GB")
+    return 0
+
+def cmd_list(args):
+    with urllib.request.urlopen(args.url.rstrip("/") + INDEX_PATH, timeout=TIMEOUT) as response:
+        files = json.load(response)["files"]
+    for entry in sorted(files, key=lambda e: (e["repo"], e["filename"])):
+        print(f"{(entry.get('size') or 0) / 1024 ** 3:7.2f} GB  {entry['repo']}  {entry['filename']}")
+    print(f"✅ {len(files)} file(s)")
+    return 0
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Serve installed models to other pods, or list a mirror.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("serve", help="Serve this pod's installed models over HTTP")
+    p.add_argument("--host", default="0.0.0.0")
+    p.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p.add_argument("--verify", action="store_true", help="Hash files before serving them (slow)")
+    p.add_argument("--verbose", action="store_true", help="Log every request")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("list", help="List the files a mirror serves")
+    p.add_argument("url")
+    p.set_defaults(func=cmd_list)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+if __name__ == "__main__":
+    main()
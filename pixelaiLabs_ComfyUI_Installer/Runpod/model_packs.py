@@ -0,0 +1,795 @@
+"""
+Shared helpers for the RunPod model downloaders.
+
+Every Download_*.py script in this folder describes a "pack": a list of
+download tasks ({repo_id, repo_type, filename, local_dir, ...}). This module
+loads those scripts without running their interactive menus, resolves their
+task lists, and pins every Hugging Face repo a pack touches to an exact commit
+through a per-pack lockfile stored in ./locks.
+
+Usage:
+    python3 model_packs.py plan Download_wan2-2_I2V --answers 1
+    python3 model_packs.py lock Download_wan2-2_I2V        (or: lock all)
+    python3 model_packs.py verify Download_wan2-2_I2V --answers 1
+    python3 model_packs.py update Download_wan2-2_I2V --answers 1 [--prune] [--dry-run]
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import fcntl
+import zipfile
+import hashlib
+import threading
+import argparse
+import builtins
+import contextlib
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import model_formats
+import model_progress
+import model_telemetry
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+LOCK_DIR = os.environ.get("PIXELAI_LOCK_DIR", os.path.join(SCRIPT_DIR, "locks"))
+IGNORE_LOCK = os.environ.get("PIXELAI_IGNORE_LOCK") == "1"
+VERIFY_HASHES = os.environ.get("PIXELAI_VERIFY_HASHES") == "1"
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+TRUNCATED = "truncated: "  # Prefix of check_file() reasons that come from the header check
+STATE_FILE_NAME = ".pixelai_install_state.json"
+MAX_CONCURRENT_DOWNLOADS = 4  # Used by the update command
+
+# Downloader scripts that make up the installable packs, in boot order
+PACK_SCRIPTS = [
+    "Download_models_GGUF.py",
+    "Download_models_GGUF_VACE.py",
+    "Download_models_Flux_Kontext_GGUF.py",
+    "Download_models_GGUF_PHANTOM.py",
+    "Download_wan2-2_T2V.py",
+    "Download_wan2-2_I2V.py",
+    "Download_models_NSFW.py",
+    "Download_fluxDev_models_FP8.py",
+    "Download_fluxDev_models_GGUF.py"
+]
+
+_loaded_packs = {}
+_state_lock = threading.Lock()
+
+class LockMismatchError(Exception):
+    """Raised when a downloaded file does not match its lockfile size/hash or is truncated."""
+
+# --- Pack loading and plan resolution ---
+def pack_name(script_or_name):
+    """Returns the pack name ("Download_wan2-2_I2V") for a script path or name."""
+    name = os.path.basename(script_or_name)
+    return name[:-3] if name.endswith(".py") else name
+
+def pack_names(selector="all"):
+    """Expands 'all' to every known pack, otherwise returns the single pack name."""
+    if selector == "all":
+        return [pack_name(script) for script in PACK_SCRIPTS]
+    return [pack_name(selector)]
+
+def load_pack(name):
+    """Imports a downloader script as a module (its main() is not executed)."""
+    name = pack_name(name)
+    if name not in _loaded_packs:
+        path = os.path.join(SCRIPT_DIR, name + ".py")
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Unknown pack '{name}' (no {path})")
+        module_name = "pack_" + name.replace("-", "_").replace(".", "_")
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _loaded_packs[name] = module
+    return _loaded_packs[name]
+
+@contextlib.contextmanager
+def _scripted_input(answers):
+    """Feeds menu answers to a pack's input() prompts and hides the menu output."""
+    remaining = list(answers or [])
+
+    def fake_input(prompt=""):
+        if not remaining:
+            raise EOFError(f"No scripted answer left for prompt: {prompt.strip()}")
+        return remaining.pop(0)
+
+    original_input = builtins.input
+    builtins.input = fake_input
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        builtins.input = original_input
+
+def resolve_tasks(module, answers=None):
+    """
+    Resolves the task list a pack would download for the given menu answers.
+
+    Args:
+        module: Pack module returned by load_pack().
+        answers (list): Menu answers in prompt order, e.g. ["1", "1"] for
+            "12GB VRAM, first quant" - the same input runpod-start pipes in.
+
+    Returns:
+        list: Task dictionaries as defined by the pack.
+    """
+    if hasattr(module, "VRAM_OPTIONS"):
+        with _scripted_input(answers):
+            selection = module.get_user_vram_choice()
+        return module.get_download_tasks(*selection)
+    if hasattr(module, "MODEL_TYPES"):
+        with _scripted_input(answers):
+            choice = module.get_user_choice()
+        if choice not in module.MODEL_TYPES:
+            raise ValueError(f"Menu choice '{choice}' does not select a model type")
+        return module.get_download_tasks(module.MODEL_TYPES[choice][0])
+    return list(module.DOWNLOAD_TASKS)
+
+def iter_variants(module):
+    """Yields (variant_name, tasks) for every selectable variant of a pack."""
+    if hasattr(module, "VRAM_OPTIONS"):
+        for vram, models in module.VRAM_OPTIONS.items():
+            for model in models:
+                args = [model["filename"]]
+                if "fill_filename" in model:
+                    args.append(model["fill_filename"])
+                args.append(model["quant"])
+                yield f"{vram}/{model['quant']}", module.get_download_tasks(*args)
+    elif hasattr(module, "MODEL_TYPES"):
+        for model_type, _ in module.MODEL_TYPES.values():
+            yield model_type, module.get_download_tasks(model_type)
+    else:
+        yield "default", list(module.DOWNLOAD_TASKS)
+
+def repo_key(repo_id, repo_type=None):
+    """Lockfile key for a hub repo, e.g. 'dataset:simwalo/FluxDevFP8'."""
+    return f"{repo_type or 'model'}:{repo_id}"
+
+def task_path(task):
+    """Final on-disk path of a task's file (hf_hub_download keeps repo subfolders)."""
+    return os.path.join(task["local_dir"], task.get("rename_to") or task["filename"])
+
+# --- Lockfiles ---
+def lock_path(name):
+    """Path of the lockfile for a pack."""
+    return os.path.join(LOCK_DIR, pack_name(name) + ".lock.json")
+
+def load_lock(script_or_name):
+    """Loads a pack's lockfile; packs without one (or with locks disabled) get an empty lock."""
+    path = lock_path(script_or_name)
+    if IGNORE_LOCK or not os.path.isfile(path):
+        return {"pack": pack_name(script_or_name), "repos": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def locked_revision(lock, repo_id, repo_type=None):
+    """Returns the pinned commit SHA for a repo, or None to follow 'main'."""
+    if not lock:
+        return None
+    return lock.get("repos", {}).get(repo_key(repo_id, repo_type), {}).get("revision")
+
+def locked_file(lock, repo_id, filename, repo_type=None):
+    """Returns the recorded {size, sha256} for a repo file, or None."""
+    if not lock:
+        return None
+    return lock.get("repos", {}).get(repo_key(repo_id, repo_type), {}).get("files", {}).get(filename)
+
+def _lfs_sha256(sibling):
+    """Extracts the LFS sha256 from a repo sibling (dict or object, depending on hub version)."""
+    lfs = getattr(sibling, "lfs", None)
+    if lfs is None:
+        return None
+    if isinstance(lfs, dict):
+        return lfs.get("sha256")
+    return getattr(lfs, "sha256", None)
+
+def fetch_repo_files(repo_id, repo_type, filenames, revision=None):
+    """
+    Queries the hub for a repo's current commit and the size/sha256 of some of its files.
+
+    Returns:
+        dict: {"revision": commit_sha, "files": {filename: {size, sha256, blob_id}}}
+    """
+    from huggingface_hub import HfApi
+
+    info = HfApi().repo_info(repo_id, repo_type=repo_type, revision=revision, files_metadata=True)
+    siblings = {s.rfilename: s for s in info.siblings or []}
+    files = {}
+    for filename in sorted(filenames):
+        sibling = siblings.get(filename)
+        if sibling is None:
+            print(f"⚠️  {filename} not found in {repo_key(repo_id, repo_type)}@{info.sha[:12]}", file=sys.stderr)
+            continue
+        files[filename] = {
+            "size": sibling.size,
+            "sha256": _lfs_sha256(sibling),
+            "blob_id": getattr(sibling, "blob_id", None)
+        }
+    return {"revision": info.sha, "files": files}
+
+def build_lock(name):
+    """
+    Queries the hub for every repo referenced by any variant of a pack.
+
+    Returns:
+        dict: Lock data with one pinned commit per repo and size/sha256 per file.
+    """
+    module = load_pack(name)
+    wanted = {}
+    for _, tasks in iter_variants(module):
+        for task in tasks:
+            key = repo_key(task["repo_id"], task.get("repo_type"))
+            wanted.setdefault(key, (task["repo_id"], task.get("repo_type"), set()))[2].add(task["filename"])
+
+    previous = load_lock(name)
+    repos = {}
+    for key, (repo_id, repo_type, filenames) in sorted(wanted.items()):
+        print(f"🔒 Resolving {key} ({len(filenames)} file(s))...")
+        repos[key] = fetch_repo_files(repo_id, repo_type, filenames)
+        # Keep per-chunk hashes (model_peers.py chunks) for files whose content did not change
+        for filename, info in repos[key]["files"].items():
+            old = locked_file(previous, repo_id, filename, repo_type)
+            if old and old.get("chunks") and old.get("sha256") == info.get("sha256"):
+                info["chunk_size"], info["chunks"] = old["chunk_size"], old["chunks"]
+
+    return {
+        "pack": pack_name(name),
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "repos": repos
+    }
+
+def write_lock(name, lock):
+    """Writes a pack's lockfile atomically."""
+    os.makedirs(LOCK_DIR, exist_ok=True)
+    path = lock_path(name)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(lock, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, path)
+    return path
+
+def sha256_file(path):
+    """Streams a file through sha256 and returns the hex digest."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def check_file(path, expected, full_hash=False):
+    """
+    Compares a local file against its lock entry and checks its header.
+
+    Returns:
+        str: None if the file matches, otherwise a short reason.
+    """
+    if not os.path.isfile(path):
+        return "missing"
+    if expected and expected.get("size") is not None and os.path.getsize(path) != expected["size"]:
+        return f"size {os.path.getsize(path)} != locked {expected['size']}"
+    # Header check (model_formats.py) catches truncated files even without a lock entry
+    truncated = header_problem(path)
+    if truncated:
+        return TRUNCATED + truncated
+    if not expected:
+        return None
+    if full_hash and expected.get("sha256") and sha256_file(path) != expected["sha256"]:
+        return "sha256 mismatch"
+    return None
+
+def header_problem(path):
+    """
+    Reads a model file's header (model_formats.py).
+
+    Returns:
+        str: Why the file is truncated, None otherwise. Other findings (a header
+            that breaks a stricter rule, read errors) are only printed: they do
+            not prove the download incomplete.
+    """
+    try:
+        model_formats.summarize(path)
+    except model_formats.TruncatedError as e:
+        return str(e)
+    except model_formats.FormatError as e:
+        print(f"⚠️  {path}: header check failed ({e}), keeping the file")
+    return None
+
+def intact(path):
+    """
+    Existence check for files already on disk that also reads the model header.
+
+    A truncated file is removed so the next download fetches it again
+    (hf_hub_download would otherwise trust its local metadata).
+
+    Returns:
+        bool: True if the file exists and is not truncated.
+    """
+    if not os.path.isfile(path):
+        return False
+    truncated = header_problem(path)
+    if not truncated:
+        return True
+    print(f"⚠️  {path} is truncated ({truncated}), downloading it again")
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+    return False
+
+# --- Install state ---
+def resolve_models_dir():
+    """Same lookup as the downloaders' _resolve_models_dir()."""
+    env_dir = os.environ.get("COMFY_MODELS_DIR")
+    if env_dir:
+        return env_dir
+    for base in ("/Workspace/ComfyUI/models", "/workspace/ComfyUI/models"):
+        try:
+            os.makedirs(base, exist_ok=True)
+            return base
+        except Exception:
+            continue
+    fallback = os.path.join(os.getcwd(), "ComfyUI", "models")
+    os.makedirs(fallback, exist_ok=True)
+    return fallback
+
+def state_path():
+    """Location of the install-state record (one per models directory)."""
+    return os.environ.get("PIXELAI_STATE_FILE") or os.path.join(resolve_models_dir(), STATE_FILE_NAME)
+
+@contextlib.contextmanager
+def locked_state():
+    """
+    Loads the install state under an exclusive lock and saves it on exit.
+
+    Downloader threads and concurrently running packs all update the same
+    file, so the read-modify-write is serialised with a thread lock plus flock.
+    """
+    path = state_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with _state_lock, open(path + ".lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            state = load_state(path)
+            yield state
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=2, sort_keys=True)
+                f.write("\n")
+            os.replace(tmp_path, path)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def load_state(path=None):
+    """Reads the install state ({"files": {...}, "packs": {...}}); missing file = empty state."""
+    path = path or state_path()
+    state = {}
+    if os.path.isfile(path):
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    state.setdefault("files", {})
+    state.setdefault("packs", {})
+    return state
+
+def state_key(local_dir, filename):
+    """State entries are keyed by the path hf_hub_download writes to (before any rename)."""
+    return os.path.abspath(os.path.join(local_dir, filename))
+
+def _local_hub_metadata(local_dir, filename):
+    """
+    Reads the commit hash and etag hf_hub_download stores next to local_dir downloads.
+
+    For LFS files the etag is the file's sha256.
+    """
+    meta_path = os.path.join(local_dir, ".cache", "huggingface", "download", filename + ".metadata")
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None, None
+    commit = lines[0].strip() if lines else None
+    etag = lines[1].strip().strip('"') if len(lines) > 1 else None
+    sha256 = etag if etag and len(etag) == 64 else None
+    return commit, sha256
+
+def _model_summary(file_path):
+    """Tensor count, parameters, dtypes and quant type from the file header (None for other formats)."""
+    try:
+        summary = model_formats.summarize(file_path)
+    except model_formats.FormatError:
+        return None
+    if not summary:
+        return None
+    return {k: summary[k] for k in ("format", "tensors", "parameters", "dtypes", "quant", "largest") if k in summary}
+
+def is_recorded(local_dir, filename, file_path):
+    """True when the install state already describes file_path as it is on disk."""
+    entry = load_state()["files"].get(state_key(local_dir, filename))
+    return bool(entry) and not entry.get("evicted") \
+        and entry.get("path") == os.path.abspath(file_path) \
+        and os.path.isfile(file_path) and entry.get("size") == os.path.getsize(file_path)
+
+def record_install(pack, repo_id, repo_type, filename, local_dir, file_path, revision=None, expected=None):
+    """Records a finished download in the install state."""
+    local_revision, local_sha256 = _local_hub_metadata(local_dir, filename)
+    expected = expected or {}
+    key = state_key(local_dir, filename)
+    entry = {
+        "pack": pack,
+        "repo": repo_key(repo_id, repo_type),
+        "filename": filename,
+        "path": os.path.abspath(file_path),
+        "revision": revision or local_revision,
+        "size": os.path.getsize(file_path) if os.path.isfile(file_path) else expected.get("size"),
+        "sha256": expected.get("sha256") or local_sha256,
+        "model": _model_summary(file_path),
+        "installed_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    }
+    with locked_state() as state:
+        if state["files"].get(key, {}).get("pinned"):
+            entry["pinned"] = True  # A re-download keeps the file out of eviction (model_store.py pin)
+        state["files"][key] = entry
+        if pack:
+            pack_state = state["packs"].setdefault(pack, {"files": []})
+            if key not in pack_state["files"]:
+                pack_state["files"].append(key)
+            pack_state["updated_at"] = entry["installed_at"]
+    return entry
+
+# --- Download entry point used by the Download_*.py scripts ---
+def download_jobs(default, limit=None):
+    """
+    Parallel downloads for a pack: tuned from this region's throughput history, else the pack's default.
+
+    Packs whose default is a hard limit (large files, disk or memory pressure) pass it as limit too.
+    """
+    return model_telemetry.concurrency(default, limit=limit)
+
+def hub_download(repo_id, filename, repo_type=None, lock=None, rename_to=None, **kwargs):
+    """
+    hf_hub_download() pinned to the lockfile revision, with post-download checks.
+
+    New files are fetched in chunks from PIXELAI_PEERS (see model_peers.py) or
+    from the PIXELAI_MIRRORS LAN mirrors (see model_mirror.py) first when set;
+    the hub is the fallback.
+
+    Args:
+        repo_id (str): Hugging Face repository ID.
+        filename (str): File path inside the repository.
+        repo_type (str): Type of repository ('dataset', 'model', etc.).
+        lock (dict): Pack lock from load_lock(); None follows 'main'.
+        rename_to (str): New file name in local_dir, applied before the install is recorded.
+        **kwargs: Passed through to hf_hub_download (local_dir, ...).
+
+    Returns:
+        str: Local path of the downloaded (and renamed) file.
+    """
+    from huggingface_hub import hf_hub_download
+
+    revision = locked_revision(lock, repo_id, repo_type)
+    expected = locked_file(lock, repo_id, filename, repo_type)
+    from_lock = expected is not None
+    local_dir = kwargs.get("local_dir")
+    is_new = not (local_dir and intact(os.path.join(local_dir, filename)))
+    downloading = is_new or bool(kwargs.get("force_download"))
+    progress = model_progress.FileProgress((lock or {}).get("pack"), local_dir, filename, (expected or {}).get("size"),
+                                           present=not downloading)
+    measurement = model_telemetry.Measurement()
+    reserved = 0
+    try:
+        if os.environ.get("PIXELAI_MODELS_QUOTA_GB") and is_new:
+            import model_store
+            reserved = model_store.make_room_for(repo_id, filename, repo_type, revision, (expected or {}).get("size"))
+        file_path = None
+        source, host, segments = "hub", model_telemetry.hub_host(), None
+        if os.environ.get("PIXELAI_PEERS") and local_dir and is_new:
+            import model_peers
+            try:
+                file_path = model_peers.download(repo_id, filename, repo_type, revision, local_dir, expected)
+                if file_path:
+                    source, host, segments = "peer", "peers", model_peers.chunk_jobs()
+            except Exception as e:
+                print(f"⚠️  Peer download of {filename} failed ({e}), falling back")
+        if not file_path and os.environ.get("PIXELAI_MIRRORS") and local_dir and downloading:
+            import model_mirror
+            file_path, info = model_mirror.fetch(repo_id, filename, repo_type, revision, local_dir, expected)
+            if file_path:
+                source, host = "mirror", info["mirror"]
+                revision = revision or info["revision"]
+                expected = expected or {"size": info["size"], "sha256": info["sha256"]}
+        if not file_path:
+            file_path = hf_hub_download(
+                repo_id=repo_id,
+                filename=filename,
+                repo_type=repo_type,
+                revision=revision,
+                **progress.download_kwargs(hf_hub_download),
+                **kwargs
+            )
+    except Exception as e:
+        measurement.cancel()
+        progress.failed(f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        if reserved:
+            model_store.release(reserved)
+    if downloading:
+        # Throughput history for mirror order, concurrency and segment count (model_telemetry.py)
+        measurement.finish(source, host, os.path.getsize(file_path) if os.path.isfile(file_path) else None, segments)
+    else:
+        measurement.cancel()
+    problem = check_file(file_path, expected, full_hash=VERIFY_HASHES)
+    if problem:
+        if problem.startswith(TRUNCATED):
+            message = f"'{filename}' from '{repo_id}' failed its header check: {problem[len(TRUNCATED):]}"
+        elif from_lock:
+            message = f"'{filename}' from '{repo_id}' does not match lockfile: {problem}"
+        else:
+            message = f"'{filename}' from '{repo_id}' failed verification: {problem}"
+        progress.failed(f"verification failed: {message}")  # Prefix read by docker/boot_metrics.py
+        raise LockMismatchError(message)
+    if rename_to and local_dir and os.path.basename(file_path) != rename_to:
+        # Renamed before recording, so the install state points at the file loaders actually use
+        new_path = os.path.join(local_dir, rename_to)
+        os.replace(file_path, new_path)
+        file_path = new_path
+    progress.verified(file_path, source)
+    if local_dir and (downloading or not is_recorded(local_dir, filename, file_path)):
+        # Re-recording a present file would reset installed_at, which orders eviction (model_store.py)
+        record_install((lock or {}).get("pack"), repo_id, repo_type, filename, local_dir,
+                       file_path, revision, expected)
+    return file_path
+
+def install_task(task, lock=None, force=False):
+    """
+    Downloads one pack task, applying rename_to / extract_and_delete like the packs do.
+
+    Returns:
+        str: Final path of the installed file (the ZIP path for extracted archives).
+    """
+    local_dir = task["local_dir"]
+    os.makedirs(local_dir, exist_ok=True)
+    file_path = hub_download(
+        repo_id=task["repo_id"],
+        filename=task["filename"],
+        repo_type=task.get("repo_type"),
+        lock=lock,
+        rename_to=task.get("rename_to"),
+        local_dir=local_dir,
+        force_download=force
+    )
+    if task.get("extract_and_delete") and task["filename"].lower().endswith(".zip"):
+        with zipfile.ZipFile(file_path, "r") as zip_ref:
+            zip_ref.extractall(local_dir)
+            model_progress.extracted((lock or {}).get("pack"), local_dir, task["filename"], len(zip_ref.namelist()))
+        os.remove(file_path)
+    return file_path
+
+# --- Incremental updates ---
+def _same_content(recorded, desired):
+    """True if an install-state entry matches the desired lock/hub entry."""
+    if recorded.get("sha256") and desired.get("sha256"):
+        return recorded["sha256"] == desired["sha256"]
+    if desired.get("size") is not None and recorded.get("size") != desired["size"]:
+        return False
+    if recorded.get("revision") and desired.get("revision"):
+        return recorded["revision"] == desired["revision"]
+    return True
+
+def diff_plan(name, tasks, lock, state, check_upstream=True):
+    """
+    Compares a resolved plan with the install state.
+
+    Files are compared by content identity (sha256 when both sides know it,
+    otherwise size and revision), so a repo commit that leaves a file's bytes
+    unchanged does not trigger a re-download.
+
+    Unpinned files whose repo was not queried (offline, or the hub query failed)
+    are compared by presence only and reported as "upstream not checked".
+
+    Returns:
+        dict: {"added": [...], "changed": [...], "unchanged": [...], "superseded": [keys]}
+            where the first three hold (task, reason) pairs.
+    """
+    desired = {}
+    unpinned = {}
+    for task in tasks:
+        entry = dict(locked_file(lock, task["repo_id"], task["filename"], task.get("repo_type")) or {})
+        if entry:
+            entry["revision"] = locked_revision(lock, task["repo_id"], task.get("repo_type"))
+        else:
+            key = repo_key(task["repo_id"], task.get("repo_type"))
+            unpinned.setdefault(key, (task["repo_id"], task.get("repo_type"), []))[2].append(task)
+        desired[state_key(task["local_dir"], task["filename"])] = entry
+
+    unchecked = set()
+    for key, (repo_id, repo_type, repo_tasks) in unpinned.items():
+        info = None
+        if check_upstream:
+            try:
+                info = fetch_repo_files(repo_id, repo_type, {t["filename"] for t in repo_tasks})
+            except Exception as e:  # HfHubHTTPError, OSError, or httpx errors on newer huggingface_hub
+                print(f"⚠️  Could not check {key} upstream ({type(e).__name__}: {e})", file=sys.stderr)
+        if info is None:
+            unchecked.update(state_key(t["local_dir"], t["filename"]) for t in repo_tasks)
+        else:
+            for task in repo_tasks:
+                entry = dict(info["files"].get(task["filename"], {}))
+                entry["revision"] = info["revision"]
+                desired[state_key(task["local_dir"], task["filename"])] = entry
+
+    result = {"added": [], "changed": [], "unchanged": [], "superseded": []}
+    for task in tasks:
+        key = state_key(task["local_dir"], task["filename"])
+        recorded = state["files"].get(key)
+        extracted = task.get("extract_and_delete")
+        if recorded is None:
+            on_disk = not extracted and os.path.isfile(task_path(task))
+            if on_disk and _same_content({"size": os.path.getsize(task_path(task))}, desired[key]):
+                result["unchanged"].append((task, "present, not yet recorded"))
+            else:
+                result["added"].append((task, "not installed"))
+        elif not extracted and not os.path.isfile(task_path(task)):
+            result["changed"].append((task, "missing on disk"))
+        elif not _same_content(recorded, desired[key]):
+            result["changed"].append((task, "upstream content changed"))
+        else:
+            result["unchanged"].append((task, "upstream not checked" if key in unchecked else "up to date"))
+
+    planned = {state_key(t["local_dir"], t["filename"]) for t in tasks}
+    previous = state["packs"].get(pack_name(name), {}).get("files", [])
+    result["superseded"] = [key for key in previous if key not in planned]
+    return result
+
+def remove_superseded(name, keys, state):
+    """Deletes superseded files unless another pack still uses them; returns removed paths."""
+    name = pack_name(name)
+    still_used = set()
+    for other, pack_state in state["packs"].items():
+        if other != name:
+            still_used.update(pack_state.get("files", []))
+    removed = []
+    for key in keys:
+        entry = state["files"].get(key, {})
+        if key in still_used:
+            continue
+        path = entry.get("path") or key
+        if os.path.isfile(path):
+            os.remove(path)
+            removed.append(path)
+        state["files"].pop(key, None)
+    pack_state = state["packs"].get(name)
+    if pack_state:
+        pack_state["files"] = [k for k in pack_state["files"] if k not in keys]
+    return removed
+
+# --- CLI ---
+def _parse_answers(value):
+    return [a.strip() for a in value.split(",")] if value else []
+
+def cmd_plan(args):
+    module = load_pack(args.pack)
+    lock = load_lock(args.pack)
+    for task in resolve_tasks(module, _parse_answers(args.answers)):
+        revision = locked_revision(lock, task["repo_id"], task.get("repo_type")) or "main"
+        print(f"{repo_key(task['repo_id'], task.get('repo_type'))}@{revision[:12]}  {task['filename']}  ->  {task_path(task)}")
+    return 0
+
+def cmd_lock(args):
+    for name in pack_names(args.pack):
+        path = write_lock(name, build_lock(name))
+        print(f"✅ Wrote {path}")
+    return 0
+
+def cmd_verify(args):
+    lock = load_lock(args.pack)
+    if not lock.get("repos"):
+        print(f"⚠️  No lockfile for {pack_name(args.pack)}; only checking presence.")
+    failures = 0
+    for task in resolve_tasks(load_pack(args.pack), _parse_answers(args.answers)):
+        path = task_path(task)
+        expected = locked_file(lock, task["repo_id"], task["filename"], task.get("repo_type"))
+        problem = check_file(path, expected, full_hash=args.hash)
+        if problem:
+            failures += 1
+            print(f"❌ {path}: {problem}")
+        else:
+            print(f"✅ {path}")
+    print(f"\n{failures} problem(s) found.")
+    return 1 if failures else 0
+
+def cmd_update(args):
+    name = pack_name(args.pack)
+    answers = _parse_answers(args.answers)
+    lock = load_lock(name)
+    tasks = resolve_tasks(load_pack(name), answers)
+    diff = diff_plan(name, tasks, lock, load_state(), check_upstream=not args.offline)
+
+    print("=" * 80)
+    print(f"📦 Update plan for {name}")
+    print("=" * 80)
+    for label, icon in (("added", "➕"), ("changed", "🔄"), ("unchanged", "✅")):
+        for task, reason in diff[label]:
+            print(f"{icon} {label:<9} {task['filename']} ({reason})")
+    for key in diff["superseded"]:
+        print(f"🗑️  superseded {key}")
+    if args.dry_run:
+        return 0
+
+    work = [(task, label == "changed") for label in ("added", "changed") for task, _ in diff[label]]
+    model_progress.planned(name, tasks, lock)
+    failures = 0
+    with ThreadPoolExecutor(max_workers=args.jobs or download_jobs(MAX_CONCURRENT_DOWNLOADS)) as executor:
+        futures = {executor.submit(install_task, task, lock, force): task for task, force in work}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                print(f"✅ Updated: {future.result()}")
+            except Exception as e:
+                failures += 1
+                print(f"❌ Failed to update '{task['filename']}' from '{task['repo_id']}': {type(e).__name__} - {e}")
+
+    removed = []
+    with locked_state() as state:
+        pack_state = state["packs"].setdefault(name, {"files": []})
+        pack_state["answers"] = answers
+        for task, _ in diff["unchanged"]:
+            key = state_key(task["local_dir"], task["filename"])
+            if key not in state["files"] and os.path.isfile(task_path(task)):
+                state["files"][key] = {
+                    "pack": name,
+                    "repo": repo_key(task["repo_id"], task.get("repo_type")),
+                    "filename": task["filename"],
+                    "path": os.path.abspath(task_path(task)),
+                    "size": os.path.getsize(task_path(task))
+                }
+            if key not in pack_state["files"]:
+                pack_state["files"].append(key)
+        if args.prune:
+            removed = remove_superseded(name, diff["superseded"], state)
+
+    print("\n" + "=" * 80)
+    print(f"➕ Added: {len(diff['added'])}  🔄 Changed: {len(diff['changed'])}  ✅ Unchanged: {len(diff['unchanged'])}")
+    print(f"🗑️  Superseded: {len(diff['superseded'])}  (removed: {len(removed)})")
+    print(f"❌ Failed: {failures}")
+    print("=" * 80)
+    return 1 if failures else 0
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Inspect, lock and verify model packs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("plan", help="Print the resolved task list of a pack")
+    p.add_argument("pack")
+    p.add_argument("--answers", default="", help="Comma separated menu answers, e.g. 1,1")
+    p.set_defaults(func=cmd_plan)
+
+    p = sub.add_parser("lock", help="Pin repo revisions and record file hashes")
+    p.add_argument("pack", help="Pack name or 'all'")
+    p.set_defaults(func=cmd_lock)
+
+    p = sub.add_parser("verify", help="Check installed files against the lockfile")
+    p.add_argument("pack")
+    p.add_argument("--answers", default="", help="Comma separated menu answers, e.g. 1,1")
+    p.add_argument("--hash", action="store_true", help="Also compare full sha256 (slow)")
+    p.set_defaults(func=cmd_verify)
+
+    p = sub.add_parser("update", help="Download only files that were added or changed since the last install")
+    p.add_argument("pack")
+    p.add_argument("--answers", default="", help="Comma separated menu answers, e.g. 1,1")
+    p.add_argument("--prune", action="store_true", help="Delete files the pack no longer uses")
+    p.add_argument("--dry-run", action="store_true", help="Only print the update plan")
+    p.add_argument("--offline", action="store_true", help="Do not query the hub for unpinned repos")
+    p.add_argument("--jobs", type=int, help="Parallel downloads (default: tuned from throughput history)")
+    p.set_defaults(func=cmd_update)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""
+Peer-assisted chunked downloads for a trusted fleet of pods.
+
+When many pods boot at once they all pull the same files from the hub. With
+PIXELAI_PEERS set, model_packs.hub_download splits each locked file into
+fixed-size chunks, asks the peers (their model_mirror.py servers) which chunks
+they already hold, fetches those from the peers and only the rest from the
+hub. Hub chunks are fetched in a random order so that pods starting together
+end up holding different chunks and can trade them.
+
+Chunks are identified by the file's sha256 from the pack lockfile. Per-chunk
+hashes come from the lockfile too, once they are added with the "chunks"
+command on a pod that has the files; without them only the whole file is
+verified at the end (and re-fetched from the hub if it does not match).
+
+Every pod runs the peer server as part of the mirror:
+    PIXELAI_MIRROR_SERVE=1 PIXELAI_PEERS=http://10.0.0.5:8090,http://10.0.0.6:8090 runpod-start
+
+Usage:
+    python3 model_peers.py chunks Download_wan2-2_I2V     (add chunk hashes to the lockfile)
+    python3 model_peers.py status http://10.0.0.5:8090 <sha256>
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import model_packs
+import model_telemetry
+
+CHUNK_SIZE = 64 * 1024 * 1024
+PROGRESS_DIR_NAME = ".pixelai_chunks"
+MAX_CONCURRENT_CHUNKS = 8
+AVAILABILITY_TTL = 5  # Seconds before peers are asked again which chunks they hold
+MAX_CONCURRENT_QUERIES = 16  # Peers asked at once for their chunks
+TIMEOUT = float(os.environ.get("PIXELAI_PEER_TIMEOUT", "15"))
+QUERY_TIMEOUT = float(os.environ.get("PIXELAI_PEER_QUERY_TIMEOUT", "2"))  # Chunk list requests are tiny
+
+# --- Chunk layout and local progress ---
+def chunk_count(size, chunk_size=CHUNK_SIZE):
+    return max(1, -(-size // chunk_size))
+
+def chunk_range(index, size, chunk_size=CHUNK_SIZE):
+    """Inclusive byte range of a chunk."""
+    start = index * chunk_size
+    return start, min(size, start + chunk_size) - 1
+
+def chunk_hashes(path, chunk_size=CHUNK_SIZE):
+    """sha256 of every chunk of a file."""
+    hashes = []
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hashes.append(hashlib.sha256(chunk).hexdigest())
+    return hashes
+
+def progress_path(sha256, models_dir=None):
+    """Sidecar recording which chunks of an in-progress download are on disk."""
+    models_dir = models_dir or model_packs.resolve_models_dir()
+    return os.path.join(models_dir, PROGRESS_DIR_NAME, sha256 + ".json")
+
+def load_progress(sha256, models_dir=None):
+    try:
+        with open(progress_path(sha256, models_dir), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_progress(sha256, progress):
+    path = progress_path(sha256)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(progress, f)
+    os.replace(tmp_path, path)
+
+def chunk_jobs():
+    """Chunks fetched at once: tuned from this region's peer throughput history."""
+    return model_telemetry.segments(MAX_CONCURRENT_CHUNKS)
+
+# --- Peers ---
+def peer_urls():
+    """Peers from PIXELAI_PEERS (comma or space separated)."""
+    return [u.strip().rstrip("/") for u in re.split(r"[,\s]+", os.environ.get("PIXELAI_PEERS", "")) if u.strip()]
+
+def query_peer(peer_url, sha256, timeout=QUERY_TIMEOUT):
+    """
+    Asks a peer which chunks of a file it holds; raises OSError if the peer is unreachable.
+
+    Returns:
+        set: Chunk indices, or None if the peer does not have the file.
+    """
+    try:
+        with urllib.request.urlopen(f"{peer_url}/.pixelai/chunks/{sha256}", timeout=timeout) as response:
+            info = json.load(response)
+    except (urllib.error.HTTPError, ValueError):
+        return None
+    if info.get("chunk_size") != CHUNK_SIZE:
+        return None
+    return set(info.get("have", []))
+
+def read_range(url, start, end, headers=None):
+    """GETs an inclusive byte range and returns the bytes."""
+    request = urllib.request.Request(url, headers={**(headers or {}), "Range": f"bytes={start}-{end}"})
+    with urllib.request.urlopen(request, timeout=TIMEOUT) as response:
+        if response.status != 206 and start:
+            raise OSError(f"{url} ignored the Range header")
+        data = response.read(end - start + 1)
+    if len(data) != end - start + 1:
+        raise OSError(f"short read from {url}: {len(data)} of {end - start + 1} bytes")
+    return data
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+def origin_url(repo_id, filename, repo_type=None, revision=None):
+    """
+    Resolves the hub URL of a file to its final CDN location.
+
+    The hub answers with a redirect to a signed URL; following it manually keeps
+    the auth token from being sent to the CDN host.
+
+    Returns:
+        tuple: (url, headers) to use for range requests.
+    """
+    from huggingface_hub import hf_hub_url
+    from huggingface_hub.utils import build_hf_headers
+
+    url = hf_hub_url(repo_id, filename, repo_type=repo_type, revision=revision)
+    headers = build_hf_headers()
+    opener = urllib.request.build_opener(_NoRedirect)
+    for _ in range(5):
+        try:
+            with opener.open(urllib.request.Request(url, headers=headers, method="HEAD"), timeout=TIMEOUT):
+                return url, headers
+        except urllib.error.HTTPError as e:
+            if e.code not in (301, 302, 303, 307, 308):
+                raise
+            location = urllib.parse.urljoin(url, e.headers["Location"])
+        if urllib.parse.urlsplit(location).netloc != urllib.parse.urlsplit(url).netloc:
+            headers = {}
+        url = location
+    raise OSError(f"too many redirects for {filename}")
+
+# --- Chunked download ---
+class ChunkedDownload:
+    """One file assembled from peer and hub chunks into dest + '.part'."""
+
+    def __init__(self, repo_id, filename, repo_type, revision, local_dir, expected):
+        self.repo_id, self.filename, self.repo_type, self.revision = repo_id, filename, repo_type, revision
+        self.dest = os.path.join(local_dir, filename)
+        self.part_path = self.dest + ".part"
+        self.size = expected["size"]
+        self.sha256 = expected["sha256"]
+        self.hashes = expected.get("chunks") if expected.get("chunk_size") == CHUNK_SIZE else None
+        self.peers = peer_urls()
+        self.from_peers = 0
+        self.from_origin = 0
+        self._origin = None
+        self._availability = {}
+        self._checked_at = 0
+        self._refreshing = False
+        self._dead = set()
+        self._lock = threading.Lock()
+
+        progress = load_progress(self.sha256)
+        if not (progress and progress.get("path") == self.part_path and os.path.isfile(self.part_path)):
+            progress = None
+        self.have = set(progress["have"]) if progress else set()
+        os.makedirs(os.path.dirname(self.dest), exist_ok=True)
+        with open(self.part_path, "r+b" if progress else "wb") as f:
+            f.truncate(self.size)
+
+    def _save(self):
+        save_progress(self.sha256, {
+            "path": self.part_path,
+            "size": self.size,
+            "chunk_size": CHUNK_SIZE,
+            "have": sorted(self.have)
+        })
+
+    def _mark_dead(self, peer, error):
+        """Stops asking an unreachable peer for the rest of this download."""
+        with self._lock:
+            if peer in self._dead:
+                return
+            self._dead.add(peer)
+            self._availability.pop(peer, None)
+        print(f"⚠️  Peer {peer} unreachable ({error}), skipping it for {self.filename}")
+
+    def _refresh(self):
+        """Asks every live peer for its chunks, all at once and without holding the lock."""
+        with self._lock:
+            peers = [peer for peer in self.peers if peer not in self._dead]
+        availability = {}
+        try:
+            if peers:
+                with ThreadPoolExecutor(max_workers=min(len(peers), MAX_CONCURRENT_QUERIES)) as executor:
+                    futures = {executor.submit(query_peer, peer, self.sha256): peer for peer in peers}
+                    for future in as_completed(futures):
+                        peer = futures[future]
+                        try:
+                            availability[peer] = future.result()
+                        except OSError as e:
+                            self._mark_dead(peer, e)
+        finally:
+            with self._lock:
+                self._availability = {peer: have for peer, have in availability.items() if peer not in self._dead}
+                self._checked_at = time.time()
+                self._refreshing = False
+
+    def _holders(self, index):
+        """
+        Peers currently holding a chunk.
+
+        Availability is cached for a few seconds; one worker refreshes it while
+        the others keep using the previous answers.
+        """
+        with self._lock:
+            refresh = not self._refreshing and time.time() - self._checked_at > AVAILABILITY_TTL
+            if refresh:
+                self._refreshing = True
+        if refresh:
+            self._refresh()
+        with self._lock:
+            holders = [peer for peer, have in self._availability.items() if have and index in have]
+        random.shuffle(holders)
+        return holders
+
+    def _origin_read(self, start, end):
+        with self._lock:
+            if self._origin is None:
+                self._origin = origin_url(self.repo_id, self.filename, self.repo_type, self.revision)
+        url, headers = self._origin
+        return read_range(url, start, end, headers)
+
+    def _valid(self, index, data):
+        return not self.hashes or hashlib.sha256(data).hexdigest() == self.hashes[index]
+
+    def fetch_chunk(self, index):
+        start, end = chunk_range(index, self.size)
+        data = None
+        for peer in self._holders(index):
+            try:
+                data = read_range(f"{peer}/.pixelai/blob/{self.sha256}", start, end)
+            except urllib.error.HTTPError:
+                continue
+            except OSError as e:
+                self._mark_dead(peer, e)
+                continue
+            if self._valid(index, data):
+                source = "peer"
+                break
+            print(f"⚠️  Chunk {index} of {self.filename} from {peer} failed its hash, ignoring")
+            data = None
+        if data is None:
+            data = self._origin_read(start, end)
+            if not self._valid(index, data):
+                raise model_packs.LockMismatchError(f"chunk {index} of {self.filename} from the hub failed its hash")
+            source = "origin"
+        fd = os.open(self.part_path, os.O_WRONLY)
+        try:
+            os.pwrite(fd, data, start)
+        finally:
+            os.close(fd)
+        with self._lock:
+            self.have.add(index)
+            if source == "peer":
+                self.from_peers += len(data)
+            else:
+                self.from_origin += len(data)
+            self._save()
+
+    def run(self, jobs=MAX_CONCURRENT_CHUNKS):
+        missing = [i for i in range(chunk_count(self.size)) if i not in self.have]
+        random.shuffle(missing)
+        self._save()
+        self._refresh()  # Before the workers start, so the first chunks are not all taken from the hub
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(self.fetch_chunk, i) for i in missing]
+            for future in as_completed(futures):
+                future.result()
+
+        if model_packs.sha256_file(self.part_path) != self.sha256:
+            os.remove(self.part_path)
+            os.remove(progress_path(self.sha256))
+            raise model_packs.LockMismatchError(f"{self.filename} assembled from chunks failed its sha256")
+        os.replace(self.part_path, self.dest)
+        os.remove(progress_path(self.sha256))
+        return self.dest
+
+def download(repo_id, filename, repo_type=None, revision=None, local_dir=None, expected=None):
+    """
+    Chunked peer download used by model_packs.hub_download.
+
+    Returns:
+        str: Local path, or None when the file has no locked size/sha256 to share chunks by.
+    """
+    if not expected or not expected.get("sha256") or expected.get("size") is None:
+        return None
+    import model_mirror
+
+    job = ChunkedDownload(repo_id, filename, repo_type, revision, local_dir, expected)
+    path = job.run(chunk_jobs())
+    model_mirror.write_hub_metadata(local_dir, filename, revision or "main", job.sha256)
+    gb = 1024 ** 3
+    print(f"🤝 {filename}: {job.from_peers / gb:.2f} GB from peers, {job.from_origin / gb:.2f} GB from the hub")
+    return path
+
+# --- CLI ---
+def cmd_chunks(args):
+    """Adds per-chunk sha256 lists to a pack lockfile from the files installed here."""
+    lock = model_packs.load_lock(args.pack)
+    if not lock["repos"]:
+        print(f"❌ No lockfile for {args.pack}; run 'model_packs.py lock {args.pack}' first")
+        return 1
+    by_sha = {}
+    for entry in model_packs.load_state()["files"].values():
+        if entry.get("sha256") and os.path.isfile(entry.get("path", "")):
+            by_sha[entry["sha256"]] = entry["path"]
+    added = 0
+    for key, repo in sorted(lock["repos"].items()):
+        for filename, info in sorted(repo["files"].items()):
+            path = by_sha.get(info.get("sha256"))
+            if not path or (info.get("chunk_size") == CHUNK_SIZE and info.get("chunks")):
+                continue
+            print(f"🔍 {key} {filename}")
+            if model_packs.sha256_file(path) != info["sha256"]:
+                print(f"⚠️  {path} does not match the lockfile, skipping")
+                continue
+            info["chunk_size"] = CHUNK_SIZE
+            info["chunks"] = chunk_hashes(path)
+            added += 1
+    model_packs.write_lock(args.pack, lock)
+    print(f"✅ Added chunk hashes for {added} file(s)")
+    return 0
+
+def cmd_status(args):
+    try:
+        have = query_peer(args.url.rstrip("/"), args.sha256, TIMEOUT)
+    except OSError as e:
+        print(f"❌ Peer unreachable: {e}")
+        return 1
+    if have is None:
+        print("❌ Peer does not have this file")
+        return 1
+    print(f"✅ Peer holds {len(have)} chunk(s) of {CHUNK_SIZE // (1024 * 1024)} MB")
+    return 0
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Peer-assisted chunked downloads.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("chunks", help="Add per-chunk hashes to a pack lockfile from installed files")
+    p.add_argument("pack")
+    p.set_defaults(func=cmd_chunks)
+
+    p = sub.add_parser("status", help="Show which chunks of a file a peer holds")
+    p.add_argument("url")
+    p.add_argument("sha256")
+    p.set_defaults(func=cmd_status)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+if __name__ == "__main__":
+    main()
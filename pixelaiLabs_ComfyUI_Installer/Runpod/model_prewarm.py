@@ -0,0 +1,226 @@
+"""
+Page-cache pre-warming of the models a workflow will load.
+
+On a network volume the first UnetLoaderGGUF/CLIPLoaderGGUF load of a 10 GB
+file is I/O bound. Warming resolves the workflow's model files (same lookup
+as model_store.py), hints the kernel with posix_fadvise(WILLNEED) and then
+reads every file in large sequential segments from several threads, so the
+bytes are in the page cache by the time ComfyUI opens the file.
+
+Files are taken in workflow order while they fit into available memory
+(MemAvailable, or the container's cgroup limit when lower) minus a reserve;
+a file that does not fit is skipped, since reading it would only evict the
+ones before it. --mode fadvise only sends the hints and returns at once.
+
+Environment:
+    PIXELAI_PREWARM_WORKFLOW   Workflow runpod-start warms in the background while ComfyUI starts
+                               (absolute, or relative to the workspace)
+
+Usage:
+    python3 model_prewarm.py plan ../../Workflows/GGUF/7.6_Wan22_I2V_Lightning_GGUF.json
+    python3 model_prewarm.py warm ../../Workflows/GGUF/7.6_Wan22_I2V_Lightning_GGUF.json [--jobs 4]
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import model_packs
+import model_store
+import model_tiers
+
+GB = 1024 ** 3
+MB = 1024 ** 2
+SEGMENT_SIZE = 256 * MB  # Unit of parallel work within a file
+READ_SIZE = 16 * MB  # Sequential read size
+MEMORY_RESERVE = 2 * GB  # Left for ComfyUI, Python and the model weights themselves
+DEFAULT_JOBS = 4
+
+_buffers = threading.local()
+
+# --- Memory ---
+def _read_int(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            value = f.read().strip()
+        return None if value == "max" else int(value)
+    except (OSError, ValueError):
+        return None
+
+def available_memory():
+    """Bytes that can hold page cache without pushing out other memory (host or cgroup, whichever is lower)."""
+    available = None
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    available = int(line.split()[1]) * 1024
+                    break
+    except (OSError, ValueError):
+        pass
+    if available is None:
+        available = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    for limit_file, usage_file in (("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),
+                                   ("/sys/fs/cgroup/memory/memory.limit_in_bytes",
+                                    "/sys/fs/cgroup/memory/memory.usage_in_bytes")):
+        limit, usage = _read_int(limit_file), _read_int(usage_file)
+        if limit and usage is not None and limit < 1 << 60:
+            available = min(available, max(0, limit - usage))
+            break
+    return available
+
+# --- Planning ---
+def plan(workflow_path, reserve=MEMORY_RESERVE):
+    """
+    Resolves a workflow's model files and picks the ones that fit into memory.
+
+    Returns:
+        dict: warm [(path, size)], skipped [(path, size, reason)], missing [names], budget (bytes)
+    """
+    found, missing = model_store.workflow_model_files(workflow_path)
+    budget = max(0, available_memory() - reserve)
+    remaining = budget
+    warm, skipped = [], []
+    for path in dict.fromkeys(os.path.abspath(p) for p in found):
+        size = os.path.getsize(path)
+        if size > remaining:
+            reason = "larger than available memory" if size > budget else "no memory left after earlier files"
+            skipped.append((path, size, reason))
+            continue
+        warm.append((path, size))
+        remaining -= size
+    return {"warm": warm, "skipped": skipped, "missing": missing, "budget": budget}
+
+# --- Reading ---
+def _buffer():
+    if not hasattr(_buffers, "data"):
+        _buffers.data = bytearray(READ_SIZE)
+    return _buffers.data
+
+def read_segment(path, offset, length):
+    """Reads one segment sequentially into a reused per-thread buffer; returns bytes read."""
+    buffer = _buffer()
+    done = 0
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        while done < length:
+            view = memoryview(buffer)[:min(READ_SIZE, length - done)]
+            count = os.preadv(fd, [view], offset + done)
+            if count <= 0:
+                break
+            done += count
+    finally:
+        os.close(fd)
+    return done
+
+def advise(path):
+    """Asks the kernel to start reading the whole file (no-op where fadvise is unsupported)."""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def warm(files, jobs=DEFAULT_JOBS, mode="read"):
+    """
+    Pulls files into the page cache.
+
+    Args:
+        files (list): (path, size) pairs, in the order they should become ready.
+        jobs (int): Parallel segment reads.
+        mode (str): 'read' (fadvise, then read) or 'fadvise' (hints only).
+
+    Returns:
+        dict: bytes, seconds and {path: seconds until the file was fully read}.
+    """
+    start_time = time.time()
+    for path, _ in files:
+        advise(path)
+    if mode == "fadvise":
+        return {"bytes": 0, "seconds": time.time() - start_time, "files": {}}
+
+    pending = {}
+    finished = {}
+    total = 0
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {}
+        for path, size in files:
+            segments = [(offset, min(SEGMENT_SIZE, size - offset)) for offset in range(0, size, SEGMENT_SIZE)]
+            pending[path] = len(segments)
+            for offset, length in segments:
+                futures[executor.submit(read_segment, path, offset, length)] = path
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                total += future.result()
+            except OSError as e:
+                print(f"⚠️  Reading {path} failed: {e}")
+            pending[path] -= 1
+            if not pending[path]:
+                finished[path] = time.time() - start_time
+    return {"bytes": total, "seconds": time.time() - start_time, "files": finished}
+
+# --- CLI ---
+def _print_plan(result):
+    print(f"🧠 Page-cache budget: {result['budget'] / GB:.1f} GB")
+    for path, size in result["warm"]:
+        print(f"  🔥 {size / GB:6.2f} GB  {path}")
+    for path, size, reason in result["skipped"]:
+        print(f"  ⏭️  {size / GB:6.2f} GB  {path} ({reason})")
+    for name in result["missing"]:
+        print(f"  ❓ {name} (not found under {model_packs.resolve_models_dir()})")
+
+def cmd_plan(args):
+    _print_plan(plan(args.workflow, int(args.reserve_gb * GB)))
+    return 0
+
+def cmd_warm(args):
+    result = plan(args.workflow, int(args.reserve_gb * GB))
+    _print_plan(result)
+    if not result["warm"]:
+        print("Nothing to warm.")
+        return 0
+    # Warming means the workflow is about to run: keep its files out of LRU eviction
+    # and count the use for storage tiering (model_tiers.py)
+    model_store.touch(path for path, _ in result["warm"])
+    model_tiers.record_use(path for path, _ in result["warm"])
+    stats = warm(result["warm"], jobs=args.jobs, mode=args.mode)
+    if args.mode == "fadvise":
+        print(f"✅ Read-ahead requested for {len(result['warm'])} file(s)")
+        return 0
+    for path, _ in result["warm"]:
+        if path in stats["files"]:
+            print(f"  ✅ ready after {stats['files'][path]:6.1f}s  {os.path.basename(path)}")
+    rate = stats["bytes"] / stats["seconds"] / MB if stats["seconds"] > 0 else 0
+    print(f"✅ Warmed {stats['bytes'] / GB:.2f} GB in {stats['seconds']:.1f}s ({rate:.0f} MB/s, {args.jobs} streams)")
+    return 0
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Read a workflow's models into the page cache ahead of ComfyUI.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name, func, help_text in (("plan", cmd_plan, "Show which files would be warmed or skipped"),
+                                  ("warm", cmd_warm, "Read the workflow's model files into the page cache")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("workflow", help="Workflow JSON (UI format, e.g. from Workflows/)")
+        p.add_argument("--reserve-gb", type=float, default=MEMORY_RESERVE / GB,
+                       help="Memory to leave free (default: %(default)s)")
+        p.set_defaults(func=func)
+        if name == "warm":
+            p.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="Parallel segment reads")
+            p.add_argument("--mode", choices=("read", "fadvise"), default="read",
+                           help="read: fadvise then read everything (default); fadvise: hints only")
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+if __name__ == "__main__":
+    main()
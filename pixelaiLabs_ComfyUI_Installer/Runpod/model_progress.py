@@ -0,0 +1,374 @@
+"""
+Machine-readable progress events for the model downloaders.
+
+With PIXELAI_PROGRESS set, the packs and model_packs.hub_download emit one JSON
+object per event next to their usual console output: a pack's planned files,
+each file's start, byte progress, verification, extraction and failure (with
+the reason). Events go to a JSON-lines file (appended, so several downloaders
+can share one) or as datagrams to udp://host:port for a fleet dashboard.
+Emitting never raises, so a full disk or an unreachable dashboard cannot fail
+a download.
+
+`watch` folds the events of all packs into one progress bar with ETA, and
+`status --json` prints the same state for scripts and dashboards.
+
+Environment:
+    PIXELAI_PROGRESS            Event destination: a file path or udp://host:port (unset = off)
+    PIXELAI_PROGRESS_INTERVAL   Seconds between byte progress events of one file (default 2)
+
+Events (every event has time, pod, pid, pack, event):
+    planned    tasks: [{key, repo_id, filename, size, present}]
+    started    key, size
+    progress   key, bytes, size
+    verified   key, bytes, source ("hub", "mirror" or "peer")
+    extracted  key, files
+    failed     key, reason
+
+Usage:
+    python3 model_progress.py watch /workspace/.pixelai_boot/progress.jsonl --follow
+    python3 model_progress.py watch udp://0.0.0.0:9911
+    python3 model_progress.py status /workspace/.pixelai_boot/progress.jsonl --json
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import inspect
+import argparse
+import threading
+
+DESTINATION = os.environ.get("PIXELAI_PROGRESS")
+INTERVAL = float(os.environ.get("PIXELAI_PROGRESS_INTERVAL", "2"))
+POD_ID = os.environ.get("RUNPOD_POD_ID") or socket.gethostname()
+BAR_WIDTH = 30
+RATE_WINDOW = 30  # Seconds of progress used for the speed and ETA
+GB = 1024 ** 3
+MB = 1024 ** 2
+
+emit_lock = threading.Lock()
+_udp = {}
+
+def file_key(local_dir, filename):
+    """Identifies a file across events (same as model_packs.state_key)."""
+    return os.path.abspath(os.path.join(local_dir, filename))
+
+# --- Emitting ---
+def _udp_target(destination):
+    host, _, port = destination[len("udp://"):].rpartition(":")
+    return host.strip("[]"), int(port)
+
+def emit(event, pack=None, **fields):
+    """Writes one event; returns False when progress reporting is off or the destination failed."""
+    if not DESTINATION:
+        return False
+    record = {"time": round(time.time(), 3), "pod": POD_ID, "pid": os.getpid(), "pack": pack, "event": event}
+    record.update(fields)
+    line = json.dumps(record) + "\n"
+    try:
+        with emit_lock:
+            if DESTINATION.startswith("udp://"):
+                if "socket" not in _udp:
+                    _udp["socket"] = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                _udp["socket"].sendto(line.encode(), _udp_target(DESTINATION))
+            else:
+                with open(DESTINATION, "a", encoding="utf-8") as f:
+                    f.write(line)
+    except (OSError, ValueError):
+        return False
+    return True
+
+def planned(pack, tasks, lock=None):
+    """Announces the files a pack is about to download (files already on disk count as done)."""
+    import model_packs
+
+    entries = []
+    for task in tasks:
+        locked = model_packs.locked_file(lock, task["repo_id"], task["filename"], task.get("repo_type")) or {}
+        entries.append({
+            "key": file_key(task["local_dir"], task["filename"]),
+            "repo_id": task["repo_id"],
+            "filename": task["filename"],
+            "size": locked.get("size"),
+            "present": os.path.exists(model_packs.task_path(task))
+        })
+    return emit("planned", pack, tasks=entries)
+
+def extracted(pack, local_dir, filename, files):
+    return emit("extracted", pack, key=file_key(local_dir, filename), files=files)
+
+def _reason(reason):
+    """First line of an error (hub errors append a multi-line hint)."""
+    lines = str(reason).strip().splitlines()
+    return lines[0] if lines else ""
+
+def failed(pack, local_dir, filename, reason):
+    return emit("failed", pack, key=file_key(local_dir, filename), reason=_reason(reason))
+
+class FileProgress:
+    """
+    Progress of one file download.
+
+    Byte counts come from the tqdm bar hf_hub_download reports to (see
+    download_kwargs); at most one progress event is sent per INTERVAL. For a
+    file already on disk (present=True) only a failure is reported: nothing
+    is downloaded, and its planned event already counts it as present.
+    """
+
+    def __init__(self, pack, local_dir, filename, size=None, present=False):
+        self.pack = pack
+        self.key = file_key(local_dir or "", filename)
+        self.size = size
+        self.present = present
+        self.bytes = 0
+        self.last_emit = 0.0
+        self.lock = threading.Lock()
+        if not present:
+            emit("started", pack, key=self.key, size=size)
+
+    def add(self, count):
+        if self.present:
+            return
+        with self.lock:
+            self.bytes += count
+            now = time.time()
+            if now - self.last_emit < INTERVAL:
+                return
+            self.last_emit = now
+        emit("progress", self.pack, key=self.key, bytes=self.bytes, size=self.size)
+
+    def verified(self, path, source="hub"):
+        if self.present:
+            return
+        size = os.path.getsize(path) if os.path.isfile(path) else self.bytes
+        emit("verified", self.pack, key=self.key, bytes=size, source=source)
+
+    def failed(self, reason):
+        emit("failed", self.pack, key=self.key, reason=_reason(reason))
+
+    def download_kwargs(self, download_function):
+        """hf_hub_download arguments that route its byte progress here (empty on hub versions without tqdm_class)."""
+        if not DESTINATION or "tqdm_class" not in inspect.signature(download_function).parameters:
+            return {}
+        from huggingface_hub.utils import tqdm as hub_tqdm
+        progress = self
+
+        class ProgressBar(hub_tqdm):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                if kwargs.get("total") and not progress.size:
+                    progress.size = kwargs["total"]
+
+            def update(self, n=1):
+                progress.add(n or 0)
+                return super().update(n)
+
+        return {"tqdm_class": ProgressBar}
+
+# --- Aggregating ---
+def aggregate(events):
+    """
+    Folds events into the state of every planned file.
+
+    Returns:
+        dict: files {key: {pack, size, bytes, status}}, totals and rate (bytes/s).
+    """
+    files = {}
+    samples = []
+    for event in events:
+        kind = event.get("event")
+        if kind == "planned":
+            for task in event.get("tasks", []):
+                entry = files.setdefault(task["key"], {"pack": event.get("pack"), "filename": task["filename"],
+                                                       "size": task.get("size"), "bytes": 0, "status": "pending"})
+                if task.get("present") and entry["status"] == "pending":
+                    entry.update(status="present", bytes=entry["size"] or 0)
+            continue
+        key = event.get("key")
+        if not key:
+            continue
+        entry = files.setdefault(key, {"pack": event.get("pack"), "filename": os.path.basename(key), "size": None,
+                                       "bytes": 0, "status": "pending"})
+        if kind == "started":
+            entry.update(status="downloading", bytes=0)
+            entry["size"] = event.get("size") or entry["size"]
+        elif kind == "progress":
+            entry.update(status="downloading", bytes=event["bytes"])
+            entry["size"] = event.get("size") or entry["size"]
+        elif kind == "verified":
+            entry.update(status="done", bytes=event["bytes"], size=event["bytes"])
+        elif kind == "extracted":
+            entry["status"] = "done"
+        elif kind == "failed":
+            entry.update(status="failed", reason=event.get("reason"))
+        if kind in ("progress", "verified"):
+            samples.append((event["time"], key, entry["bytes"]))
+
+    known = [f["size"] for f in files.values() if f["size"]]
+    average = sum(known) / len(known) if known else 0
+    total = sum(f["size"] or average for f in files.values() if f["status"] != "failed")
+    done = sum(f["bytes"] if f["status"] != "done" else (f["size"] or f["bytes"]) for f in files.values()
+               if f["status"] != "failed")
+    counts = {}
+    for entry in files.values():
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+    return {
+        "pod": next((e.get("pod") for e in events if e.get("pod")), None),
+        "updated_at": events[-1]["time"] if events else None,
+        "files": files,
+        "counts": counts,
+        "bytes_done": int(done),
+        "bytes_total": int(total),
+        "estimated": len(known) < len(files),
+        "rate": _rate(samples)
+    }
+
+def _rate(samples):
+    """Bytes per second over the last RATE_WINDOW seconds of progress samples."""
+    if not samples:
+        return 0.0
+    window_start = samples[-1][0] - RATE_WINDOW
+    first_seen = {}
+    gained = 0
+    for sample_time, key, done in samples:
+        if sample_time < window_start:
+            first_seen[key] = done
+            continue
+        gained += done - first_seen.get(key, 0)
+        first_seen[key] = done
+    start = max(window_start, samples[0][0])
+    elapsed = samples[-1][0] - start
+    return gained / elapsed if elapsed > 0 else 0.0
+
+def format_duration(seconds):
+    if seconds is None:
+        return "--"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s"
+
+def format_bar(state):
+    """One line: bar, percentage, bytes, speed, ETA and file counts."""
+    total = state["bytes_total"]
+    fraction = min(1.0, state["bytes_done"] / total) if total else 0.0
+    filled = int(fraction * BAR_WIDTH)
+    remaining = total - state["bytes_done"]
+    eta = remaining / state["rate"] if state["rate"] > 0 else None
+    counts = state["counts"]
+    finished = counts.get("done", 0) + counts.get("present", 0)
+    line = (f"[{'#' * filled}{'.' * (BAR_WIDTH - filled)}] {fraction * 100:5.1f}%  "
+            f"{state['bytes_done'] / GB:.1f}/{'~' if state['estimated'] else ''}{total / GB:.1f} GB  "
+            f"{state['rate'] / MB:6.1f} MB/s  ETA {format_duration(eta)}  "
+            f"files {finished}/{len(state['files'])}")
+    if counts.get("failed"):
+        line += f"  ({counts['failed']} failed)"
+    return line
+
+def is_busy(state):
+    return any(f["status"] in ("pending", "downloading") for f in state["files"].values())
+
+# --- Reading events ---
+def read_file(path, offset=0):
+    """Events appended to path since offset. Returns (events, new offset)."""
+    events = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            f.seek(offset)
+            while True:
+                line = f.readline()
+                if not line.endswith("\n"):
+                    break  # Incomplete last line: read it on the next poll
+                offset = f.tell()
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    pass
+    except OSError:
+        pass
+    return events, offset
+
+def _udp_events(sock):
+    events = []
+    while True:
+        try:
+            data = sock.recv(65536)
+        except BlockingIOError:
+            return events
+        for line in data.decode(errors="replace").splitlines():
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                pass
+
+# --- CLI ---
+def cmd_watch(args):
+    udp_socket = None
+    if args.source.startswith("udp://"):
+        udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        udp_socket.bind(_udp_target(args.source))
+        udp_socket.setblocking(False)
+    interactive = sys.stdout.isatty()
+    every = args.every if args.every is not None else (1 if interactive else 30)
+    events, offset = [], 0
+    last_event = last_print = 0.0
+    while True:
+        new_events, offset = (_udp_events(udp_socket), 0) if udp_socket else read_file(args.source, offset)
+        if new_events:
+            events.extend(new_events)
+            last_event = time.time()
+        state = aggregate(events)
+        following = udp_socket or args.follow
+        if events and (time.time() - last_print >= every or not following):
+            line = format_bar(state)
+            print(("\r" + line) if interactive else line, end="" if interactive else "\n", flush=True)
+            last_print = time.time()
+        if not following:
+            break
+        if args.idle_exit and events and not is_busy(state) and time.time() - last_event >= args.idle_exit:
+            break
+        time.sleep(0.5)
+    if interactive and events:
+        print()
+    failed_files = [f for f in aggregate(events)["files"].values() if f["status"] == "failed"]
+    for entry in failed_files:
+        print(f"❌ {entry['pack']}: {entry['filename']} - {entry.get('reason')}")
+    return 1 if failed_files else 0
+
+def cmd_status(args):
+    events, _ = read_file(args.source)
+    state = aggregate(events)
+    if args.json:
+        print(json.dumps(state, indent=2))
+    else:
+        print(format_bar(state))
+        for entry in state["files"].values():
+            if entry["status"] in ("downloading", "failed", "pending"):
+                size = f"{entry['size'] / GB:.2f} GB" if entry["size"] else "?"
+                print(f"  {entry['status']:<12} {entry['bytes'] / GB:6.2f}/{size:<10} {entry['pack']}: "
+                      f"{entry['filename']}{' - ' + entry['reason'] if entry.get('reason') else ''}")
+    return 0
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Download progress events and a combined progress bar.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("watch", help="Render one progress bar for all downloaders")
+    p.add_argument("source", help="Events file or udp://host:port to listen on")
+    p.add_argument("--follow", action="store_true", help="Keep reading as the file grows")
+    p.add_argument("--every", type=float, help="Seconds between updates (default 1 on a terminal, else 30)")
+    p.add_argument("--idle-exit", type=float, help="Stop after this many seconds without events once nothing is pending")
+    p.set_defaults(func=cmd_watch)
+
+    p = sub.add_parser("status", help="Print the current state of an events file")
+    p.add_argument("source")
+    p.add_argument("--json", action="store_true", help="Machine-readable state")
+    p.set_defaults(func=cmd_status)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+if __name__ == "__main__":
+    main()
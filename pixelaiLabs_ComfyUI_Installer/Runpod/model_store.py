@@ -0,0 +1,280 @@
+"""
+Quota-aware model store with LRU eviction.
+
+A full Flux + Wan 2.1/2.2 + NSFW install is larger than most RunPod volumes.
+This module keeps the models directory under a byte budget by deleting the
+least-recently-used files that can be fetched again from their pack source
+(every file recorded in the install state by model_packs.hub_download).
+
+Last use is the newest of: the original install time and explicit "touch"
+marks made when a workflow that references the file is resolved or prewarmed.
+The file's atime is not used: header reads by the installer itself bump it.
+
+Enable automatic eviction during downloads with PIXELAI_MODELS_QUOTA_GB.
+
+Usage:
+    python3 model_store.py status
+    python3 model_store.py touch ../../Workflows/GGUF/7.6_Wan22_I2V_Lightning_GGUF.json
+    python3 model_store.py ensure 30          (free room for 30 GB)
+    python3 model_store.py pin /workspace/ComfyUI/models/vae/ae.safetensors
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import calendar
+import argparse
+import threading
+
+import model_packs
+
+GB = 1024 ** 3
+QUOTA_BYTES = int(float(os.environ.get("PIXELAI_MODELS_QUOTA_GB", "0")) * GB)
+FREE_SPACE_RESERVE = 2 * GB  # Never fill the volume completely
+MODEL_EXTENSIONS = (".safetensors", ".gguf", ".sft", ".pt", ".pth", ".bin", ".ckpt", ".onnx")
+UI_ONLY_NODES = {"Note", "MarkdownNote", "Label (rgthree)", "ShowText|pysssss"}
+
+# Files installed by this process are never evicted to make room for their siblings
+SESSION_START = time.time()
+
+# Bytes promised to downloads that are still in flight in this process
+_reserved_bytes = 0
+_reserve_lock = threading.Lock()
+
+# --- Workflow resolution ---
+def workflow_model_names(workflow_path):
+    """Returns the model filenames (as typed in loader widgets) referenced by a UI workflow."""
+    with open(workflow_path, "r", encoding="utf-8") as f:
+        workflow = json.load(f)
+    names = set()
+    for node in workflow.get("nodes", []):
+        if node.get("type") in UI_ONLY_NODES:
+            continue
+        values = node.get("widgets_values") or []
+        if isinstance(values, dict):
+            values = list(values.values())
+        for value in values:
+            if isinstance(value, str) and value.lower().endswith(MODEL_EXTENSIONS):
+                names.add(value.replace("\\", "/"))
+    return names
+
+def index_models(models_dir):
+    """Maps every model file under models_dir by basename -> [paths]."""
+    index = {}
+    for root, dirs, files in os.walk(models_dir):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in files:
+            if name.lower().endswith(MODEL_EXTENSIONS):
+                index.setdefault(name, []).append(os.path.join(root, name))
+    return index
+
+def workflow_model_files(workflow_path, models_dir=None, index=None):
+    """
+    Resolves a workflow's model references to files on disk.
+
+    Loader widgets hold paths relative to a models/<type>/ folder (sometimes
+    with a subfolder), so references are matched by their tail path.
+
+    Returns:
+        tuple: (found_paths, missing_names)
+    """
+    models_dir = models_dir or model_packs.resolve_models_dir()
+    index = index if index is not None else index_models(models_dir)
+    found, missing = [], []
+    for name in sorted(workflow_model_names(workflow_path)):
+        candidates = [p for p in index.get(os.path.basename(name), [])
+                      if p.replace("\\", "/").endswith("/" + name)]
+        if candidates:
+            found.extend(candidates)
+        else:
+            missing.append(name)
+    return found, missing
+
+# --- Usage tracking ---
+def last_used(entry):
+    """Most recent use of a state entry, as a Unix timestamp."""
+    times = [entry.get("last_used", 0)]
+    installed_at = entry.get("installed_at")
+    if installed_at:
+        times.append(calendar.timegm(time.strptime(installed_at, "%Y-%m-%dT%H:%M:%SZ")))
+    return max(times)
+
+def touch(paths):
+    """Marks files as used now."""
+    wanted = {os.path.abspath(p) for p in paths}
+    now = time.time()
+    touched = 0
+    with model_packs.locked_state() as state:
+        for entry in state["files"].values():
+            if entry.get("path") in wanted:
+                entry["last_used"] = now
+                touched += 1
+    return touched
+
+def set_pinned(paths, pinned=True):
+    """Pins (or unpins) files so they are never evicted."""
+    wanted = {os.path.abspath(p) for p in paths}
+    changed = 0
+    with model_packs.locked_state() as state:
+        for entry in state["files"].values():
+            if entry.get("path") in wanted:
+                entry["pinned"] = pinned
+                changed += 1
+    return changed
+
+# --- Space accounting and eviction ---
+def used_bytes(models_dir):
+    """Total size of model files under models_dir."""
+    return sum(os.path.getsize(p) for paths in index_models(models_dir).values() for p in paths)
+
+def eviction_candidates(state):
+    """Re-fetchable, unpinned files still on disk, least recently used first."""
+    candidates = []
+    for key, entry in state["files"].items():
+        path = entry.get("path")
+        if not path or entry.get("pinned") or entry.get("evicted") or not os.path.isfile(path):
+            continue
+        if not entry.get("repo") or not entry.get("filename"):
+            continue
+        used = last_used(entry)
+        if used >= SESSION_START:
+            continue
+        candidates.append((used, key, entry))
+    candidates.sort(key=lambda c: c[0])
+    return candidates
+
+def bytes_to_free(needed, models_dir, quota=QUOTA_BYTES):
+    """How many bytes must be evicted before `needed` more bytes can be written."""
+    needed += _reserved_bytes
+    free = shutil.disk_usage(models_dir).free - FREE_SPACE_RESERVE
+    shortfall = needed - free
+    if quota:
+        shortfall = max(shortfall, used_bytes(models_dir) + needed - quota)
+    return max(0, shortfall)
+
+def ensure_space(needed, models_dir=None, quota=QUOTA_BYTES, dry_run=False):
+    """
+    Evicts least-recently-used models until `needed` bytes fit.
+
+    Evicted files stay in the install state (flagged "evicted"), so
+    `model_packs.py update` sees them as missing and can fetch them again.
+
+    Returns:
+        list: (path, size) of evicted files.
+    """
+    models_dir = models_dir or model_packs.resolve_models_dir()
+    shortfall = bytes_to_free(needed, models_dir, quota)
+    if not shortfall:
+        return []
+    evicted = []
+    with model_packs.locked_state() as state:
+        for _, key, entry in eviction_candidates(state):
+            if shortfall <= 0:
+                break
+            size = os.path.getsize(entry["path"])
+            if not dry_run:
+                import model_tiers
+                model_tiers.remove(entry["path"])  # Also drops volume/hot copies of promoted files
+                entry["evicted"] = True
+                entry["evicted_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+            evicted.append((entry["path"], size))
+            shortfall -= size
+    if shortfall > 0:
+        print(f"⚠️  Could not free enough space: still {shortfall / GB:.1f} GB short", file=sys.stderr)
+    return evicted
+
+def make_room_for(repo_id, filename, repo_type=None, revision=None, expected_size=None):
+    """
+    Called by model_packs.hub_download before a download when a quota is configured.
+
+    Returns:
+        int: Bytes reserved for the download; pass them to release() when it ends.
+    """
+    global _reserved_bytes
+    size = expected_size
+    if size is None:
+        from huggingface_hub import get_hf_file_metadata, hf_hub_url
+        try:
+            size = get_hf_file_metadata(hf_hub_url(repo_id, filename, repo_type=repo_type, revision=revision)).size or 0
+        except Exception as e:  # Hub unreachable (requests or httpx error): peers and mirrors may still serve it
+            print(f"⚠️  Could not size {filename} ({e}), downloading without a reservation")
+            size = 0
+    with _reserve_lock:
+        for path, evicted_size in ensure_space(size):
+            print(f"🧹 Evicted {path} ({evicted_size / GB:.2f} GB, least recently used)")
+        _reserved_bytes += size
+    return size
+
+def release(size):
+    """Returns bytes reserved by make_room_for() once the download finished or failed."""
+    global _reserved_bytes
+    with _reserve_lock:
+        _reserved_bytes = max(0, _reserved_bytes - size)
+
+# --- CLI ---
+def cmd_status(args):
+    models_dir = model_packs.resolve_models_dir()
+    state = model_packs.load_state()
+    usage = shutil.disk_usage(models_dir)
+    print("=" * 80)
+    print(f"📁 Models directory: {models_dir}")
+    print(f"💾 Model files: {used_bytes(models_dir) / GB:.1f} GB   Volume free: {usage.free / GB:.1f} GB")
+    print(f"📏 Quota: {QUOTA_BYTES / GB:.1f} GB" if QUOTA_BYTES else "📏 Quota: not set (PIXELAI_MODELS_QUOTA_GB)")
+    print("=" * 80)
+    print("Eviction order (least recently used first):")
+    for used, _, entry in eviction_candidates(state)[:args.limit]:
+        stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(used))
+        print(f"  {stamp}  {os.path.getsize(entry['path']) / GB:7.2f} GB  {entry['path']}")
+    return 0
+
+def cmd_touch(args):
+    paths = []
+    for workflow in args.workflows:
+        found, missing = workflow_model_files(workflow)
+        paths.extend(found)
+        for name in missing:
+            print(f"⚠️  {os.path.basename(workflow)}: {name} not found locally")
+    print(f"✅ Marked {touch(paths)} file(s) as used")
+    return 0
+
+def cmd_ensure(args):
+    evicted = ensure_space(int(args.gigabytes * GB), dry_run=args.dry_run)
+    for path, size in evicted:
+        print(f"🧹 {'Would evict' if args.dry_run else 'Evicted'} {path} ({size / GB:.2f} GB)")
+    print(f"✅ {len(evicted)} file(s), {sum(s for _, s in evicted) / GB:.2f} GB")
+    return 0
+
+def cmd_pin(args):
+    print(f"📌 Updated {set_pinned(args.paths, not args.unpin)} file(s)")
+    return 0
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Quota and LRU eviction for the models directory.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("status", help="Show usage and eviction order")
+    p.add_argument("--limit", type=int, default=20)
+    p.set_defaults(func=cmd_status)
+
+    p = sub.add_parser("touch", help="Mark the models used by workflow JSON files as recently used")
+    p.add_argument("workflows", nargs="+")
+    p.set_defaults(func=cmd_touch)
+
+    p = sub.add_parser("ensure", help="Evict LRU models until N GB fit")
+    p.add_argument("gigabytes", type=float)
+    p.add_argument("--dry-run", action="store_true")
+    p.set_defaults(func=cmd_ensure)
+
+    p = sub.add_parser("pin", help="Never evict these files")
+    p.add_argument("paths", nargs="+")
+    p.add_argument("--unpin", action="store_true")
+    p.set_defaults(func=cmd_pin)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Download throughput history and the settings derived from it.
+
+Every finished download of a large file adds a sample to the install state
+(state["telemetry"]): region, backend (hub, mirror or peer), host, bytes,
+seconds, and how many downloads ran at once (streams) or how many chunk
+workers a peer download used (segments). Pods land in different datacenters,
+so samples are tagged with the region (RUNPOD_DC_ID, or PIXELAI_REGION) and
+the next run in the same region uses them to pick:
+
+    mirror order   fastest mirror first; unmeasured ones before measured
+                   ones so they get a sample, failed ones last
+    concurrency    the parallel download count whose median per-stream
+                   throughput times streams was highest; when that is the
+                   highest count tried so far the next runs try two more
+    segments       the same for peer chunk workers
+
+With too few samples (or PIXELAI_TELEMETRY=0) the packs' own defaults apply.
+A pack that passes a limit (Wan 2.2 I2V: two downloads of very large files)
+never gets more downloads than that, only fewer.
+
+Usage:
+    python3 model_telemetry.py show [--region EU-RO-1]
+    python3 model_telemetry.py clear
+"""
+
+import os
+import sys
+import time
+import socket
+import argparse
+import statistics
+import threading
+import urllib.parse
+
+ENABLED = os.environ.get("PIXELAI_TELEMETRY", "1") != "0"
+REGION = os.environ.get("PIXELAI_REGION") or os.environ.get("RUNPOD_DC_ID") or "unknown"
+MIN_SAMPLE_BYTES = 32 * 1024 * 1024  # Smaller files measure latency, not bandwidth
+MAX_SAMPLES = 500
+MAX_AGE_DAYS = 14
+MIN_SAMPLES = 3  # Per setting, before it is trusted
+RECENT_SAMPLES = 20  # Per host, for mirror ranking
+MAX_CONCURRENCY = 16
+MAX_SEGMENTS = 32
+MB = 1024 ** 2
+
+_active = set()
+_active_lock = threading.Lock()
+_cached = {}
+
+def hub_host():
+    """Host the hub backend downloads from (HF_ENDPOINT when set)."""
+    return urllib.parse.urlparse(os.environ.get("HF_ENDPOINT") or "https://huggingface.co").netloc
+
+# --- Recording ---
+class Measurement:
+    """Times one download; streams is the most downloads that ran at once while it did."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.streams = 0
+        with _active_lock:
+            _active.add(self)
+            for measurement in _active:
+                measurement.streams = max(measurement.streams, len(_active))
+
+    def finish(self, backend, host, size, segments=None):
+        """Stores the sample (only for files large enough to say something about bandwidth)."""
+        self.cancel()
+        seconds = time.time() - self.started
+        if not ENABLED or not size or size < MIN_SAMPLE_BYTES:
+            return None
+        sample = {
+            "region": REGION,
+            "backend": backend,
+            "host": host,
+            "bytes": size,
+            "seconds": round(seconds, 3),
+            "streams": self.streams,
+            "at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        }
+        if segments:
+            sample["segments"] = segments
+        record(sample)
+        return sample
+
+    def cancel(self):
+        with _active_lock:
+            _active.discard(self)
+
+def record_failure(backend, host):
+    """A host that errored or was unreachable ranks last until it delivers again."""
+    if ENABLED:
+        record({"region": REGION, "backend": backend, "host": host, "bytes": 0, "seconds": 0, "failed": True,
+                "at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())})
+
+def record(sample):
+    import model_packs
+
+    with model_packs.locked_state() as state:
+        samples = state.setdefault("telemetry", [])
+        samples.append(sample)
+        del samples[:-MAX_SAMPLES]
+
+def samples(region=None, backend=None):
+    """Recent samples of a region (this pod's by default), read once per process."""
+    import model_packs
+
+    if "samples" not in _cached:
+        try:
+            _cached["samples"] = model_packs.load_state().get("telemetry", [])
+        except (OSError, ValueError):
+            _cached["samples"] = []
+    cutoff = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() - MAX_AGE_DAYS * 86400))
+    return [s for s in _cached["samples"]
+            if s["region"] == (region or REGION) and s["at"] >= cutoff and (backend is None or s["backend"] == backend)]
+
+def throughput(sample):
+    return sample["bytes"] / sample["seconds"] if sample["seconds"] > 0 else 0.0
+
+# --- Choosing settings ---
+def rank_hosts(urls, backend="mirror", region=None):
+    """Orders hosts by measured throughput: unmeasured first (in the given order), then fastest to slowest."""
+    if not ENABLED:
+        return list(urls)
+    by_host = {}
+    for sample in samples(region, backend):
+        by_host.setdefault(sample["host"], []).append(sample)
+    unmeasured = [u for u in urls if u not in by_host]
+    measured = sorted((u for u in urls if u in by_host),
+                      key=lambda u: -statistics.median(throughput(s) for s in by_host[u][-RECENT_SAMPLES:]))
+    return unmeasured + measured
+
+def best_setting(samples_list, field, default, maximum):
+    """
+    The value of `field` (streams or segments) with the highest estimated total throughput.
+
+    Returns:
+        tuple: (value, {value: estimated bytes/s}) - default when no value has enough samples.
+    """
+    grouped = {}
+    for sample in samples_list:
+        if sample.get(field) and not sample.get("failed"):
+            grouped.setdefault(sample[field], []).append(throughput(sample))
+    estimates = {value: statistics.median(values) * value for value, values in grouped.items()
+                 if len(values) >= MIN_SAMPLES}
+    if not estimates:
+        return default, estimates
+    best = max(estimates, key=estimates.get)
+    highest = max(grouped)
+    if highest not in estimates:
+        best = highest  # Keep trying the newest count until it has enough samples to compare
+    elif best == highest:
+        best = min(best + 2, maximum)  # Still scaling at the highest count tried: explore further
+    return best, estimates
+
+def concurrency(default, region=None, limit=None):
+    """
+    Parallel file downloads to use (hub and mirror samples).
+
+    Args:
+        default (int): The pack's own setting, used until there is enough history.
+        limit (int): Upper bound a pack sets for disk or memory reasons; history can only lower it.
+    """
+    if not ENABLED:
+        return default
+    maximum = min(limit, MAX_CONCURRENCY) if limit else MAX_CONCURRENCY
+    history = [s for s in samples(region) if s["backend"] in ("hub", "mirror")]
+    return min(best_setting(history, "streams", default, maximum)[0], maximum)
+
+def segments(default, region=None):
+    """Chunk workers for a peer download."""
+    if not ENABLED:
+        return default
+    return best_setting(samples(region, "peer"), "segments", default, MAX_SEGMENTS)[0]
+
+# --- CLI ---
+def cmd_show(args):
+    region = args.region or REGION
+    history = samples(region)
+    print(f"🌍 Region {region} ({socket.gethostname()}): {len(history)} sample(s) from the last {MAX_AGE_DAYS} days")
+    groups = {}
+    for sample in history:
+        groups.setdefault((sample["backend"], sample["host"]), []).append(sample)
+    for (backend, host), group in sorted(groups.items()):
+        rates = [throughput(s) / MB for s in group]
+        failed = sum(1 for s in group if s.get("failed"))
+        print(f"  {backend:<7} {host:<40} {len(group):>4} samples  median {statistics.median(rates):8.1f} MB/s"
+              + (f"  ({failed} failed)" if failed else ""))
+    for name, field, backends, maximum in (("Concurrency", "streams", ("hub", "mirror"), MAX_CONCURRENCY),
+                                           ("Peer segments", "segments", ("peer",), MAX_SEGMENTS)):
+        value, estimates = best_setting([s for s in history if s["backend"] in backends], field, None, maximum)
+        detail = ", ".join(f"{k}: {v / MB:.0f} MB/s" for k, v in sorted(estimates.items()))
+        print(f"⚙️  {name}: {value if value is not None else 'pack default'}" + (f"  ({detail})" if detail else ""))
+    return 0
+
+def cmd_clear(args):
+    import model_packs
+
+    with model_packs.locked_state() as state:
+        removed = len(state.pop("telemetry", []))
+    print(f"🧹 Removed {removed} sample(s)")
+    return 0
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Download throughput history and tuned settings.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("show", help="Print samples per backend/host and the settings they select")
+    p.add_argument("--region", help="Region to show (default: this pod's)")
+    p.set_defaults(func=cmd_show)
+
+    p = sub.add_parser("clear", help="Forget all samples")
+    p.set_defaults(func=cmd_clear)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+if __name__ == "__main__":
+    main()
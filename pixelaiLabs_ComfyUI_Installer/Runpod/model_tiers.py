@@ -0,0 +1,382 @@
+"""
+Storage tiering: frequently used models on container-local disk, every model on the volume.
+
+RunPod /workspace network volumes are much slower than the container disk.
+Promoting a model copies it to PIXELAI_HOT_DIR and swaps the file in
+models/<type>/ for a symlink to that copy, so loaders read local-disk speed;
+the volume copy moves to models/.pixelai_cold/ (hard-linked where the volume
+supports it, renamed otherwise) and stays the persistent original. Demoting
+renames it back over the symlink.
+
+    models/<type>/<file>                 real file, or symlink to the hot copy
+    models/.pixelai_cold/<type>/<file>   volume copy of a promoted file
+    $PIXELAI_HOT_DIR/<type>/<file>       hot copy
+    models/.pixelai_tiers.json           promoted files and usage scores
+
+Usage comes from workflows: `use` (and model_prewarm.py warm) add one use to
+each file the workflow loads, and scores decay with a half-life of a week.
+`rebalance` fills the budget (PIXELAI_HOT_BUDGET_GB, else the hot disk's free
+space minus a reserve) with the highest-scoring files, promoting and
+demoting as needed; `daemon` repeats it in the background. The container
+disk does not survive a restart, so `reconcile` (run by runpod-start before
+ComfyUI) puts the volume copy back wherever a hot copy is gone.
+
+Environment:
+    PIXELAI_HOT_DIR         Hot tier on the container disk (runpod-start enables tiering when set)
+    PIXELAI_HOT_BUDGET_GB   Hot tier size (default: its free space minus 5 GB)
+    PIXELAI_TIER_INTERVAL   Seconds between background rebalances (default 600)
+
+Usage:
+    python3 model_tiers.py use ../../Workflows/GGUF/7.6_Wan22_I2V_Lightning_GGUF.json
+    python3 model_tiers.py rebalance [--dry-run] [--budget-gb 60]
+    python3 model_tiers.py status
+    python3 model_tiers.py reconcile
+    python3 model_tiers.py daemon --interval 600
+"""
+
+import os
+import sys
+import json
+import time
+import fcntl
+import shutil
+import argparse
+import contextlib
+
+import model_packs
+import model_store
+
+HOT_DIR = os.environ.get("PIXELAI_HOT_DIR", "/var/cache/pixelai-hot")
+HOT_BUDGET = int(float(os.environ.get("PIXELAI_HOT_BUDGET_GB", "0")) * 1024 ** 3)
+HOT_RESERVE = 5 * 1024 ** 3  # Left free on the container disk when no budget is set
+TIERS_FILE_NAME = ".pixelai_tiers.json"
+COLD_DIR_NAME = ".pixelai_cold"
+HALF_LIFE_DAYS = 7
+MIN_SCORE = 0.25  # One use in the last two weeks
+GB = 1024 ** 3
+
+# --- Paths and manifest ---
+def models_root(models_dir=None):
+    return os.path.abspath(models_dir or model_packs.resolve_models_dir())
+
+def rel_path(path, models_dir):
+    """Path inside the models directory ('unet/x.gguf'), None for files outside it."""
+    relative = os.path.relpath(os.path.abspath(path), models_dir)
+    return None if relative.startswith("..") else relative.replace(os.sep, "/")
+
+def cold_path(models_dir, rel):
+    return os.path.join(models_dir, COLD_DIR_NAME, rel)
+
+def hot_path(rel):
+    return os.path.join(HOT_DIR, rel)
+
+def _load(path):
+    tiers = {}
+    if os.path.isfile(path):
+        with open(path, "r", encoding="utf-8") as f:
+            tiers = json.load(f)
+    tiers.setdefault("files", {})
+    tiers.setdefault("usage", {})
+    return tiers
+
+def _save(tiers, path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(tiers, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+@contextlib.contextmanager
+def locked_tiers(models_dir):
+    """Loads the tier manifest under an exclusive flock and saves it on exit."""
+    path = os.path.join(models_dir, TIERS_FILE_NAME)
+    with open(path + ".lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            tiers = _load(path)
+            yield tiers
+            _save(tiers, path)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+# --- Usage ---
+def score(usage, now=None):
+    """Use count with exponential decay (half-life HALF_LIFE_DAYS)."""
+    age = (now or time.time()) - usage["at"]
+    return usage["score"] * 0.5 ** (age / (HALF_LIFE_DAYS * 86400))
+
+def record_use(paths, models_dir=None):
+    """Adds one use to each model file (a workflow that loads them is about to run)."""
+    models_dir = models_root(models_dir)
+    now = time.time()
+    with locked_tiers(models_dir) as tiers:
+        for path in paths:
+            rel = rel_path(path, models_dir)
+            if not rel:
+                continue
+            usage = tiers["usage"].get(rel)
+            tiers["usage"][rel] = {"score": (score(usage, now) if usage else 0) + 1, "at": now}
+
+# --- Moving files between tiers ---
+def _copy(src, dest):
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    part_path = dest + ".part"
+    shutil.copy2(src, part_path)  # Keeps the mtime, so the catalog does not re-read the file
+    if os.path.getsize(part_path) != os.path.getsize(src):
+        os.remove(part_path)
+        raise OSError(f"short copy of {src}")
+    os.replace(part_path, dest)
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def promote(models_dir, rel):
+    """
+    Copies a model to the hot tier and points models/<rel> at the copy.
+
+    The copy happens without the manifest lock; the swap re-checks that the
+    file did not change meanwhile.
+    """
+    path = os.path.join(models_dir, rel)
+    stat = os.stat(path)
+    hot = hot_path(rel)
+    _copy(path, hot)
+    with locked_tiers(models_dir) as tiers:
+        current = os.lstat(path)
+        if os.path.islink(path) or (current.st_size, current.st_mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+            _remove(hot)
+            return False
+        cold = cold_path(models_dir, rel)
+        os.makedirs(os.path.dirname(cold), exist_ok=True)
+        tiers["files"][rel] = {"size": stat.st_size, "hot": hot, "state": "promoting",
+                               "promoted_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+        _save(tiers, os.path.join(models_dir, TIERS_FILE_NAME))
+        link_tmp = path + ".tier-link"
+        _remove(link_tmp)
+        os.symlink(hot, link_tmp)
+        try:
+            os.link(path, cold)  # models/<rel> never disappears
+        except OSError:
+            os.replace(path, cold)  # Volumes without hard links: brief gap, covered by reconcile()
+        os.replace(link_tmp, path)
+        tiers["files"][rel]["state"] = "promoted"
+    return True
+
+def demote(models_dir, rel, tiers):
+    """Puts the volume copy back in place of the symlink and drops the hot copy (manifest lock held)."""
+    path = os.path.join(models_dir, rel)
+    cold = cold_path(models_dir, rel)
+    entry = tiers["files"].pop(rel, {})
+    hot = entry.get("hot") or hot_path(rel)
+    if os.path.isfile(cold):
+        os.replace(cold, path)
+    elif os.path.islink(path) and os.path.isfile(hot):
+        _copy(hot, path + ".demote")  # Volume copy lost: write the hot one back
+        os.replace(path + ".demote", path)
+    _remove(hot)
+
+def remove(path, models_dir=None):
+    """Deletes a model in every tier (used by model_store eviction instead of os.remove)."""
+    models_dir = models_root(models_dir)
+    rel = rel_path(path, models_dir)
+    with locked_tiers(models_dir) as tiers:
+        entry = tiers["files"].pop(rel, None) if rel else None
+        _remove(path)
+        if entry:
+            _remove(cold_path(models_dir, rel))
+            _remove(entry.get("hot") or hot_path(rel))
+
+def reconcile(models_dir=None):
+    """
+    Repairs the tiers after a restart or crash.
+
+    Returns:
+        list: (rel, action) for every file that needed fixing.
+    """
+    models_dir = models_root(models_dir)
+    actions = []
+    with locked_tiers(models_dir) as tiers:
+        for rel, entry in list(tiers["files"].items()):
+            path = os.path.join(models_dir, rel)
+            cold = cold_path(models_dir, rel)
+            hot = entry.get("hot") or hot_path(rel)
+            hot_ok = os.path.isfile(hot) and os.path.getsize(hot) == entry.get("size")
+            if os.path.islink(path):
+                if hot_ok and entry.get("state") == "promoted":
+                    continue
+                demote(models_dir, rel, tiers)
+                actions.append((rel, "restored volume copy"))
+            elif os.path.isfile(path):
+                # Re-downloaded over the link (or the swap never happened): the file in place wins
+                tiers["files"].pop(rel)
+                _remove(cold)
+                _remove(hot)
+                actions.append((rel, "dropped stale copies"))
+            elif entry.get("state") == "promoting" and os.path.isfile(cold):
+                os.replace(cold, path)
+                tiers["files"].pop(rel)
+                _remove(hot)
+                actions.append((rel, "finished interrupted promotion"))
+            else:
+                # The link was deleted on purpose (eviction, manual cleanup)
+                tiers["files"].pop(rel)
+                _remove(cold)
+                _remove(hot)
+                actions.append((rel, "removed (deleted from models)"))
+    return actions
+
+# --- Placement ---
+def hot_budget(tiers):
+    """Bytes the hot tier may hold."""
+    if HOT_BUDGET:
+        return HOT_BUDGET
+    os.makedirs(HOT_DIR, exist_ok=True)
+    promoted = sum(entry.get("size", 0) for entry in tiers["files"].values())
+    return max(0, shutil.disk_usage(HOT_DIR).free + promoted - HOT_RESERVE)
+
+def plan(models_dir, tiers, budget=None):
+    """
+    Picks the hot set: highest usage score first while it fits the budget.
+
+    Returns:
+        tuple: (wanted rel paths, budget)
+    """
+    budget = hot_budget(tiers) if budget is None else budget
+    now = time.time()
+    ranked = sorted(((score(usage, now), rel) for rel, usage in tiers["usage"].items()), reverse=True)
+    wanted, remaining = [], budget
+    for value, rel in ranked:
+        path = os.path.join(models_dir, rel)
+        if value < MIN_SCORE or not os.path.isfile(path):
+            continue
+        size = os.path.getsize(path)
+        if size <= remaining:
+            wanted.append(rel)
+            remaining -= size
+    return wanted, budget
+
+def rebalance(models_dir=None, budget=None, dry_run=False):
+    """
+    Promotes and demotes files so the hot tier holds the current hot set.
+
+    Returns:
+        dict: promoted, demoted and kept rel paths.
+    """
+    models_dir = models_root(models_dir)
+    os.makedirs(HOT_DIR, exist_ok=True)
+    if os.stat(HOT_DIR).st_dev == os.stat(models_dir).st_dev:
+        print(f"⚠️  {HOT_DIR} is on the same filesystem as {models_dir}; nothing to gain from tiering")
+        return {"promoted": [], "demoted": [], "kept": []}
+    if not dry_run:
+        reconcile(models_dir)
+    with locked_tiers(models_dir) as tiers:
+        now = time.time()
+        tiers["usage"] = {rel: usage for rel, usage in tiers["usage"].items()
+                          if score(usage, now) >= MIN_SCORE / 16}  # Forget files unused for months
+        wanted, _ = plan(models_dir, tiers, budget)
+        demoted = [rel for rel in tiers["files"] if rel not in wanted]
+        if not dry_run:
+            for rel in demoted:
+                demote(models_dir, rel, tiers)
+        kept = [rel for rel in wanted if rel in tiers["files"]]
+        to_promote = [rel for rel in wanted if rel not in tiers["files"]]
+    promoted = []
+    for rel in to_promote:
+        if dry_run:
+            promoted.append(rel)
+            continue
+        try:
+            if promote(models_dir, rel):
+                promoted.append(rel)
+        except OSError as e:
+            print(f"⚠️  Could not promote {rel}: {e}")
+    return {"promoted": promoted, "demoted": demoted, "kept": kept}
+
+# --- CLI ---
+def _print_result(result, dry_run=False):
+    prefix = "Would " if dry_run else ""
+    for rel in result["promoted"]:
+        print(f"⬆️  {prefix}promote {rel}")
+    for rel in result["demoted"]:
+        print(f"⬇️  {prefix}demote {rel}")
+    print(f"{len(result['kept'])} kept, {len(result['promoted'])} promoted, {len(result['demoted'])} demoted")
+
+def cmd_use(args):
+    paths = []
+    for workflow in args.workflows:
+        found, missing = model_store.workflow_model_files(workflow)
+        paths.extend(found)
+        for name in missing:
+            print(f"❓ {name} (not found)")
+    record_use(paths)
+    print(f"📈 Recorded a use of {len(paths)} file(s)")
+    return 0
+
+def cmd_rebalance(args):
+    budget = int(args.budget_gb * GB) if args.budget_gb is not None else None
+    _print_result(rebalance(budget=budget, dry_run=args.dry_run), args.dry_run)
+    return 0
+
+def cmd_reconcile(args):
+    for rel, action in reconcile():
+        print(f"🔧 {rel}: {action}")
+    return 0
+
+def cmd_status(args):
+    models_dir = models_root()
+    with locked_tiers(models_dir) as tiers:
+        budget = hot_budget(tiers)
+        now = time.time()
+        hot_bytes = sum(entry.get("size", 0) for entry in tiers["files"].values())
+        print(f"🔥 Hot tier {HOT_DIR}: {len(tiers['files'])} file(s), {hot_bytes / GB:.1f} / {budget / GB:.1f} GB")
+        for rel, usage in sorted(tiers["usage"].items(), key=lambda item: -score(item[1], now)):
+            path = os.path.join(models_dir, rel)
+            size = os.path.getsize(path) if os.path.isfile(path) else 0
+            tier = "hot " if rel in tiers["files"] else "cold"
+            print(f"  {tier}  score {score(usage, now):5.2f}  {size / GB:6.2f} GB  {rel}")
+    return 0
+
+def cmd_daemon(args):
+    print(f"🔁 Rebalancing every {args.interval}s", flush=True)
+    while True:
+        try:
+            result = rebalance()
+            if result["promoted"] or result["demoted"]:
+                _print_result(result)
+                sys.stdout.flush()
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Rebalance failed: {e}", flush=True)
+        time.sleep(args.interval)
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Keep frequently used models on fast local disk.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("use", help="Record a use of every model a workflow loads")
+    p.add_argument("workflows", nargs="+")
+    p.set_defaults(func=cmd_use)
+
+    p = sub.add_parser("rebalance", help="Promote/demote files to match usage and the budget")
+    p.add_argument("--budget-gb", type=float, help="Hot tier size (default: PIXELAI_HOT_BUDGET_GB or free space)")
+    p.add_argument("--dry-run", action="store_true")
+    p.set_defaults(func=cmd_rebalance)
+
+    p = sub.add_parser("reconcile", help="Restore volume copies whose hot copy is gone (after a restart)")
+    p.set_defaults(func=cmd_reconcile)
+
+    p = sub.add_parser("status", help="Show the hot tier and usage scores")
+    p.set_defaults(func=cmd_status)
+
+    p = sub.add_parser("daemon", help="Rebalance periodically")
+    p.add_argument("--interval", type=int, default=600, help="Seconds between rebalances")
+    p.set_defaults(func=cmd_daemon)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+if __name__ == "__main__":
+    main()
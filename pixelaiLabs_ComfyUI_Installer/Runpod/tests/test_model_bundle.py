@@ -0,0 +1,141 @@
+"""
+Tests for model_bundle.py export/import.
+
+Run from the Runpod folder:
+    python3 -m pytest tests
+"""
+
+import os
+import sys
+import json
+import types
+import zipfile
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model_bundle
+import model_packs
+
+def _write_zip(path, members):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+
+class ExportArchiveTest(unittest.TestCase):
+    """Packs with extract_and_delete archives export and import them."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.models_dir = os.path.join(self.tmp.name, "ComfyUI", "models")
+        env = mock.patch.dict(os.environ, {
+            "COMFY_MODELS_DIR": self.models_dir,
+            "PIXELAI_STATE_FILE": os.path.join(self.tmp.name, "state.json")
+        })
+        env.start()
+        self.addCleanup(env.stop)
+
+        self.archive_dir = os.path.join(self.models_dir, "insightface")
+        self.model_dir = os.path.join(self.models_dir, "upscale_models")
+        os.makedirs(self.model_dir)
+        with open(os.path.join(self.model_dir, "4x.pth"), "wb") as f:
+            f.write(b"weights")
+        pack = types.SimpleNamespace(DOWNLOAD_TASKS=[
+            {"repo_id": "example/upscale", "filename": "4x.pth", "local_dir": self.model_dir},
+            {"repo_id": "example/insightface", "filename": "models/antelopev2.zip",
+             "local_dir": self.archive_dir, "extract_and_delete": True}
+        ])
+        patch = mock.patch.object(model_packs, "load_pack", return_value=pack)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def fetch_archive(self, task, lock, tmp_dir):
+        # Same layout as hf_hub_download(local_dir=tmp_dir): outside the ComfyUI folder
+        path = os.path.join(tmp_dir, task["filename"])
+        _write_zip(path, {"antelopev2/glintr100.onnx": b"onnx"})
+        return path
+
+    def test_archive_in_manifest(self):
+        output = os.path.join(self.tmp.name, "bundle.zip")
+        with mock.patch.object(model_bundle, "_fetch_archive", side_effect=self.fetch_archive):
+            manifest = model_bundle.export_bundle("Download_test_pack", [], output, self.models_dir)
+
+        paths = {entry["path"]: entry for entry in manifest["files"]}
+        self.assertIn("models/upscale_models/4x.pth", paths)
+        archive = paths.get("models/insightface/models/antelopev2.zip")
+        self.assertIsNotNone(archive, f"archive missing from manifest: {sorted(paths)}")
+        self.assertTrue(archive["extract_and_delete"])
+        self.assertEqual(archive["local_dir"], "models/insightface")
+        with zipfile.ZipFile(output) as bundle:
+            self.assertIn(archive["path"], bundle.namelist())
+            self.assertEqual(json.loads(bundle.read(model_bundle.MANIFEST_NAME)), manifest)
+
+    def test_import_extracts_archive(self):
+        output = os.path.join(self.tmp.name, "bundle.zip")
+        with mock.patch.object(model_bundle, "_fetch_archive", side_effect=self.fetch_archive):
+            model_bundle.export_bundle("Download_test_pack", [], output, self.models_dir)
+
+        target = os.path.join(self.tmp.name, "offline", "ComfyUI", "models")
+        os.makedirs(target)
+        with mock.patch.dict(os.environ, {"COMFY_MODELS_DIR": target}):
+            counts = model_bundle.import_bundle(output, target, jobs=2)
+        self.assertEqual(counts.get("extracted"), 1)
+        self.assertTrue(os.path.isfile(os.path.join(target, "insightface", "antelopev2", "glintr100.onnx")))
+        self.assertFalse(os.path.exists(os.path.join(target, "insightface", "models", "antelopev2.zip")))
+
+class ImportPathTest(unittest.TestCase):
+    """Manifest paths that escape the ComfyUI folder are refused before anything is written."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.models_dir = os.path.join(self.tmp.name, "ComfyUI", "models")
+        os.makedirs(self.models_dir)
+        env = mock.patch.dict(os.environ, {
+            "COMFY_MODELS_DIR": self.models_dir,
+            "PIXELAI_STATE_FILE": os.path.join(self.tmp.name, "state.json")
+        })
+        env.start()
+        self.addCleanup(env.stop)
+
+    def write_bundle(self, entries):
+        path = os.path.join(self.tmp.name, "bundle.zip")
+        manifest = {"format": model_bundle.FORMAT_VERSION, "pack": "Download_test_pack", "files": []}
+        members = {}
+        for entry_path, local_dir in entries:
+            manifest["files"].append({
+                "path": entry_path, "local_dir": local_dir, "filename": os.path.basename(entry_path),
+                "repo_id": "example/evil", "repo_type": None, "revision": None,
+                "size": 4, "sha256": "88d4266fd4e6338d13b845fcf289579d209c897823b9217da3e161936f031589",
+                "extract_and_delete": False
+            })
+            members[entry_path] = b"abcd"
+        members[model_bundle.MANIFEST_NAME] = json.dumps(manifest)
+        _write_zip(path, members)
+        return path
+
+    def test_rejects_parent_paths(self):
+        bundle = self.write_bundle([
+            ("../../evil.bin", "models/vae"),
+            ("models/vae/ok.bin", "../.."),
+            (os.path.join(self.tmp.name, "absolute.bin"), "models/vae")
+        ])
+        counts = model_bundle.import_bundle(bundle, self.models_dir, jobs=1)
+        self.assertEqual(counts["failed"], 3)
+        self.assertEqual(counts["installed"], 0)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "evil.bin")))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "absolute.bin")))
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["ComfyUI", "bundle.zip"])
+
+    def test_installs_paths_inside_root(self):
+        bundle = self.write_bundle([("models/vae/ok.bin", "models/vae")])
+        counts = model_bundle.import_bundle(bundle, self.models_dir, jobs=1)
+        self.assertEqual(counts["installed"], 1)
+        self.assertTrue(os.path.isfile(os.path.join(self.models_dir, "vae", "ok.bin")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,437 @@
+"""
+Compiles UI-format workflows (Workflows/) into ComfyUI API prompts.
+
+The UI graph carries editor-only structure that ComfyUI's frontend resolves
+every time the workflow is queued: SetNode/GetNode pairs and Reroutes that
+only forward a link, bypassed nodes (mode 4) whose inputs pass through to
+the outputs of the same type, PrimitiveNodes whose value already sits in the
+target's widget, and Note/MarkdownNote/Label (rgthree)/Fast Groups Bypasser
+nodes that do nothing. Compiling does the same resolution once:
+
+  - links are followed through virtual and bypassed nodes to the real source
+  - UI-only nodes, muted nodes and nodes that feed no output node are dropped
+  - positional widgets_values are named with the node definitions from
+    ComfyUI's /object_info (seed "control after generate" and upload widget
+    values skipped like the frontend does)
+  - every node type must be known, combo values must be offered by the
+    server, and every referenced model file must exist under the models dir
+
+The result (<workflow>.api.json) can be POSTed to /prompt as is, by `queue`
+or any script, without a browser.
+
+/object_info comes from a running ComfyUI (--server) and is cached, so later
+compiles work offline from the cache (or a file given with --object-info).
+
+Usage:
+    python3 workflow_compiler.py compile ../../Workflows/GGUF --out compiled-workflows
+    python3 workflow_compiler.py fetch-info --server http://127.0.0.1:8188
+    python3 workflow_compiler.py queue compiled-workflows/7.6_Wan22_I2V_Lightning_GGUF.api.json
+"""
+
+import os
+import sys
+import json
+import uuid
+import argparse
+import urllib.error
+import urllib.request
+
+import model_packs
+import model_store
+
+DEFAULT_SERVER = os.environ.get("PIXELAI_COMFY_URL", "http://127.0.0.1:8188")
+OBJECT_INFO_FILE_NAME = "pixelai_object_info.json"
+
+# Frontend-only node types
+VIRTUAL_NODES = {"Reroute", "SetNode", "GetNode", "PrimitiveNode", "Note", "MarkdownNote", "Label (rgthree)",
+                 "Fast Groups Bypasser (rgthree)", "Fast Groups Muter (rgthree)", "Fast Bypasser (rgthree)",
+                 "Fast Muter (rgthree)", "Bookmark (rgthree)"}
+MODE_MUTED = 2
+MODE_BYPASSED = 4
+WIDGET_TYPES = {"INT", "FLOAT", "STRING", "BOOLEAN", "COMBO"}
+CONTROL_VALUES = {"fixed", "increment", "decrement", "randomize"}
+SEED_NAMES = {"seed", "noise_seed"}
+UPLOAD_OPTIONS = ("image_upload", "video_upload", "audio_upload", "animated_image_upload")
+DICT_WIDGET_UI_KEYS = {"videopreview"}  # VHS keeps its preview state next to the real values
+PRIMITIVE = "primitive"
+
+class CompileError(Exception):
+    """Raised when a workflow cannot be turned into a prompt."""
+
+# --- Node definitions ---
+def object_info_path():
+    return os.path.join(os.path.dirname(os.path.abspath(model_packs.resolve_models_dir())), "user",
+                        OBJECT_INFO_FILE_NAME)
+
+def fetch_object_info(server, cache_path=None, timeout=5):
+    """Downloads /object_info from a running ComfyUI and caches it."""
+    with urllib.request.urlopen(server.rstrip("/") + "/object_info", timeout=timeout) as response:
+        info = json.load(response)
+    cache_path = cache_path or object_info_path()
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump(info, f)
+    return info
+
+def load_object_info(server=None, path=None):
+    """Node definitions from the server when it answers, else from the cache or the given file."""
+    if server and not path:
+        try:
+            return fetch_object_info(server)
+        except (OSError, ValueError):
+            pass
+    path = path or object_info_path()
+    if not os.path.isfile(path):
+        raise CompileError(f"No node definitions: ComfyUI is not reachable at {server} and {path} does not exist "
+                           "(start ComfyUI once or pass --object-info)")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def input_specs(definition):
+    """(name, spec, required) for every non-hidden input, in widget order."""
+    specs = []
+    order = definition.get("input_order", {})
+    for section in ("required", "optional"):
+        inputs = definition.get("input", {}).get(section, {})
+        for name in order.get(section) or list(inputs):
+            if name in inputs:
+                specs.append((name, inputs[name], section == "required"))
+    return specs
+
+def _options(spec):
+    return spec[1] if len(spec) > 1 and isinstance(spec[1], dict) else {}
+
+def is_widget(spec):
+    kind = spec[0]
+    return (isinstance(kind, list) or kind in WIDGET_TYPES) and not _options(spec).get("forceInput")
+
+def combo_values(spec):
+    """Allowed values of a combo input, None for other inputs."""
+    if isinstance(spec[0], list):
+        return spec[0]
+    if spec[0] == "COMBO":
+        return _options(spec).get("options")
+    return None
+
+# --- Widget values ---
+def _power_lora_widgets(values):
+    """rgthree Power Lora Loader: each LoRA row is a dict widget serialised as lora_<n>."""
+    rows = [value for value in values if isinstance(value, dict) and "lora" in value]
+    return {f"lora_{index}": row for index, row in enumerate(rows, 1)}
+
+CUSTOM_WIDGETS = {
+    "Power Lora Loader (rgthree)": _power_lora_widgets
+}
+
+def name_widgets(node, definition):
+    """
+    Maps a node's widgets_values onto input names.
+
+    Returns:
+        tuple: ({name: value}, warning or None)
+    """
+    values = node.get("widgets_values") or []
+    if isinstance(values, dict):
+        return {k: v for k, v in values.items() if k not in DICT_WIDGET_UI_KEYS}, None
+    if node["type"] in CUSTOM_WIDGETS:
+        return CUSTOM_WIDGETS[node["type"]](values), None
+    named = {}
+    position = 0
+    for name, spec, _ in input_specs(definition):
+        if not is_widget(spec):
+            continue
+        if position >= len(values):
+            break
+        named[name] = values[position]
+        position += 1
+        options = _options(spec)
+        control = options.get("control_after_generate") or (spec[0] == "INT" and name in SEED_NAMES)
+        if control and position < len(values) and values[position] in CONTROL_VALUES:
+            position += 1
+        if any(options.get(option) for option in UPLOAD_OPTIONS):
+            position += 1
+    warning = None
+    if position != len(values):
+        warning = f"{len(values)} widget values but {position} matched the node definition"
+    return named, warning
+
+# --- Graph resolution ---
+class Workflow:
+    """A UI graph with link resolution through virtual and bypassed nodes."""
+
+    def __init__(self, data):
+        self.nodes = {node["id"]: node for node in data.get("nodes", [])}
+        self.links = {}
+        for link in data.get("links", []):
+            if isinstance(link, dict):
+                link = [link["id"], link["origin_id"], link["origin_slot"], link["target_id"], link["target_slot"],
+                        link.get("type")]
+            self.links[link[0]] = link
+        self.setters = {}
+        for node in self.nodes.values():
+            if node["type"] == "SetNode" and node.get("widgets_values"):
+                self.setters.setdefault(node["widgets_values"][0], node)
+        self.warnings = []
+
+    def _input_link(self, node, index):
+        inputs = node.get("inputs") or []
+        return inputs[index].get("link") if index < len(inputs) else None
+
+    def _bypass_link(self, node, slot, input_type):
+        """A bypassed node forwards the input at the same slot if its type matches, else the first of that type."""
+        inputs = node.get("inputs") or []
+        if slot < len(inputs) and inputs[slot].get("type") == input_type:
+            return inputs[slot].get("link")
+        for candidate in inputs:
+            if candidate.get("type") == input_type:
+                return candidate.get("link")
+        return None
+
+    def resolve(self, link_id, input_type):
+        """
+        Follows a link back to the real node that produces it.
+
+        Returns:
+            list: [node id (str), output slot]; PRIMITIVE when a PrimitiveNode feeds a widget;
+                  None when nothing real is connected.
+        """
+        seen = set()
+        while link_id is not None:
+            if link_id in seen:
+                raise CompileError(f"link cycle through link {link_id}")
+            seen.add(link_id)
+            link = self.links.get(link_id)
+            origin = self.nodes.get(link[1]) if link else None
+            if origin is None or origin.get("mode") == MODE_MUTED:
+                return None
+            kind = origin["type"]
+            if kind in ("Reroute", "SetNode"):
+                link_id = self._input_link(origin, 0)
+            elif kind == "GetNode":
+                name = (origin.get("widgets_values") or [None])[0]
+                setter = self.setters.get(name)
+                if setter is None:
+                    self.warnings.append(f"GetNode '{name}' has no SetNode")
+                    return None
+                link_id = self._input_link(setter, 0)
+            elif kind == "PrimitiveNode":
+                return PRIMITIVE
+            elif kind in VIRTUAL_NODES:
+                return None
+            elif origin.get("mode") == MODE_BYPASSED:
+                link_id = self._bypass_link(origin, link[2], input_type)
+            else:
+                return [str(origin["id"]), link[2]]
+        return None
+
+def compile_workflow(data, object_info):
+    """
+    Turns a UI workflow into an API prompt.
+
+    Returns:
+        tuple: (prompt dict, report dict with stripped/bypassed/pruned counts, warnings and errors)
+    """
+    workflow = Workflow(data)
+    report = {"nodes": len(workflow.nodes), "stripped": 0, "bypassed": 0, "muted": 0, "pruned": 0,
+              "warnings": workflow.warnings, "errors": []}
+    prompt = {}
+    for node_id, node in sorted(workflow.nodes.items()):
+        kind = node["type"]
+        if kind in VIRTUAL_NODES:
+            report["stripped"] += 1
+            continue
+        if node.get("mode") == MODE_BYPASSED:
+            report["bypassed"] += 1
+            continue
+        if node.get("mode") == MODE_MUTED:
+            report["muted"] += 1
+            continue
+        definition = object_info.get(kind)
+        if definition is None:
+            report["errors"].append(f"node {node_id}: unknown node type '{kind}' (custom node not installed?)")
+            continue
+        inputs, warning = name_widgets(node, definition)
+        if warning:
+            workflow.warnings.append(f"node {node_id} ({kind}): {warning}")
+        for slot in node.get("inputs") or []:
+            if slot.get("link") is None:
+                continue
+            source = workflow.resolve(slot["link"], slot.get("type"))
+            widget_name = (slot.get("widget") or {}).get("name")
+            if source == PRIMITIVE:
+                continue  # The primitive's value is already in this node's widget
+            if source is None:
+                if not widget_name:
+                    inputs.pop(slot["name"], None)
+                continue
+            inputs[widget_name or slot["name"]] = source
+        entry = {"class_type": kind, "inputs": inputs}
+        if node.get("title") and node["title"] != definition.get("display_name", kind):
+            entry["_meta"] = {"title": node["title"]}
+        prompt[str(node_id)] = entry
+
+    # Keep only what an output node needs
+    needed = set()
+    pending = [node_id for node_id, entry in prompt.items() if object_info[entry["class_type"]].get("output_node")]
+    while pending:
+        node_id = pending.pop()
+        if node_id in needed or node_id not in prompt:
+            continue
+        needed.add(node_id)
+        pending.extend(value[0] for value in prompt[node_id]["inputs"].values() if _is_link(value))
+    report["pruned"] = len(prompt) - len(needed)
+    prompt = {node_id: entry for node_id, entry in prompt.items() if node_id in needed}
+    if not prompt:
+        report["errors"].append("no output node is enabled")
+
+    for node_id, entry in prompt.items():
+        for name, spec, required in input_specs(object_info[entry["class_type"]]):
+            value = entry["inputs"].get(name)
+            if value is None:
+                if required:
+                    report["errors"].append(f"node {node_id} ({entry['class_type']}): required input '{name}' "
+                                            "is not connected")
+                continue
+            allowed = combo_values(spec)
+            if allowed and not _is_link(value) and value not in allowed:
+                report["errors"].append(f"node {node_id} ({entry['class_type']}): {name}={value!r} is not "
+                                        "offered by the server")
+    return prompt, report
+
+def _is_link(value):
+    return isinstance(value, list) and len(value) == 2 and isinstance(value[0], str) and isinstance(value[1], int)
+
+# --- Model references ---
+def model_references(prompt):
+    """(node id, input name, model path) for every model file the prompt loads."""
+    references = []
+    for node_id, entry in prompt.items():
+        for name, value in entry["inputs"].items():
+            if isinstance(value, dict) and value.get("on", True) and isinstance(value.get("lora"), str):
+                value = value["lora"]
+            if isinstance(value, str) and value.lower().endswith(model_store.MODEL_EXTENSIONS):
+                references.append((node_id, name, value.replace("\\", "/")))
+    return references
+
+def missing_models(prompt, index):
+    """Referenced model files not found under the models directory (matched by tail path)."""
+    missing = []
+    for node_id, name, path in model_references(prompt):
+        candidates = [p for p in index.get(os.path.basename(path), [])
+                      if p.replace("\\", "/").endswith("/" + path)]
+        if not candidates:
+            missing.append(f"node {node_id}: {name}={path}")
+    return missing
+
+# --- CLI ---
+def _workflow_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+                for name in sorted(names):
+                    if name.lower().endswith(".json") and not name.lower().endswith(".api.json"):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+def cmd_compile(args):
+    try:
+        object_info = load_object_info(args.server, args.object_info)
+    except CompileError as e:
+        print(f"❌ {e}")
+        return 1
+    index = model_store.index_models(model_packs.resolve_models_dir())
+    os.makedirs(args.out, exist_ok=True)
+    failures = 0
+    for path in _workflow_files(args.paths):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if "nodes" not in data:
+            print(f"➖ {path}: not a UI workflow")
+            continue
+        try:
+            prompt, report = compile_workflow(data, object_info)
+        except CompileError as e:
+            failures += 1
+            print(f"❌ {path}: {e}")
+            continue
+        missing = missing_models(prompt, index)
+        problems = report["errors"] + ([] if args.allow_missing else [f"missing model, {m}" for m in missing])
+        out_path = os.path.join(args.out, os.path.splitext(os.path.basename(path))[0] + ".api.json")
+        body = json.dumps(prompt, separators=(",", ":"), ensure_ascii=False)
+        with open(out_path, "w", encoding="utf-8") as f:
+            f.write(body)
+        status = "❌" if problems else "✅"
+        print(f"{status} {path} -> {out_path}: {report['nodes']} nodes -> {len(prompt)} "
+              f"({report['stripped']} UI-only, {report['bypassed']} bypassed, {report['pruned']} unused), "
+              f"{os.path.getsize(path) // 1024} KB -> {len(body) // 1024} KB")
+        for problem in problems:
+            print(f"    ❌ {problem}")
+        if args.allow_missing:
+            for name in missing:
+                print(f"    ⚠️  missing model, {name}")
+        for warning in report["warnings"]:
+            print(f"    ⚠️  {warning}")
+        failures += bool(problems)
+    return 1 if failures else 0
+
+def cmd_fetch_info(args):
+    path = args.object_info or object_info_path()
+    try:
+        info = fetch_object_info(args.server, path)
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not read {args.server}/object_info: {e}")
+        return 1
+    print(f"✅ Saved {len(info)} node definitions to {path}")
+    return 0
+
+def cmd_queue(args):
+    with open(args.prompt, "r", encoding="utf-8") as f:
+        prompt = json.load(f)
+    if "nodes" in prompt:
+        prompt, report = compile_workflow(prompt, load_object_info(args.server, args.object_info))
+        if report["errors"]:
+            for problem in report["errors"]:
+                print(f"❌ {problem}")
+            return 1
+    request = urllib.request.Request(args.server.rstrip("/") + "/prompt", method="POST",
+                                     data=json.dumps({"prompt": prompt, "client_id": str(uuid.uuid4())}).encode(),
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            result = json.load(response)
+    except urllib.error.HTTPError as e:
+        print(f"❌ ComfyUI rejected the prompt ({e.code}): {e.read().decode(errors='replace')[:2000]}")
+        return 1
+    except OSError as e:
+        print(f"❌ Could not reach {args.server}: {e}")
+        return 1
+    print(f"✅ Queued as {result.get('prompt_id')} (position {result.get('number')})")
+    return 0
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Compile UI workflows into ready-to-queue ComfyUI API prompts.")
+    parser.add_argument("--server", default=DEFAULT_SERVER, help="ComfyUI URL (default: %(default)s)")
+    parser.add_argument("--object-info", help="Node definitions file instead of the server/cache")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("compile", help="Compile workflow files or folders")
+    p.add_argument("paths", nargs="+")
+    p.add_argument("--out", default="compiled-workflows", help="Output folder (default: %(default)s)")
+    p.add_argument("--allow-missing", action="store_true", help="Only warn about missing model files")
+    p.set_defaults(func=cmd_compile)
+
+    p = sub.add_parser("fetch-info", help="Cache /object_info from a running ComfyUI")
+    p.set_defaults(func=cmd_fetch_info)
+
+    p = sub.add_parser("queue", help="Submit a compiled prompt (or a UI workflow, compiled first) to /prompt")
+    p.add_argument("prompt")
+    p.set_defaults(func=cmd_queue)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+if __name__ == "__main__":
+    main()
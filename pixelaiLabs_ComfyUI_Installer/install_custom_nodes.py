@@ -0,0 +1,186 @@
+"""
+Custom node installer shared by ComfyUI_Installer.bat and Runpod/ComfyUI_Installer_Runpod.sh.
+
+Clones (or updates) every custom node in parallel with shallow clones, then
+resolves all of their requirements.txt files together with ComfyUI's in a
+single pip resolution (resolve_requirements.py), so the shared torch/numpy
+stack is resolved once instead of once per node, and prints which node asked
+for which version when they disagree. If that fails, it falls back to one pip
+run per node so a single broken node cannot block the others.
+
+Usage (with the ComfyUI venv active):
+    python install_custom_nodes.py --dir ComfyUI/custom_nodes [--update] [--jobs 8] [--require "pkg>=1.0"]
+"""
+
+import os
+import sys
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import resolve_requirements
+
+MAX_CONCURRENT_CLONES = 8
+
+# Each node: repo URL, plus optional requirement names to leave out
+NODE_REPOS = [
+    {"url": "https://github.com/ltdrdata/ComfyUI-Manager.git"},
+    {"url": "https://github.com/Fannovel16/comfyui_controlnet_aux"},
+    {"url": "https://github.com/pythongosssss/ComfyUI-Custom-Scripts"},
+    {"url": "https://github.com/ltdrdata/ComfyUI-Impact-Pack"},
+    {"url": "https://github.com/rgthree/rgthree-comfy"},
+    {"url": "https://github.com/kijai/ComfyUI-KJNodes"},
+    {"url": "https://github.com/kijai/ComfyUI-Florence2"},
+    {"url": "https://github.com/cubiq/ComfyUI_essentials"},
+    {"url": "https://github.com/ltdrdata/ComfyUI-Inspire-Pack"},
+    {"url": "https://github.com/jamesWalker55/comfyui-various"},
+    {"url": "https://github.com/un-seen/comfyui-tensorops"},
+    {"url": "https://github.com/city96/ComfyUI-GGUF"},
+    {"url": "https://github.com/PowerHouseMan/ComfyUI-AdvancedLivePortrait"},
+    {"url": "https://github.com/cubiq/ComfyUI_FaceAnalysis"},
+    {"url": "https://github.com/BadCafeCode/masquerade-nodes-comfyui"},
+    {"url": "https://github.com/Ryuukeisyou/comfyui_face_parsing"},
+    {"url": "https://github.com/TinyTerra/ComfyUI_tinyterraNodes"},
+    {"url": "https://github.com/Pixelailabs/Save_Florence2_Bulk_Prompts"},
+    {"url": "https://github.com/chflame163/ComfyUI_LayerStyle_Advance"},
+    {"url": "https://github.com/chflame163/ComfyUI_LayerStyle"},
+    {"url": "https://github.com/yolain/ComfyUI-Easy-Use"},
+    {"url": "https://github.com/Kosinkadink/ComfyUI-VideoHelperSuite"},
+    {"url": "https://github.com/Fannovel16/ComfyUI-Frame-Interpolation"},
+    {"url": "https://github.com/orssorbit/ComfyUI-wanBlockswap"},
+    {"url": "https://github.com/1038lab/ComfyUI-SparkTTS"},
+    # Its huggingface_hub pin conflicts with the rest of the stack
+    {"url": "https://github.com/EvilBT/ComfyUI_SLK_joy_caption_two", "exclude": ["huggingface_hub", "huggingface-hub"]},
+    {"url": "https://github.com/ltdrdata/ComfyUI-Impact-Subpack"},
+    {"url": "https://github.com/kijai/ComfyUI-WanVideoWrapper"},
+    {"url": "https://github.com/christian-byrne/audio-separation-nodes-comfyui"},
+]
+
+print_lock = threading.Lock()
+
+def safe_print(message):
+    """Thread-safe print function"""
+    with print_lock:
+        print(message, flush=True)
+
+def node_name(node):
+    url = node["url"].rstrip("/")
+    return os.path.basename(url[:-4] if url.endswith(".git") else url)
+
+def run(command, cwd=None):
+    """Runs a command quietly; returns (ok, combined output)."""
+    result = subprocess.run(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    return result.returncode == 0, result.stdout
+
+# --- Cloning ---
+def clone_or_update(node, nodes_dir, update=False):
+    """
+    Shallow-clones a node, or fast-forwards an existing checkout when update is set.
+
+    Returns:
+        str: "cloned", "updated", "present" or "failed".
+    """
+    name = node_name(node)
+    path = os.path.join(nodes_dir, name)
+    if os.path.isdir(os.path.join(path, ".git")):
+        if not update:
+            return "present"
+        ok, output = run(["git", "-C", path, "pull", "--ff-only"])
+        if not ok:
+            safe_print(f"⚠️  Failed to update {name}, using existing version:\n{output.strip()}")
+        return "updated" if ok else "present"
+    if os.path.exists(path):
+        safe_print(f"⚠️  {name} exists but is not a git checkout, leaving it alone")
+        return "present"
+    ok, output = run(["git", "clone", "--depth", "1", "--recurse-submodules", "--shallow-submodules",
+                      node["url"], path])
+    if not ok:
+        safe_print(f"❌ Failed to clone {name}:\n{output.strip()}")
+        return "failed"
+    return "cloned"
+
+def clone_all(nodes, nodes_dir, update=False, jobs=MAX_CONCURRENT_CLONES):
+    """Clones every node in parallel; returns {name: outcome}."""
+    os.makedirs(nodes_dir, exist_ok=True)
+    outcomes = {}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(clone_or_update, node, nodes_dir, update): node for node in nodes}
+        for future in as_completed(futures):
+            name = node_name(futures[future])
+            outcomes[name] = future.result()
+            safe_print(f"{'✅' if outcomes[name] != 'failed' else '❌'} {name}: {outcomes[name]}")
+    return outcomes
+
+# --- Requirements ---
+def node_requirements(node, nodes_dir):
+    """Requirement lines of a node's requirements.txt (None if it has none), minus its excludes."""
+    return resolve_requirements.read_requirements(os.path.join(nodes_dir, node_name(node), "requirements.txt"),
+                                                  node.get("exclude", []))
+
+def pip_install(args):
+    return subprocess.run([sys.executable, "-m", "pip", "install"] + args).returncode == 0
+
+def install_requirements(nodes, nodes_dir, extra=None):
+    """
+    Resolves ComfyUI's, the installer's and every node's requirements in one go
+    (see resolve_requirements.py), falling back to per-node runs if that fails.
+
+    Returns:
+        list: Names of nodes whose requirements could not be installed.
+    """
+    comfy_dir = os.path.dirname(nodes_dir)
+    per_node = {}
+    for node in nodes:
+        lines = node_requirements(node, nodes_dir)
+        if lines:
+            per_node[node_name(node)] = lines
+    if not per_node:
+        print("No custom node requirements to install.")
+        return []
+
+    sources = resolve_requirements.base_sources(comfy_dir, extra)
+    sources.update(per_node)
+    if resolve_requirements.resolve_and_install(sources, comfy_dir):
+        return []
+
+    print("⚠️  Merged install failed, installing node requirements one by one...")
+    failed = []
+    for name, lines in per_node.items():
+        print(f"Installing requirements for {name}...")
+        node_file = os.path.join(nodes_dir, name, ".pixelai_requirements.txt")
+        with open(node_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        if not pip_install(["-r", node_file]):
+            print(f"Warning: Failed to install requirements for {name}. Continuing...")
+            failed.append(name)
+        os.remove(node_file)
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser(description="Clone custom nodes in parallel and install their requirements in one pip run.")
+    parser.add_argument("--dir", default=os.path.join("ComfyUI", "custom_nodes"), help="custom_nodes directory")
+    parser.add_argument("--update", action="store_true", help="git pull nodes that are already cloned")
+    parser.add_argument("--jobs", type=int, default=MAX_CONCURRENT_CLONES, help="Parallel clones")
+    parser.add_argument("--no-requirements", action="store_true", help="Only clone")
+    parser.add_argument("--require", action="append", default=[], help="Extra requirement resolved together with the nodes'")
+    args = parser.parse_args()
+
+    nodes_dir = os.path.abspath(args.dir)
+    print(f"Installing {len(NODE_REPOS)} custom nodes into {nodes_dir}...")
+    outcomes = clone_all(NODE_REPOS, nodes_dir, update=args.update, jobs=args.jobs)
+    installed = [node for node in NODE_REPOS if outcomes.get(node_name(node)) != "failed"]
+
+    failed_requirements = [] if args.no_requirements else install_requirements(installed, nodes_dir, args.require)
+    failed_clones = [name for name, outcome in outcomes.items() if outcome == "failed"]
+    print("\n" + "=" * 80)
+    print(f"✅ Custom nodes ready: {len(installed)}/{len(NODE_REPOS)}")
+    if failed_clones:
+        print(f"❌ Failed to clone: {', '.join(sorted(failed_clones))}")
+    if failed_requirements:
+        print(f"❌ Failed requirements: {', '.join(failed_requirements)}")
+    print("=" * 80)
+    sys.exit(1 if failed_clones or failed_requirements else 0)
+
+if __name__ == "__main__":
+    main()
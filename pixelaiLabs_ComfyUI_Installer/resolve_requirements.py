@@ -0,0 +1,306 @@
+"""
+Single dependency resolution for ComfyUI and its custom nodes.
+
+Collects the requirements of ComfyUI's requirements.txt, every custom node and
+the installer's own pins, resolves them once with pip (--dry-run --report),
+writes a lock file of exact versions, and installs the result from a local
+wheelhouse so wheels are downloaded or built once and reused on the next run.
+
+When pip cannot satisfy everyone, or some demand loses against the resolved
+version, a conflict report lists which source asked for which version.
+
+Usage (with the ComfyUI venv active):
+    python resolve_requirements.py --comfy-dir ComfyUI                 (resolve, lock and install)
+    python resolve_requirements.py --comfy-dir ComfyUI --report-only   (only print the conflict report)
+    python resolve_requirements.py --comfy-dir ComfyUI --require "huggingface-hub>=0.27.0"
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+from importlib import metadata
+
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.utils import canonicalize_name
+
+MERGED_REQUIREMENTS = ".pixelai_requirements.txt"
+LOCK_FILE = ".pixelai_requirements.lock.txt"
+CONFLICT_REPORT = ".pixelai_conflicts.txt"
+INSTALLER_SOURCE = "installer"
+
+def wheelhouse_dir(comfy_dir):
+    """Where downloaded and built wheels are kept between runs."""
+    return os.environ.get("PIXELAI_WHEELHOUSE") or os.path.join(comfy_dir, ".pixelai_wheelhouse")
+
+def pip(args, capture=False):
+    """Runs pip of the current interpreter (the venv when it is active)."""
+    return subprocess.run([sys.executable, "-m", "pip"] + args, text=True,
+                          stdout=subprocess.PIPE if capture else None,
+                          stderr=subprocess.PIPE if capture else None)
+
+# --- Collecting requirements ---
+def read_requirements(path, exclude=()):
+    """
+    Reads a requirements file.
+
+    Nested -r/-c files are made absolute so the lines can be merged into a file
+    elsewhere, and requirements named in `exclude` are dropped.
+
+    Returns:
+        list: Requirement lines, or None if the file does not exist.
+    """
+    if not os.path.isfile(path):
+        return None
+    excluded = {canonicalize_name(n) for n in exclude}
+    lines = []
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for raw in f:
+            line = raw.split(" #", 1)[0].strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith(("-r ", "-c ")):
+                flag, target = line.split(None, 1)
+                line = f"{flag} {os.path.join(os.path.dirname(path), target)}"
+            elif excluded and not line.startswith("-"):
+                requirement = parse_requirement(line)
+                if requirement and canonicalize_name(requirement.name) in excluded:
+                    continue
+            lines.append(line)
+    return lines
+
+def parse_requirement(line):
+    """A packaging Requirement for a plain requirement line, None for options and URLs."""
+    if line.startswith("-") or re.match(r"^\w+\+", line) or "://" in line.split("@", 1)[0]:
+        return None
+    try:
+        return Requirement(line)
+    except InvalidRequirement:
+        return None
+
+def write_merged(sources, path):
+    """Writes {source: lines} into one requirements file, tagged with where each line came from."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Generated by resolve_requirements.py - merged ComfyUI and custom node requirements\n")
+        for source, lines in sources.items():
+            f.write(f"\n# from {source}\n")
+            for line in lines:
+                f.write(line + "\n")
+    return path
+
+def demands(sources):
+    """Maps each project to the (source, requirement) pairs that ask for it, skipping markers that do not apply."""
+    result = {}
+    for source, lines in sources.items():
+        for line in lines:
+            requirement = parse_requirement(line)
+            if requirement is None:
+                continue
+            if requirement.marker and not requirement.marker.evaluate():
+                continue
+            result.setdefault(canonicalize_name(requirement.name), []).append((source, requirement))
+    return result
+
+# --- Resolving and locking ---
+def resolve(merged_path):
+    """
+    Resolves the merged requirements against the current environment without installing.
+
+    Returns:
+        tuple: (pip report dict or None, pip's error output)
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report_path = os.path.join(tmp_dir, "report.json")
+        result = pip(["install", "--dry-run", "--quiet", "--report", report_path, "-r", merged_path], capture=True)
+        if result.returncode != 0 or not os.path.isfile(report_path):
+            return None, result.stderr
+        with open(report_path, "r", encoding="utf-8") as f:
+            return json.load(f), result.stderr
+
+def installed_versions():
+    """Versions of everything installed in the current environment."""
+    return {canonicalize_name(d.metadata["Name"]): d.version for d in metadata.distributions() if d.metadata["Name"]}
+
+def resolved_versions(report):
+    """What the environment will hold after installing the resolution."""
+    versions = installed_versions()
+    for item in (report or {}).get("install", []):
+        versions[canonicalize_name(item["metadata"]["name"])] = item["metadata"]["version"]
+    return versions
+
+def write_lock(path, versions):
+    """Writes exact pins usable as a pip constraints file (-c)."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Generated by resolve_requirements.py - exact versions of the resolved environment\n")
+        for name in sorted(versions):
+            f.write(f"{name}=={versions[name]}\n")
+    return path
+
+# --- Conflict report ---
+def find_conflicts(sources, versions):
+    """
+    Demands that the resolved (or installed) version does not satisfy.
+
+    Returns:
+        list: (project, source, requirement, resolved_version)
+    """
+    conflicts = []
+    for name, wanted in sorted(demands(sources).items()):
+        version = versions.get(name)
+        if version is None:
+            continue
+        for source, requirement in wanted:
+            if requirement.specifier and not requirement.specifier.contains(version, prereleases=True):
+                conflicts.append((name, source, requirement, version))
+    return conflicts
+
+def differing_demands(sources):
+    """Projects that different sources ask for with different version specifiers."""
+    result = {}
+    for name, wanted in sorted(demands(sources).items()):
+        specifiers = {str(requirement.specifier) for _, requirement in wanted if requirement.specifier}
+        if len(specifiers) > 1:
+            result[name] = wanted
+    return result
+
+def format_report(sources, versions=None, pip_error=None):
+    """Human-readable conflict report."""
+    lines = []
+    if pip_error:
+        lines.append("❌ pip could not resolve the merged requirements:")
+        lines.extend("   " + l for l in pip_error.strip().splitlines()[-15:])
+        lines.append("")
+        lines.append("Projects requested with different versions:")
+        for name, wanted in differing_demands(sources).items():
+            lines.append(f"  {name}")
+            for source, requirement in wanted:
+                lines.append(f"    {str(requirement.specifier) or '(any)':<24} <- {source}")
+    else:
+        conflicts = find_conflicts(sources, versions)
+        if not conflicts:
+            lines.append("✅ No conflicts: every source is satisfied by the resolved versions.")
+        else:
+            lines.append("⚠️  Demands not satisfied by the resolved environment:")
+            for name, source, requirement, version in conflicts:
+                lines.append(f"  {name} {version}: {source} wants {requirement.specifier}")
+    return "\n".join(lines)
+
+# --- Wheelhouse install ---
+def _wheel_for(item, wheelhouse):
+    """Wheel already in the wheelhouse for a resolved item, or None."""
+    name = canonicalize_name(item["metadata"]["name"]).replace("-", "_")
+    version = item["metadata"]["version"]
+    url = item["download_info"]["url"]
+    if url.endswith(".whl") and os.path.isfile(os.path.join(wheelhouse, os.path.basename(url))):
+        return os.path.join(wheelhouse, os.path.basename(url))
+    for filename in os.listdir(wheelhouse):
+        parts = filename.split("-")
+        if filename.endswith(".whl") and len(parts) >= 3 and parts[0].lower() == name and parts[1] == version:
+            return os.path.join(wheelhouse, filename)
+    return None
+
+def _download_spec(item):
+    """What to hand `pip wheel` for a resolved item: its archive URL, or the pinned VCS checkout."""
+    info = item["download_info"]
+    if "vcs_info" in info:
+        return f"{info['vcs_info']['vcs']}+{info['url']}@{info['vcs_info']['commit_id']}"
+    return info["url"]
+
+def install_resolved(report, wheelhouse, merged_path, lock_path):
+    """
+    Installs the resolution from the wheelhouse, downloading or building missing wheels first.
+
+    Falls back to a normal install constrained by the lock when something cannot
+    be turned into a wheel (local directories, failed builds).
+
+    Returns:
+        bool: True on success.
+    """
+    items = report.get("install", [])
+    if not items:
+        print("✅ Everything already satisfied.")
+        return True
+    os.makedirs(wheelhouse, exist_ok=True)
+    wheels = []
+    for item in items:
+        wheel = _wheel_for(item, wheelhouse)
+        if wheel is None and "dir_info" not in item["download_info"]:
+            print(f"📥 {item['metadata']['name']} {item['metadata']['version']}")
+            if pip(["wheel", "--quiet", "--no-deps", "--wheel-dir", wheelhouse, _download_spec(item)]).returncode == 0:
+                wheel = _wheel_for(item, wheelhouse)
+        if wheel is None:
+            print(f"⚠️  No wheel for {item['metadata']['name']}, falling back to a regular install")
+            return pip(["install", "-r", merged_path, "-c", lock_path]).returncode == 0
+        wheels.append(wheel)
+
+    print(f"📦 Installing {len(wheels)} package(s) from {wheelhouse}")
+    if pip(["install", "--no-deps", "--no-index"] + wheels).returncode == 0:
+        return True
+    return pip(["install", "-r", merged_path, "-c", lock_path]).returncode == 0
+
+def resolve_and_install(sources, comfy_dir, report_only=False):
+    """
+    Resolves every source once, writes the lock file and conflict report, then installs.
+
+    Returns:
+        bool: True if the environment now satisfies the resolution.
+    """
+    merged_path = write_merged(sources, os.path.join(comfy_dir, MERGED_REQUIREMENTS))
+    report_path = os.path.join(comfy_dir, CONFLICT_REPORT)
+    print(f"🔎 Resolving {sum(len(l) for l in sources.values())} requirement lines from {len(sources)} sources...")
+    report, pip_error = resolve(merged_path)
+    if report is None:
+        text = format_report(sources, pip_error=pip_error)
+    else:
+        versions = resolved_versions(report)
+        write_lock(os.path.join(comfy_dir, LOCK_FILE), versions)
+        text = format_report(sources, versions)
+    print(text)
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write(text + "\n")
+    if report is None or report_only:
+        return report is not None
+    return install_resolved(report, wheelhouse_dir(comfy_dir), merged_path, os.path.join(comfy_dir, LOCK_FILE))
+
+def base_sources(comfy_dir, extra=None):
+    """Requirement lines of ComfyUI itself and the installer's own pins."""
+    sources = {}
+    comfy = read_requirements(os.path.join(comfy_dir, "requirements.txt"))
+    if comfy:
+        sources["ComfyUI"] = comfy
+    if extra:
+        sources[INSTALLER_SOURCE] = list(extra)
+    return sources
+
+def collect_sources(comfy_dir, nodes_dir=None, extra=None, excludes=None):
+    """
+    Requirement lines per source: ComfyUI, the installer's own pins, then each custom node.
+
+    Args:
+        excludes (dict): {node folder name: [project names to drop]}.
+    """
+    nodes_dir = nodes_dir or os.path.join(comfy_dir, "custom_nodes")
+    sources = base_sources(comfy_dir, extra)
+    if os.path.isdir(nodes_dir):
+        for name in sorted(os.listdir(nodes_dir)):
+            lines = read_requirements(os.path.join(nodes_dir, name, "requirements.txt"), (excludes or {}).get(name, ()))
+            if lines:
+                sources[name] = lines
+    return sources
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve ComfyUI and custom node requirements once, lock and install them.")
+    parser.add_argument("--comfy-dir", default="ComfyUI", help="ComfyUI folder")
+    parser.add_argument("--require", action="append", default=[], help="Extra installer requirement, e.g. 'huggingface-hub>=0.27.0'")
+    parser.add_argument("--report-only", action="store_true", help="Resolve and report conflicts without installing")
+    args = parser.parse_args()
+
+    comfy_dir = os.path.abspath(args.comfy_dir)
+    ok = resolve_and_install(collect_sources(comfy_dir, extra=args.require), comfy_dir, args.report_only)
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()